@@ -1,88 +1,257 @@
-from fastapi import APIRouter, Depends, Header
+import os
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
-from app.db.connection import get_db
+from sqlalchemy import text, func, tuple_
+from app.dependencies import get_scoped_db, check_not_modified
+from app.db.async_connection import get_async_db
 from app.models.pond import Pond
-from app.models.stocking import StockingLog
-from app.models.harvest import HarvestLog
-from app.models.mortality import MortalityLog
+from app.models.analytics_rollup import MonthlyPondRollup, MonthlyLossCauseRollup
+from app.services.change_log import owner_etag
+from app.services.lru_cache import LRUCache, MISSING
+from app.services.owner_events import on_owner_commit
 
 router = APIRouter()
+async_router = APIRouter() # Mounted in front of `router` when ASYNC_DB=1
 
-@router.get("/summary")
-def get_analytics(
-    db: Session = Depends(get_db),
-    x_user_id: str = Header(...) # Security: Filter by user
-):
-    # 1. Get User's Ponds
-    user_ponds = db.query(Pond).filter(Pond.owner_id == x_user_id).all()
-    pond_ids = [p.id for p in user_ponds]
-    
-    # Defaults if no data
-    empty_stats = {
-        "total_revenue": 0, "total_kg": 0, 
-        "total_loss_qty": 0, "total_loss_kg": 0,
-        "yearly_chart": {"labels": [], "data": []}, 
-        "system_recommendation": "No data available."
-    }
+# Per-owner summary cache, (etag, summary). An entry is reused only while
+# its ETag (the owner's change seq) is current, so a write through another
+# uvicorn worker is seen at once. The owner_events hook frees entries early.
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "5000"))
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+summary_cache = LRUCache(ANALYTICS_CACHE_SIZE, ttl=ANALYTICS_CACHE_TTL)
+
+@on_owner_commit
+def _invalidate_summary(owner_id: str):
+    summary_cache.invalidate(owner_id)
+
+RECOMMENDATIONS = {
+    "Flood": "Priority: Upgrade dike infrastructure.",
+    "Disease": "Priority: Review water quality protocol.",
+    "Heat": "Priority: Increase water depth.",
+    "Theft": "Priority: Install security lighting.",
+}
+
+# Everything the dashboard needs in ONE round trip, read from the monthly
+# rollups (see app/services/analytics_rollup.py) instead of the raw logs
+SUMMARY_SQL = text("""
+WITH yearly AS (
+    SELECT year,
+           SUM(harvested_kg) AS total_kg,
+           SUM(revenue) AS revenue,
+           SUM(harvest_count) AS harvest_count,
+           SUM(loss_qty) AS loss_qty,
+           SUM(loss_kg) AS loss_kg
+    FROM monthly_pond_rollups
+    WHERE owner_id = :owner_id
+    GROUP BY year
+)
+SELECT
+    EXISTS (
+        SELECT 1 FROM stocking_logs s
+        JOIN ponds p ON p.id = s.pond_id
+        WHERE p.owner_id = :owner_id
+    ) AS has_stockings,
+    (SELECT SUM(revenue) FROM yearly) AS revenue,
+    (SELECT SUM(total_kg) FROM yearly) AS kg,
+    (SELECT SUM(loss_qty) FROM yearly) AS loss_qty,
+    (SELECT SUM(loss_kg) FROM yearly) AS loss_kg,
+    (SELECT json_agg(json_build_array(year, total_kg) ORDER BY year)
+       FROM yearly WHERE harvest_count > 0) AS yearly,
+    (SELECT cause FROM monthly_loss_cause_rollups
+      WHERE owner_id = :owner_id
+      GROUP BY cause ORDER BY SUM(loss_count) DESC, cause LIMIT 1) AS top_cause
+""")
+
+def compute_summary(db: Session, owner_id: str) -> dict:
+    row = db.execute(SUMMARY_SQL, {"owner_id": owner_id}).one()
 
-    if not pond_ids:
-        return empty_stats
-
-    # Get stockings to link everything together
-    stockings = db.query(StockingLog).filter(StockingLog.pond_id.in_(pond_ids)).all()
-    stocking_ids = [s.id for s in stockings]
-
-    if not stocking_ids:
-         return empty_stats
-
-    # 2. CALCULATE METRICS
-    
-    # Revenue & Harvest Weight
-    harvest_stats = db.query(
-        func.sum(HarvestLog.total_weight_kg * HarvestLog.market_price_per_kg).label('revenue'),
-        func.sum(HarvestLog.total_weight_kg).label('kg')
-    ).filter(HarvestLog.stocking_id.in_(stocking_ids)).first()
-
-    # Mortality Stats (The missing piece!)
-    mortality_stats = db.query(
-        func.sum(MortalityLog.quantity_lost).label('qty'),
-        func.sum(MortalityLog.weight_lost_kg).label('kg')
-    ).filter(MortalityLog.stocking_id.in_(stocking_ids)).first()
-
-    # 3. YEARLY CHART DATA
-    yearly_data = db.query(
-        extract('year', HarvestLog.harvest_date).label('year'),
-        func.sum(HarvestLog.total_weight_kg).label('total_kg')
-    ).filter(HarvestLog.stocking_id.in_(stocking_ids))\
-     .group_by('year').all()
-
-    years = [str(int(row.year)) for row in yearly_data]
-    weights = [row.total_kg for row in yearly_data]
-
-    # 4. RECOMMENDATION SYSTEM
-    common_cause = db.query(
-        MortalityLog.cause, func.count(MortalityLog.cause)
-    ).filter(MortalityLog.stocking_id.in_(stocking_ids))\
-     .group_by(MortalityLog.cause).order_by(func.count(MortalityLog.cause).desc()).first()
+    # Defaults if no data (no ponds, or ponds without any stocking)
+    if not row.has_stockings:
+        return {
+            "total_revenue": 0, "total_kg": 0,
+            "total_loss_qty": 0, "total_loss_kg": 0,
+            "yearly_chart": {"labels": [], "data": []},
+            "system_recommendation": "No data available."
+        }
 
+    yearly = row.yearly or []
+
+    # RECOMMENDATION SYSTEM
     recommendation = "Operations are healthy."
-    if common_cause:
-        cause_name = common_cause[0]
-        if cause_name == "Flood": recommendation = "Priority: Upgrade dike infrastructure."
-        elif cause_name == "Disease": recommendation = "Priority: Review water quality protocol."
-        elif cause_name == "Heat": recommendation = "Priority: Increase water depth."
-        elif cause_name == "Theft": recommendation = "Priority: Install security lighting."
-
-    # 5. RETURN EXACT KEYS FOR YOUR FRONTEND
+    if row.top_cause:
+        recommendation = RECOMMENDATIONS.get(row.top_cause, recommendation)
+
+    # RETURN EXACT KEYS FOR YOUR FRONTEND
     return {
-        "total_revenue": harvest_stats.revenue or 0.0,
-        "total_kg": harvest_stats.kg or 0.0,            # <--- Renamed to match frontend
-        "total_loss_qty": mortality_stats.qty or 0,     # <--- Added back
-        "total_loss_kg": mortality_stats.kg or 0.0,     # <--- Added back
+        "total_revenue": row.revenue or 0.0,
+        "total_kg": row.kg or 0.0,
+        "total_loss_qty": row.loss_qty or 0,
+        "total_loss_kg": row.loss_kg or 0.0,
         "yearly_chart": {
-            "labels": years,
-            "data": weights
+            "labels": [str(year) for year, _ in yearly],
+            "data": [total_kg for _, total_kg in yearly]
         },
         "system_recommendation": recommendation
-    }
\ No newline at end of file
+    }
+
+@router.get("/summary")
+def get_analytics(
+    response: Response,
+    db: Session = Depends(get_scoped_db),
+    x_user_id: str = Header(...), # Security: Filter by user
+    if_none_match: Optional[str] = Header(None)
+):
+    # One index lookup for the owner's current data version, then the 304
+    # check; the summary query runs only when the cache has no current entry
+    etag = owner_etag(db, x_user_id, "summary")
+    check_not_modified(response, if_none_match, etag)
+    cached = summary_cache.get(x_user_id)
+    if cached is MISSING or cached[0] != etag:
+        cached = (etag, compute_summary(db, x_user_id))
+        summary_cache.set(x_user_id, cached)
+    return cached[1]
+
+@async_router.get("/summary")
+async def get_analytics_async(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    x_user_id: str = Header(...),
+    if_none_match: Optional[str] = Header(None)
+):
+    etag = await db.run_sync(owner_etag, x_user_id, "summary")
+    check_not_modified(response, if_none_match, etag)
+    cached = summary_cache.get(x_user_id)
+    if cached is MISSING or cached[0] != etag:
+        cached = (etag, await db.run_sync(compute_summary, x_user_id))
+        summary_cache.set(x_user_id, cached)
+    return cached[1]
+
+@router.get("/cache")
+def get_analytics_cache_stats():
+    """Hit/miss counters of this worker's summary cache."""
+    return summary_cache.stats()
+
+# --- ROLLUP BREAKDOWNS (monthly granularity, read only the rollup tables) ---
+def _rollup_filters(model, owner_id: str, start: Optional[date], end: Optional[date], pond_id: Optional[int] = None):
+    """Owner scope plus an inclusive month range (start/end match their whole month)."""
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    filters = [model.owner_id == owner_id]
+    if start:
+        filters.append(tuple_(model.year, model.month) >= (start.year, start.month))
+    if end:
+        filters.append(tuple_(model.year, model.month) <= (end.year, end.month))
+    if pond_id is not None:
+        filters.append(model.pond_id == pond_id)
+    return filters
+
+@router.get("/monthly")
+def get_monthly_series(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    pond_id: Optional[int] = None,
+    db: Session = Depends(get_scoped_db),
+    x_user_id: str = Header(...)
+):
+    """Month-by-month harvest and loss series (all ponds, or one), gaps filled with 0."""
+    r = MonthlyPondRollup
+    rows = db.query(
+        r.year, r.month,
+        func.sum(r.harvested_kg).label("harvested_kg"),
+        func.sum(r.revenue).label("revenue"),
+        func.sum(r.loss_qty).label("loss_qty"),
+        func.sum(r.loss_kg).label("loss_kg")
+    ).filter(*_rollup_filters(r, x_user_id, start, end, pond_id)).group_by(
+        r.year, r.month
+    ).order_by(r.year, r.month).all()
+
+    series = {"labels": [], "harvested_kg": [], "revenue": [], "loss_qty": [], "loss_kg": []}
+    if not rows:
+        return series
+
+    by_month = {(row.year, row.month): row for row in rows}
+    year, month = rows[0].year, rows[0].month
+    while (year, month) <= (rows[-1].year, rows[-1].month):
+        row = by_month.get((year, month))
+        series["labels"].append(f"{year}-{month:02d}")
+        series["harvested_kg"].append(row.harvested_kg if row else 0.0)
+        series["revenue"].append(row.revenue if row else 0.0)
+        series["loss_qty"].append(int(row.loss_qty) if row else 0)
+        series["loss_kg"].append(row.loss_kg if row else 0.0)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return series
+
+@router.get("/ponds")
+def get_pond_comparison(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_scoped_db),
+    x_user_id: str = Header(...)
+):
+    """Totals per pond for comparison, best harvest first."""
+    r = MonthlyPondRollup
+    rows = db.query(
+        r.pond_id, Pond.name,
+        func.sum(r.harvested_kg).label("harvested_kg"),
+        func.sum(r.revenue).label("revenue"),
+        func.sum(r.harvest_count).label("harvest_count"),
+        func.sum(r.loss_qty).label("loss_qty"),
+        func.sum(r.loss_kg).label("loss_kg")
+    ).join(Pond, Pond.id == r.pond_id).filter(
+        *_rollup_filters(r, x_user_id, start, end)
+    ).group_by(r.pond_id, Pond.name).order_by(func.sum(r.harvested_kg).desc(), r.pond_id).all()
+
+    c = MonthlyLossCauseRollup
+    causes = db.query(c.pond_id, c.cause, func.sum(c.loss_count).label("loss_count")).filter(
+        *_rollup_filters(c, x_user_id, start, end)
+    ).group_by(c.pond_id, c.cause).order_by(c.pond_id, func.sum(c.loss_count).desc(), c.cause).all()
+    top_cause = {}
+    for cause in causes:
+        top_cause.setdefault(cause.pond_id, cause.cause) # First row per pond is the most frequent
+
+    return [
+        {
+            "pond_id": row.pond_id,
+            "pond_name": row.name,
+            "harvested_kg": row.harvested_kg,
+            "revenue": row.revenue,
+            "harvest_count": int(row.harvest_count),
+            "loss_qty": int(row.loss_qty),
+            "loss_kg": row.loss_kg,
+            "top_loss_cause": top_cause.get(row.pond_id)
+        }
+        for row in rows
+    ]
+
+@router.get("/losses")
+def get_loss_causes(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    pond_id: Optional[int] = None,
+    db: Session = Depends(get_scoped_db),
+    x_user_id: str = Header(...)
+):
+    """Loss reports per cause, most frequent first."""
+    c = MonthlyLossCauseRollup
+    rows = db.query(
+        c.cause,
+        func.sum(c.loss_count).label("loss_count"),
+        func.sum(c.loss_qty).label("loss_qty"),
+        func.sum(c.loss_kg).label("loss_kg")
+    ).filter(*_rollup_filters(c, x_user_id, start, end, pond_id)).group_by(c.cause).order_by(
+        func.sum(c.loss_count).desc(), c.cause
+    ).all()
+
+    return [
+        {
+            "cause": row.cause,
+            "loss_count": int(row.loss_count),
+            "loss_qty": int(row.loss_qty),
+            "loss_kg": row.loss_kg,
+            "recommendation": RECOMMENDATIONS.get(row.cause)
+        }
+        for row in rows
+    ]
@@ -1,16 +1,31 @@
 import os
-import io
-from PIL import Image
+import json
+import base64
+import asyncio
+from datetime import datetime
+from typing import Optional
 import google.generativeai as genai
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Header, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.db.connection import get_db
+from app.db.async_connection import get_async_db
 from app.models.chat import ChatHistory 
+from app.services.gemini_client import GeminiClient, GeminiBusyError
+from app.services.image_pipeline import prepare_chat_image, read_upload_limited, UploadTooLargeError
+from app.services.blob_store import store_image
+from app.services.chat_writer import chat_writer
+from app.services.chat_cache import ChatResponseCache, cache_key
+from app.services.lru_cache import MISSING
+from app.services.knowledge_base import load_knowledge_base, direct_answer, context_matches, offline_answer
 
 load_dotenv()
 router = APIRouter()
+async_router = APIRouter() # Mounted in front of `router` when ASYNC_DB=1
 
 # Response model
 class ChatResponse(BaseModel):
@@ -31,105 +46,284 @@ if GOOGLE_API_KEY:
 else:
     print("⚠️ NO API KEY FOUND.")
 
-OFFLINE_KNOWLEDGE = {
-    "green": "Green water indicates algae. Reduce feeding and turn on aerators.",
-    "brown": "Brown water means mud/solids. Apply agricultural lime (apog).",
-    "gasping": "Fish gasping means LOW OXYGEN. Aerate immediately!",
-    "feed": "Feed 3-5% of body weight daily. Split into morning/afternoon.",
-    "growth": "For faster growth, use high-protein feed and maintain high oxygen levels."
-}
+# Async calls with a per-worker concurrency cap, timeout and 429 backoff
+gemini = GeminiClient(model)
+
+# Local Q&A retrieval (English/Tagalog/Ilocano), built once per worker.
+# Confident matches are answered without Gemini; it also replaces the old
+# five-keyword OFFLINE_KNOWLEDGE scan as the offline answer.
+knowledge_base = load_knowledge_base()
+
+# Identical questions (same normalized text and photo) share one Gemini
+# call: cached for CHAT_CACHE_TTL, coalesced while in flight
+response_cache = ChatResponseCache()
+
+# --- CHAT HISTORY (per user, newest page first, keyset pagination) ---
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 200
+
+def encode_history_cursor(msg: ChatHistory) -> str:
+    """Opaque cursor pointing just before `msg` (its timestamp and id)."""
+    raw = f"{msg.timestamp.isoformat()}|{msg.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_history_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, msg_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), int(msg_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid history cursor")
+
+def history_query(owner_id: str, before: Optional[str], limit: int):
+    query = select(ChatHistory).where(ChatHistory.owner_id == owner_id)
+    if before:
+        timestamp, msg_id = decode_history_cursor(before)
+        query = query.where(tuple_(ChatHistory.timestamp, ChatHistory.id) < (timestamp, msg_id))
+    # One extra row tells whether an older page exists
+    return query.order_by(ChatHistory.timestamp.desc(), ChatHistory.id.desc()).limit(limit + 1)
+
+def history_page(rows: list, limit: int, paged: bool):
+    page = rows[:limit]
+    messages = [msg.to_dict() for msg in reversed(page)]
+    if not paged:
+        return messages # Bare list, as before pagination (older app versions)
+    return {
+        "messages": messages,
+        "next_cursor": encode_history_cursor(page[-1]) if len(rows) > limit else None
+    }
 
-# --- NEW ROUTE: GET HISTORY ---
 @router.get("/history")
-def get_chat_history(db: Session = Depends(get_db)):
-    """Fetch the last 50 chat messages from the database."""
-    history = db.query(ChatHistory).order_by(ChatHistory.timestamp.asc()).limit(50).all()
-    
-    # Convert DB objects to JSON-friendly list
-    return [
-        {
-            "id": msg.id,
-            "sender": msg.sender,
-            "text": msg.message,
-            "image": msg.image_url,
-            "timestamp": msg.timestamp
-        } 
-        for msg in history
-    ]
+def get_chat_history(
+    before: Optional[str] = None,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    paged: bool = False,
+    db: Session = Depends(get_db),
+    x_user_id: str = Header(...)
+):
+    """
+    The user's most recent messages, oldest first within the page.
+
+    With `paged=true` (or a `before` cursor) the answer is
+    {"messages": [...], "next_cursor": ...}: to scroll back, pass
+    `next_cursor` as `before`; it is null on the oldest page. Without
+    either, only the message list (the pre-pagination response shape).
+    Every page is one index range scan on (owner_id, timestamp, id),
+    however long the history is.
+    """
+    rows = db.execute(history_query(x_user_id, before, limit)).scalars().all()
+    return history_page(rows, limit, paged or before is not None)
+
+@async_router.get("/history")
+async def get_chat_history_async(
+    before: Optional[str] = None,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    paged: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    x_user_id: str = Header(...)
+):
+    rows = (await db.execute(history_query(x_user_id, before, limit))).scalars().all()
+    return history_page(rows, limit, paged or before is not None)
+
+# --- SHARED CHAT STEPS ---
+SYSTEM_INSTRUCTION = "You are an expert aquaculture consultant named AquaBot. Keep answers short and practical."
+BUSY_TEXT = "I am busy right now. Please ask in 10 seconds."
+UNREACHABLE_TEXT = "I cannot reach the AI server right now."
+
+def _prepare_and_store(raw: bytes):
+    prepared = prepare_chat_image(raw)
+    # Chat shows the photo itself, not the pond list thumbnails
+    return prepared, store_image(prepared.data, thumbnails=False)
+
+async def read_image(image: UploadFile):
+    """
+    (Gemini blob part, blob store hash) of an upload, or (None, None) if it
+    cannot be decoded. Too large uploads are rejected with 413.
+    """
+    if not image:
+        return None, None
+    try:
+        raw = await read_upload_limited(image)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    # Decoding, resizing and encoding are CPU work: keep them off the event loop
+    try:
+        prepared, image_hash = await asyncio.to_thread(_prepare_and_store, raw)
+    except Exception as e:
+        print(f"❌ Image processing failed: {e}")
+        return None, None
+
+    print(
+        f"📸 Image received: {image.filename} {prepared.original_size[0]}x{prepared.original_size[1]} "
+        f"{prepared.original_bytes // 1024} KB -> {prepared.width}x{prepared.height} {len(prepared.data) // 1024} KB"
+    )
+    image_blob = {"mime_type": prepared.mime_type, "data": prepared.data}
+    return image_blob, image_hash
+
+def stored_image_url(image_hash):
+    # The processed copy, served by /api/images
+    return f"/api/images/{image_hash}" if image_hash else None
+
+def search_knowledge(user_msg: str) -> list:
+    return knowledge_base.search(user_msg) if knowledge_base else []
+
+def build_prompt(user_msg: str, image_blob=None, matches=()) -> list:
+    prompt_parts = [SYSTEM_INSTRUCTION]
+    notes = context_matches(matches)
+    if notes:
+        prompt_parts.append(
+            "Reference notes from the AquaPin knowledge base (use them if relevant):\n"
+            + "\n".join(f"Q: {m.question}\nA: {m.answer}" for m in notes)
+        )
+    if image_blob:
+        prompt_parts.append("Analyze this image based on the user's question.")
+        prompt_parts.append(image_blob)
+    prompt_parts.append(f"User Question: {user_msg}")
+    return prompt_parts
+
+def offline_fallback(matches: list, ai_response_text: str) -> str:
+    """Offline answer if the AI failed or is not configured, else the AI text."""
+    if ai_response_text and "I cannot reach" not in ai_response_text:
+        return ai_response_text
+
+    answer = offline_answer(matches)
+    if answer:
+        return f"[Offline Mode] {answer}"
+
+    return ai_response_text or "I cannot reach the server and I don't have an offline answer for that."
+
+async def save_message(owner_id: Optional[str], sender: str, text: str, image_url: str = None):
+    # History is read per user: without an owner the row could never be read back
+    if owner_id is None:
+        return
+    # Write-behind: queued and committed in batches off the request path
+    await chat_writer.asave(owner_id, sender, text, image_url)
 
 # --- UPDATED CHAT ROUTE (Now Saves to DB) ---
 @router.post("/", response_model=ChatResponse)
 async def chat_with_aquabot(
     message: str = Form(...),           
     image: UploadFile = File(None),
-    db: Session = Depends(get_db) # <--- Inject Database Session
+    x_user_id: Optional[str] = Header(None) # Owner of the saved messages (not saved without it)
 ):
     """
-    Analyzes text AND optional image inputs, AND saves to database.
+    Analyzes text AND optional image inputs, AND saves to database (write-behind).
     """
     user_msg = message
-    pil_image = None
-    image_filename = None
-    
+
     # 1. Process Image
-    if image:
-        try:
-            contents = await image.read()
-            pil_image = Image.open(io.BytesIO(contents))
-            image_filename = image.filename # We save the filename to DB
-            print(f"📸 Image received: {image_filename}")
-        except Exception as e:
-            print(f"❌ Image processing failed: {e}")
+    image_blob, image_hash = await read_image(image)
     
     # --- SAVE USER MESSAGE TO DB ---
-    try:
-        user_record = ChatHistory(sender='user', message=user_msg, image_url=image_filename)
-        db.add(user_record)
-        db.commit() # Save now so it's safe
-    except Exception as e:
-        print(f"⚠️ Database Error (User): {e}")
+    await save_message(x_user_id, 'user', user_msg, stored_image_url(image_hash))
 
-    ai_response_text = ""
+    # 2. LOCAL KNOWLEDGE BASE (a confident match skips the AI call; photos
+    #    always go to the AI)
+    matches = search_knowledge(user_msg)
+    ai_response_text = "" if image_blob else (direct_answer(matches) or "")
 
-    # 2. TRY ONLINE AI
-    if model:
+    # 3. TRY ONLINE AI (cached / shared with identical questions in flight)
+    if gemini.available and not ai_response_text:
         try:
-            system_instruction = "You are an expert aquaculture consultant named AquaBot. Keep answers short and practical."
-            prompt_parts = [system_instruction]
-            if pil_image:
-                prompt_parts.append("Analyze this image based on the user's question.")
-                prompt_parts.append(pil_image)
-            prompt_parts.append(f"User Question: {user_msg}")
-
-            response = model.generate_content(prompt_parts)
-            ai_response_text = response.text
-            
+            ai_response_text = await response_cache.get_or_call(
+                cache_key(user_msg, image_hash),
+                lambda: gemini.generate(build_prompt(user_msg, image_blob, matches))
+            )
+        except GeminiBusyError as e:
+            print(f"❌ AI RATE LIMITED: {e}")
+            ai_response_text = BUSY_TEXT
         except Exception as e:
             print(f"❌ AI ERROR: {e}")
-            if "429" in str(e):
-                ai_response_text = "I am busy right now. Please ask in 10 seconds."
-            else:
-                ai_response_text = "I cannot reach the AI server right now."
-
-    # 3. FALLBACK TO OFFLINE (If AI failed or no model)
-    if not ai_response_text or "I cannot reach" in ai_response_text:
-        user_msg_lower = user_msg.lower()
-        found_offline = False
-        for keyword, answer in OFFLINE_KNOWLEDGE.items():
-            if keyword in user_msg_lower:
-                ai_response_text = f"[Offline Mode] {answer}"
-                found_offline = True
-                break
-        
-        if not found_offline and not ai_response_text:
-             ai_response_text = "I cannot reach the server and I don't have an offline answer for that."
+            ai_response_text = UNREACHABLE_TEXT
+
+    # 4. FALLBACK TO OFFLINE (If AI failed or no model)
+    ai_response_text = offline_fallback(matches, ai_response_text)
 
     # --- SAVE BOT RESPONSE TO DB ---
-    try:
-        bot_record = ChatHistory(sender='bot', message=ai_response_text)
-        db.add(bot_record)
-        db.commit()
-    except Exception as e:
-        print(f"⚠️ Database Error (Bot): {e}")
+    await save_message(x_user_id, 'bot', ai_response_text)
+
+    return {"response": ai_response_text}
+
+# --- STREAMING CHAT (Server-Sent Events) ---
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/stream")
+async def stream_chat_with_aquabot(
+    message: str = Form(...),
+    image: UploadFile = File(None),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Same as POST /api/chat/ but the answer arrives as SSE while Gemini writes it:
+      event: token  data: {"text": "..."}      (zero or more)
+      event: done   data: {"response": "..."}  (always last, the full answer)
+    Knowledge base answers and the offline answer (no model, or the AI
+    failed before its first token) are sent as the single `done` event.
+    """
+    user_msg = message
+    image_blob, image_hash = await read_image(image)
+    await save_message(x_user_id, 'user', user_msg, stored_image_url(image_hash))
+    matches = search_knowledge(user_msg)
+    key = cache_key(user_msg, image_hash)
+
+    async def events():
+        parts = []
+        ai_response_text = "" if image_blob else (direct_answer(matches) or "")
+        try:
+            if gemini.available and not ai_response_text:
+                try:
+                    # Cached or being answered for someone else: one `done` event
+                    cached = response_cache.get(key)
+                    if cached is MISSING and response_cache.inflight(key) is not None:
+                        cached = await response_cache.wait(response_cache.inflight(key))
+                    if cached not in (MISSING, None):
+                        ai_response_text = cached
+                    else:
+                        leader = response_cache.lead(key)
+                        try:
+                            async for text in gemini.stream(build_prompt(user_msg, image_blob, matches)):
+                                parts.append(text)
+                                yield sse_event("token", {"text": text})
+                        except BaseException as e:
+                            response_cache.finish(key, leader, error=e)
+                            raise
+                        ai_response_text = "".join(parts)
+                        response_cache.finish(key, leader, answer=ai_response_text)
+                except GeminiBusyError as e:
+                    print(f"❌ AI RATE LIMITED: {e}")
+                    ai_response_text = BUSY_TEXT
+                except Exception as e:
+                    print(f"❌ AI ERROR: {e}")
+                    ai_response_text = UNREACHABLE_TEXT
+
+            if parts:
+                # Failed mid-answer: keep what the client already has
+                ai_response_text = "".join(parts)
+            else:
+                ai_response_text = offline_fallback(matches, ai_response_text)
+            yield sse_event("done", {"response": ai_response_text})
+        finally:
+            if ai_response_text or parts:
+                await save_message(x_user_id, 'bot', ai_response_text or "".join(parts))
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no" # Do not let a reverse proxy buffer the stream
+    })
+
+@router.get("/ai-stats")
+def get_ai_stats():
+    """Gemini call counters of this worker (retries, 429s, timeouts) and knowledge base use."""
+    return {**gemini.stats(), "knowledge_base": knowledge_base.stats() if knowledge_base else None}
+
+@router.get("/cache")
+def get_chat_cache_stats():
+    """Hit rate of this worker's response cache and the Gemini calls it saved."""
+    return response_cache.stats()
 
-    return {"response": ai_response_text}
\ No newline at end of file
+@router.get("/writer")
+def get_chat_writer_stats():
+    """Write-behind queue of this worker: pending messages, rows per commit, fallbacks."""
+    return chat_writer.stats()
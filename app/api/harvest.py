@@ -1,15 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.db.connection import get_db
+from app.dependencies import get_scoped_db
 # CRITICAL FIX: Import the model, do not define it here!
 from app.models.harvest import HarvestLog 
 from app.models.stocking import StockingLog
 from app.schemas.harvest import HarvestCreate, HarvestResponse
+from app.services.pond_status import on_batch_harvested
+from app.services.owner_events import mark_owner_dirty, pond_owner
+from app.services.analytics_rollup import on_harvest_recorded
+from app.services.change_log import record_changes
+from sqlalchemy import exists
 
 router = APIRouter()
 
 @router.post("/", response_model=HarvestResponse)
-def create_harvest_log(log: HarvestCreate, db: Session = Depends(get_db)):
+def create_harvest_log(log: HarvestCreate, db: Session = Depends(get_scoped_db)):
     # 1. Get the original stocking info to calculate dates
     stocking = db.query(StockingLog).filter(StockingLog.id == log.stocking_id).first()
     if not stocking:
@@ -24,7 +29,12 @@ def create_harvest_log(log: HarvestCreate, db: Session = Depends(get_db)):
     # 3. Calculate Revenue
     revenue = log.total_weight_kg * log.market_price_per_kg
 
-    # 4. Save
+    # 4. Save (first harvest of a batch closes it in pond_status; every
+    #    harvest is added to the monthly rollup)
+    already_harvested = db.query(
+        exists().where(HarvestLog.stocking_id == log.stocking_id)
+    ).scalar()
+
     new_harvest = HarvestLog(
         stocking_id=log.stocking_id,
         harvest_date=log.harvest_date,
@@ -36,6 +46,16 @@ def create_harvest_log(log: HarvestCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_harvest)
+    db.flush()
+    if not already_harvested:
+        on_batch_harvested(db, stocking)
+    owner_id = pond_owner(db, stocking.pond_id)
+    on_harvest_recorded(db, owner_id, stocking.pond_id, new_harvest)
+    mark_owner_dirty(db, owner_id)
+    changes = [("harvest", new_harvest.id)]
+    if not already_harvested:
+        changes.append(("pond", stocking.pond_id)) # Batch closed: pond totals changed
+    record_changes(db, owner_id, changes)
     db.commit()
     db.refresh(new_harvest)
     
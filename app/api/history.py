@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import date
 
-from app.db.connection import get_db
+from app.dependencies import get_scoped_db, check_not_modified
+from app.responses import FastJSONResponse
+from app.db.async_connection import get_async_db
 from app.models.stocking import StockingLog
 from app.models.harvest import HarvestLog
 from app.models.pond import Pond
+from app.services.change_log import owner_etag
 
 router = APIRouter()
+async_router = APIRouter() # Mounted in front of `router` when ASYNC_DB=1
 
 # --- Schema for History Item ---
 class HistoryItem(BaseModel):
@@ -26,41 +32,67 @@ class HistoryItem(BaseModel):
         from_attributes = True
 
 # --- GET HISTORY FOR A SPECIFIC POND ---
+def closed_cycles_query(pond_id: int, owner_id: str):
+    """
+    Stock + Harvest = Closed Cycle, one query. A batch harvested in several
+    parts is listed once, with its first harvest (DISTINCT ON).
+    """
+    return select(StockingLog, HarvestLog).join(
+        HarvestLog, HarvestLog.stocking_id == StockingLog.id
+    ).join(Pond, Pond.id == StockingLog.pond_id).where(
+        StockingLog.pond_id == pond_id, Pond.owner_id == owner_id
+    ).distinct(StockingLog.id).order_by(StockingLog.id, HarvestLog.id)
+
+def pond_exists_query(pond_id: int, owner_id: str):
+    return select(Pond.id).where(Pond.id == pond_id, Pond.owner_id == owner_id)
+
+def history_items(rows) -> list:
+    history_list = [
+        {
+            "stocking_id": stock.id,
+            "fry_type": stock.fry_type,
+            "quantity_stocked": stock.fry_quantity,
+            "stock_date": stock.stocking_date,
+            "harvest_date": harvest.harvest_date,
+            "total_weight_kg": harvest.total_weight_kg,
+            "revenue": harvest.total_weight_kg * harvest.market_price_per_kg,
+            "fish_size": harvest.fish_size # <--- ADDED THIS
+        }
+        for stock, harvest in rows
+    ]
+
+    # Sort by newest harvest first
+    history_list.sort(key=lambda x: x['harvest_date'], reverse=True)
+    return history_list
+
 @router.get("/{pond_id}", response_model=List[HistoryItem])
 def get_pond_history(
     pond_id: int,
-    db: Session = Depends(get_db),
-    x_user_id: str = Header(...)
+    response: Response,
+    db: Session = Depends(get_scoped_db),
+    x_user_id: str = Header(...),
+    if_none_match: Optional[str] = Header(None)
 ):
+    # 0. Unchanged since the client's copy: 304
+    check_not_modified(response, if_none_match, owner_etag(db, x_user_id, "history"))
+
     # 1. Verify Pond Ownership
-    pond = db.query(Pond).filter(Pond.id == pond_id, Pond.owner_id == x_user_id).first()
-    if not pond:
+    if db.execute(pond_exists_query(pond_id, x_user_id)).first() is None:
         raise HTTPException(status_code=404, detail="Pond not found")
 
-    # 2. Get all Stocking Logs for this pond
-    stocking_logs = db.query(StockingLog).filter(StockingLog.pond_id == pond_id).all()
-
-    history_list = []
+    # 2. Closed cycles of this pond (already HistoryItem shaped: straight to orjson)
+    return FastJSONResponse(history_items(db.execute(closed_cycles_query(pond_id, x_user_id)).all()), headers=response.headers)
 
-    # 3. Find Matches (Stock + Harvest = Closed Cycle)
-    for stock in stocking_logs:
-        harvest = db.query(HarvestLog).filter(HarvestLog.stocking_id == stock.id).first()
-
-        if harvest:
-            calculated_revenue = harvest.total_weight_kg * harvest.market_price_per_kg
-            
-            history_list.append({
-                "stocking_id": stock.id,
-                "fry_type": stock.fry_type,
-                "quantity_stocked": stock.fry_quantity,
-                "stock_date": stock.stocking_date,
-                "harvest_date": harvest.harvest_date,
-                "total_weight_kg": harvest.total_weight_kg,
-                "revenue": calculated_revenue,
-                "fish_size": harvest.fish_size # <--- ADDED THIS
-            })
-
-    # 4. Sort by newest harvest first
-    history_list.sort(key=lambda x: x['harvest_date'], reverse=True)
-
-    return history_list
\ No newline at end of file
+@async_router.get("/{pond_id}", response_model=List[HistoryItem])
+async def get_pond_history_async(
+    pond_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    x_user_id: str = Header(...),
+    if_none_match: Optional[str] = Header(None)
+):
+    check_not_modified(response, if_none_match, await db.run_sync(owner_etag, x_user_id, "history"))
+    if (await db.execute(pond_exists_query(pond_id, x_user_id))).first() is None:
+        raise HTTPException(status_code=404, detail="Pond not found")
+    rows = (await db.execute(closed_cycles_query(pond_id, x_user_id))).all()
+    return FastJSONResponse(history_items(rows), headers=response.headers)
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, HTTPException, Header, Response
+from fastapi.responses import FileResponse
+from typing import Optional
+
+from app.services.blob_store import (
+    is_valid_hash, original_file, thumbnail_file, sniff_media_type,
+    THUMBNAIL_SIZES, MEDIA_TYPES
+)
+
+router = APIRouter()
+
+# Content-addressed: a hash never changes content, so clients may cache forever
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# --- GET IMAGE OR THUMBNAIL BY CONTENT HASH ---
+@router.get("/{image_hash}")
+def get_image(
+    image_hash: str,
+    size: Optional[int] = None,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Serve a pond image. Without `size` the original upload is returned,
+    with `size` (one of THUMBNAIL_SIZES) a WebP or JPEG thumbnail, picked
+    from the Accept header.
+    """
+    if not is_valid_hash(image_hash):
+        raise HTTPException(status_code=404, detail="Image not found")
+    if size is not None and size not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=400, detail=f"Size must be one of {list(THUMBNAIL_SIZES)}")
+
+    fmt = "webp" if accept and "image/webp" in accept else "jpeg"
+    etag = f'"{image_hash}"' if size is None else f'"{image_hash}-{size}-{fmt}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if size is not None:
+        headers["Vary"] = "Accept"
+
+    # Cheap revalidation: the ETag is derived from the URL alone
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    if size is None:
+        path = original_file(image_hash)
+        media_type = sniff_media_type(path) if path else None
+    else:
+        path = thumbnail_file(image_hash, size, fmt)
+        media_type = MEDIA_TYPES[fmt]
+
+    if not path:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    return FileResponse(path, media_type=media_type, headers=headers)
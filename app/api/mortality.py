@@ -1,8 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.db.connection import get_db
+from app.dependencies import get_scoped_db
 from app.models.mortality import MortalityLog
+from app.models.stocking import StockingLog
 from app.schemas.mortality import MortalityCreate, MortalityResponse
+from app.services.pond_status import on_loss_reported
+from app.services.owner_events import mark_owner_dirty, pond_owner
+from app.services.analytics_rollup import on_loss_recorded
+from app.services.change_log import record_changes
 
 router = APIRouter()
 
@@ -16,8 +21,14 @@ SOLUTIONS = {
 }
 
 @router.post("/", response_model=MortalityResponse)
-def report_loss(log: MortalityCreate, db: Session = Depends(get_db)):
-    # 1. Save the Loss
+def report_loss(log: MortalityCreate, db: Session = Depends(get_scoped_db)):
+    # 1. Find the batch the loss belongs to
+    stocking = db.query(StockingLog).filter(StockingLog.id == log.stocking_id).first()
+    if not stocking:
+        raise HTTPException(status_code=404, detail="Stocking ID not found")
+
+    # 2. Save the Loss (pond_status and the monthly rollups updated in the
+    #    same transaction)
     new_loss = MortalityLog(
         stocking_id=log.stocking_id,
         loss_date=log.loss_date,
@@ -27,10 +38,16 @@ def report_loss(log: MortalityCreate, db: Session = Depends(get_db)):
         action_taken=log.action_taken
     )
     db.add(new_loss)
+    on_loss_reported(db, stocking, log.quantity_lost)
+    owner_id = pond_owner(db, stocking.pond_id)
+    on_loss_recorded(db, owner_id, stocking.pond_id, new_loss)
+    mark_owner_dirty(db, owner_id)
+    db.flush()
+    record_changes(db, owner_id, [("mortality", new_loss.id), ("pond", stocking.pond_id)])
     db.commit()
     db.refresh(new_loss)
 
-    # 2. Generate Intelligent Solution
+    # 3. Generate Intelligent Solution
     suggestion = SOLUTIONS.get(log.cause, SOLUTIONS["Unknown"])
 
     return {
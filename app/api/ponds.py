@@ -1,69 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
-from typing import List, Dict
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer
+from typing import List, Optional
 import math
-from sqlalchemy import desc
 
-from app.db.connection import get_db
-from app.models.pond import Pond
-from app.models.stocking import StockingLog
-from app.models.harvest import HarvestLog
+from app.dependencies import get_scoped_db, check_not_modified
+from app.responses import FastJSONResponse
+from app.db.async_connection import get_async_db
+from app.models.pond import Pond, pond_image_url
 from app.schemas.pond import PondCreate, PondResponse
+from app.services.pond_status import EMPTY_STATUS, load_pond_status, apply_pond_status, on_pond_created, status_fields
+from app.services.blob_store import decode_base64_image, store_image, InvalidImageError
+from app.services.owner_events import mark_owner_dirty
+from app.services.change_log import owner_etag, record_changes
 
 router = APIRouter()
-
-# --- HELPER: Calculate pond aggregates (total_fish, current_fish_type) ---
-def calculate_pond_aggregates(db: Session, pond_id: int) -> Dict:
-    """
-    Calculate total_fish and current_fish_type from database.
-    
-    Returns dict with:
-    - total_fish: sum of all active (unharvested) stocking quantities
-    - current_fish_type: comma-separated list of unique species (case-insensitive dedup)
-    """
-    try:
-        # Get all stocks for this pond
-        all_stocks = db.query(StockingLog).filter(
-            StockingLog.pond_id == pond_id
-        ).all()
-        
-        if not all_stocks:
-            return {"total_fish": 0, "current_fish_type": None}
-        
-        # Get all harvested stock IDs
-        harvested_ids = set(
-            h[0] for h in db.query(HarvestLog.stocking_id).filter(
-                HarvestLog.stocking_id.in_([s.id for s in all_stocks])
-            ).all()
-        )
-        
-        # Filter: only active (unharvested) stocks
-        active_stocks = [s for s in all_stocks if s.id not in harvested_ids]
-        
-        if not active_stocks:
-            return {"total_fish": 0, "current_fish_type": None}
-        
-        # Calculate total fish (sum of all active quantities)
-        total_fish = sum(s.fry_quantity for s in active_stocks)
-        
-        # Get unique species (case-insensitive, preserve original casing)
-        species_map = {}
-        for stock in sorted(active_stocks, key=lambda x: x.stocking_date):
-            if stock.fry_type and stock.fry_type.strip():
-                key = stock.fry_type.lower()
-                if key not in species_map:
-                    species_map[key] = stock.fry_type.strip()
-        
-        current_fish_type = ", ".join(species_map.values()) if species_map else None
-        
-        return {
-            "total_fish": total_fish,
-            "current_fish_type": current_fish_type
-        }
-    except Exception as e:
-        print(f"Error calculating aggregates for pond {pond_id}: {e}")
-        return {"total_fish": 0, "current_fish_type": None}
-
+async_router = APIRouter() # Mounted in front of `router` when ASYNC_DB=1
 
 # --- HELPER: Calculate Area in Python (Shoelace Formula) ---
 def calculate_polygon_area(coords):
@@ -87,57 +41,96 @@ def calculate_polygon_area(coords):
         
     return abs(area) / 2.0
 
-# 1. GET ALL PONDS (UPDATED: Now includes total_fish aggregates!)
+def owner_ponds_query(owner_id: str):
+    # Plain columns (no ORM objects), never the legacy inline images
+    return select(
+        Pond.id, Pond.name, Pond.location_desc, Pond.coordinates, Pond.area_sqm,
+        Pond.owner_id, Pond.created_at, Pond.image_hash
+    ).where(Pond.owner_id == owner_id)
+
+# PondResponse's coordinates validation alone: ints come out as floats,
+# nulls and malformed values fail as they would through the model
+_COORDINATES = TypeAdapter(List[List[float]])
+
+def pond_items(rows, statuses) -> list:
+    """Rows of owner_ponds_query as PondResponse dicts (same field order and JSON), for FastJSONResponse."""
+    return [
+        {
+            "name": row.name,
+            "location_desc": row.location_desc,
+            "coordinates": _COORDINATES.validate_python(row.coordinates),
+            "id": row.id,
+            "area_sqm": row.area_sqm,
+            "owner_id": row.owner_id,
+            "created_at": row.created_at,
+            "image_hash": row.image_hash,
+            "image_url": pond_image_url(row.image_hash),
+            **status_fields(statuses.get(row.id, EMPTY_STATUS))
+        }
+        for row in rows
+    ]
+
+# 1. GET ALL PONDS (Status read from pond_status, no per-pond queries)
 @router.get("/", response_model=List[PondResponse])
 def get_all_ponds(
-    db: Session = Depends(get_db), 
-    x_user_id: str = Header(...) 
+    response: Response,
+    db: Session = Depends(get_scoped_db), 
+    x_user_id: str = Header(...),
+    if_none_match: Optional[str] = Header(None)
 ):
+    # 0. Unchanged since the client's copy: 304 after one index lookup
+    check_not_modified(response, if_none_match, owner_etag(db, x_user_id, "ponds"))
+
     # 1. Get all ponds for this user
-    ponds = db.query(Pond).filter(Pond.owner_id == x_user_id).all()
-    
-    # 2. For each pond, calculate aggregates from database
-    for pond in ponds:
-        # Get the most recent stock
-        last_stock = db.query(StockingLog).filter(
-            StockingLog.pond_id == pond.id
-        ).order_by(desc(StockingLog.stocking_date)).first()
-        
-        # Set last stocking date only if not harvested
-        if last_stock:
-            is_harvested = db.query(HarvestLog).filter(
-                HarvestLog.stocking_id == last_stock.id
-            ).first()
-            if not is_harvested:
-                pond.last_stocked_at = last_stock.stocking_date
-        
-        # Calculate aggregates (total_fish, current_fish_type)
-        aggregates = calculate_pond_aggregates(db, pond.id)
-        pond.total_fish = aggregates["total_fish"]
-        pond.current_fish_type = aggregates["current_fish_type"]
-                
-    return ponds
+    rows = db.execute(owner_ponds_query(x_user_id)).all()
+
+    # 2. Status comes from the pond_status table (one query for all ponds),
+    #    rows go out through orjson without a PondResponse round trip
+    return FastJSONResponse(pond_items(rows, load_pond_status(db, rows)), headers=response.headers)
+
+@async_router.get("/", response_model=List[PondResponse])
+async def get_all_ponds_async(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    x_user_id: str = Header(...),
+    if_none_match: Optional[str] = Header(None)
+):
+    check_not_modified(response, if_none_match, await db.run_sync(owner_etag, x_user_id, "ponds"))
+    rows = (await db.execute(owner_ponds_query(x_user_id))).all()
+    return FastJSONResponse(pond_items(rows, await db.run_sync(load_pond_status, rows)), headers=response.headers)
 
 # 2. CREATE NEW POND
 @router.post("/", response_model=PondResponse)
 def create_pond(
     pond_data: PondCreate, 
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_scoped_db),
     x_user_id: str = Header(...) 
 ):
+    # Decode the photo once and move it to the blob store (deduplicated by hash)
+    image_hash = None
+    if pond_data.image_base64:
+        try:
+            image_hash = store_image(decode_base64_image(pond_data.image_base64))
+        except InvalidImageError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     try:
         calculated_area = calculate_polygon_area(pond_data.coordinates)
         
         new_pond = Pond(
             name=pond_data.name,
             location_desc=pond_data.location_desc,
-            image_base64=pond_data.image_base64,
+            image_hash=image_hash,
             coordinates=pond_data.coordinates, 
             area_sqm=round(calculated_area, 2),
             owner_id=x_user_id 
         )
         
         db.add(new_pond)
+        db.flush()
+        on_pond_created(db, new_pond)
+        mark_owner_dirty(db, x_user_id)
+        record_changes(db, x_user_id, [("pond", new_pond.id)])
         db.commit()
         db.refresh(new_pond)
         
@@ -147,36 +140,20 @@ def create_pond(
         print(f"SERVER ERROR: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# 3. GET SINGLE POND (UPDATED: Now includes total_fish aggregates!)
+# 3. GET SINGLE POND (Status is a single-row lookup)
 @router.get("/{pond_id}", response_model=PondResponse)
 def get_pond(
     pond_id: int, 
-    db: Session = Depends(get_db), 
+    db: Session = Depends(get_scoped_db), 
     x_user_id: str = Header(...)
 ):
-    pond = db.query(Pond).filter(Pond.id == pond_id, Pond.owner_id == x_user_id).first()
+    pond = db.query(Pond).options(defer(Pond.image_base64)).filter(
+        Pond.id == pond_id, Pond.owner_id == x_user_id
+    ).first()
     if not pond:
         raise HTTPException(status_code=404, detail="Pond not found")
 
-    # Get the most recent stock
-    last_stock = db.query(StockingLog).filter(
-        StockingLog.pond_id == pond.id
-    ).order_by(desc(StockingLog.stocking_date)).first()
-    
-    # Set last stocking date only if not harvested
-    stock_date = None
-    if last_stock:
-        is_harvested = db.query(HarvestLog).filter(
-            HarvestLog.stocking_id == last_stock.id
-        ).first()
-        if not is_harvested:
-            stock_date = last_stock.stocking_date
-    
-    pond.last_stocked_at = stock_date
-    
-    # Calculate aggregates from database (source of truth)
-    aggregates = calculate_pond_aggregates(db, pond.id)
-    pond.total_fish = aggregates["total_fish"]
-    pond.current_fish_type = aggregates["current_fish_type"]
-    
+    # Single-row status lookup, same path as the list endpoint
+    apply_pond_status([pond], load_pond_status(db, [pond]))
+
     return pond
\ No newline at end of file
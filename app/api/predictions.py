@@ -1,38 +1,157 @@
-import joblib
+import hmac
 import os
-from fastapi import APIRouter, HTTPException
-from app.schemas.prediction import PredictionInput, PredictionOutput
+import numpy as np
+from fastapi import APIRouter, HTTPException, Header
+from pydantic import ValidationError
+from app.ml.registry import ModelRegistry, list_versions, read_current
+from app.ml.prediction_cache import PredictionCache
+from app.services.lru_cache import MISSING
+from app.schemas.prediction import (
+    PredictionInput, PredictionOutput,
+    PredictionBatchInput, PredictionBatchOutput
+)
 
 router = APIRouter()
 
-# Load the model ONCE when the server starts
+# Pre-registry single-file models, used only when the registry is empty
 MODEL_PATH = "ml_engine/models/yield_predictor.pkl"
+FOREST_PATH = "ml_engine/models/yield_predictor.forest"
 
+# Simple Revenue Estimation (e.g., 150 PHP per kg)
+PRICE_PER_KG = 150
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Load the model ONCE when the server starts; new versions are picked up
+# from the registry without a restart
+registry = ModelRegistry(legacy_model_path=MODEL_PATH, legacy_forest_path=FOREST_PATH)
 try:
-    model = joblib.load(MODEL_PATH)
-    print("✅ ML Model Loaded Successfully")
+    registry.load()
 except Exception as e:
     print(f"⚠️ Warning: Could not load model. Error: {e}")
-    model = None
+
+# Repeated what-if scenarios skip the trees entirely
+prediction_cache = PredictionCache()
+
+def _active_model():
+    loaded = registry.get()
+    if loaded is None:
+        raise HTTPException(status_code=500, detail="Model not loaded. Train it first!")
+    return loaded
+
+def _format_prediction(prediction_kg: float) -> dict:
+    return {
+        "predicted_yield_kg": round(float(prediction_kg), 2),
+        "estimated_revenue": round(float(prediction_kg) * PRICE_PER_KG, 2)
+    }
+
+def _describe_errors(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+def _features(data: PredictionInput, loaded) -> tuple:
+    # Snapped to the cache grid, in the order the model was trained with
+    values = prediction_cache.quantize(data.fry_quantity, data.days_cultured, data.area_sqm)
+    return tuple(values[name] for name in loaded.feature_order)
+
+def _require_admin(token):
+    if not ADMIN_TOKEN or not token or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
 
 @router.post("/", response_model=PredictionOutput)
 def predict_yield(data: PredictionInput):
-    if not model:
-        raise HTTPException(status_code=500, detail="Model not loaded. Train it first!")
+    # Hold one version for the whole request, even if a reload happens
+    loaded = _active_model()
+
+    try:
+        features = _features(data, loaded)
+
+        # Predict (or reuse the answer for the same scenario)
+        prediction_kg = prediction_cache.get(loaded.version, features)
+        if prediction_kg is MISSING:
+            prediction_kg = loaded.predict_one(features)
+            prediction_cache.set(loaded.version, features, prediction_kg)
+
+        return {**_format_prediction(prediction_kg), "model_version": loaded.version}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch", response_model=PredictionBatchOutput)
+def predict_yield_batch(batch: PredictionBatchInput):
+    """
+    Predict many rows with ONE model.predict call. Results come back in
+    input order; malformed rows get an `error` instead of failing the batch.
+    """
+    loaded = _active_model()
+
+    results = [None] * len(batch.rows)
+    predicted = 0
+    miss_index = []
+    miss_rows = []
+
+    # 1. Validate each row on its own, answer cached scenarios directly
+    for i, row in enumerate(batch.rows):
+        if not isinstance(row, dict):
+            results[i] = {"index": i, "error": "row must be an object"}
+            continue
+        try:
+            data = PredictionInput.model_validate(row)
+        except ValidationError as e:
+            results[i] = {"index": i, "error": _describe_errors(e)}
+            continue
+        predicted += 1
+        features = _features(data, loaded)
+        cached = prediction_cache.get(loaded.version, features)
+        if cached is MISSING:
+            miss_index.append(i)
+            miss_rows.append(features)
+        else:
+            results[i] = {"index": i, **_format_prediction(cached)}
+
+    # 2. One vectorized predict over all remaining rows
+    if miss_rows:
+        try:
+            predictions = loaded.predict(np.asarray(miss_rows, dtype=np.float64))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+        for i, features, prediction_kg in zip(miss_index, miss_rows, predictions):
+            prediction_cache.set(loaded.version, features, float(prediction_kg))
+            results[i] = {"index": i, **_format_prediction(prediction_kg)}
+
+    return {
+        "results": results,
+        "predicted": predicted,
+        "rejected": len(batch.rows) - predicted,
+        "model_version": loaded.version
+    }
+
+@router.get("/cache")
+def get_prediction_cache_stats():
+    """Hit/miss/eviction counters of this worker's prediction cache (for sizing)."""
+    return prediction_cache.stats()
+
+# --- MODEL REGISTRY ADMIN ---
+@router.get("/models")
+def get_model_versions(x_admin_token: str = Header(None)):
+    """All registered versions with their metadata, and which one is serving (admin only)."""
+    _require_admin(x_admin_token)
+    return {
+        "active": registry.version,
+        "current": read_current(),
+        "versions": list_versions()
+    }
 
+@router.post("/models/{version}/activate")
+def activate_model_version(version: str, x_admin_token: str = Header(None)):
+    """Swap in another version without a restart (other workers follow via CURRENT)."""
+    _require_admin(x_admin_token)
+    if version not in [v["version"] for v in list_versions()]:
+        raise HTTPException(status_code=404, detail="Model version not found")
     try:
-        # The model expects a list of lists: [[fry, days, area]]
-        features = [[data.fry_quantity, data.days_cultured, data.area_sqm]]
-        
-        # Predict
-        prediction_kg = model.predict(features)[0]
-        
-        # Simple Revenue Estimation (e.g., 150 PHP per kg)
-        revenue = prediction_kg * 150 
-        
-        return {
-            "predicted_yield_kg": round(prediction_kg, 2),
-            "estimated_revenue": round(revenue, 2)
-        }
+        loaded = registry.activate(version)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Could not load {version}: {e}")
+    return {"active": loaded.version, "metadata": loaded.metadata}
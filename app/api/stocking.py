@@ -1,63 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.connection import get_db
+from typing import List, Optional
+from app.dependencies import get_scoped_db, check_not_modified
+from app.responses import FastJSONResponse
+from app.db.async_connection import get_async_db
 from app.models.stocking import StockingLog
 from app.models.harvest import HarvestLog
 from app.models.pond import Pond 
+from app.models.pond_status import PondStatus
 from app.schemas.stocking import StockingCreate, StockingResponse
+from app.services.pond_status import on_stocking_added
+from app.services.owner_events import mark_owner_dirty
+from app.services.change_log import owner_etag, record_changes
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 router = APIRouter()
+async_router = APIRouter() # Mounted in front of `router` when ASYNC_DB=1
 
 # --- GET ACTIVE BATCHES FOR A SPECIFIC POND ---
 @router.get("/pond/{pond_id}/batches")
 def get_pond_batches(
     pond_id: int,
-    db: Session = Depends(get_db),
-    x_user_id: str = Header(...) 
+    response: Response,
+    db: Session = Depends(get_scoped_db),
+    x_user_id: str = Header(...),
+    if_none_match: Optional[str] = Header(None)
 ):
     """Get all active (unharvested) batches for a specific pond with age calculations"""
     try:
-        # 1. Verify pond ownership
-        pond = db.query(Pond).filter(Pond.id == pond_id, Pond.owner_id == x_user_id).first()
+        # 0. Same data and same day (ages are counted in days): 304
+        today = datetime.now().date()
+        check_not_modified(response, if_none_match, owner_etag(db, x_user_id, "batches", today.isoformat()))
+
+        # 1. Verify pond ownership and read the status row in one go
+        pond = db.query(Pond.id, PondStatus.active_batch_count).outerjoin(
+            PondStatus, PondStatus.pond_id == Pond.id
+        ).filter(Pond.id == pond_id, Pond.owner_id == x_user_id).first()
         if not pond:
             raise HTTPException(status_code=404, detail="Pond not found or access denied")
 
-        # 2. Get all stocks for this pond
-        all_stocks = db.query(StockingLog).filter(
-            StockingLog.pond_id == pond_id
-        ).order_by(StockingLog.stocking_date.desc()).all()
-
-        # Handle no stocks
-        if not all_stocks:
+        # 2. Nothing active according to pond_status: skip the history scan
+        if pond.active_batch_count == 0:
             return []
 
-        # 3. Find harvested IDs
-        harvested_ids = set()
-        if all_stocks:
-            harvested_result = db.query(HarvestLog.stocking_id).filter(
-                HarvestLog.stocking_id.in_([s.id for s in all_stocks])
-            ).all()
-            harvested_ids = set(h[0] for h in harvested_result)
+        # 3. Only active (unharvested) stocks, filtered in SQL (anti-join)
+        active_stocks = db.query(StockingLog).filter(
+            StockingLog.pond_id == pond_id,
+            ~exists().where(HarvestLog.stocking_id == StockingLog.id)
+        ).order_by(StockingLog.stocking_date.desc()).all()
 
         # 4. Build response for active batches
         results = []
-        today = datetime.now().date()
         
-        for stock in all_stocks:
-            if stock.id not in harvested_ids:  # Only active stocks
-                days_in_pond = (today - stock.stocking_date).days
-                
-                results.append({
-                    "id": stock.id,
-                    "pond_id": stock.pond_id,
-                    "fry_type": stock.fry_type,
-                    "fry_quantity": stock.fry_quantity,
-                    "stocking_date": stock.stocking_date.isoformat(),
-                    "days_in_pond": days_in_pond,
-                    "status": "Ready" if days_in_pond >= 90 else "Growing" if days_in_pond >= 30 else "Young"
-                })
+        for stock in active_stocks:
+            days_in_pond = (today - stock.stocking_date).days
+            
+            results.append({
+                "id": stock.id,
+                "pond_id": stock.pond_id,
+                "fry_type": stock.fry_type,
+                "fry_quantity": stock.fry_quantity,
+                "stocking_date": stock.stocking_date.isoformat(),
+                "days_in_pond": days_in_pond,
+                "status": "Ready" if days_in_pond >= 90 else "Growing" if days_in_pond >= 30 else "Young"
+            })
         
         print(f"✅ Returning {len(results)} active batches for pond {pond_id}")
         return results
@@ -69,46 +77,44 @@ def get_pond_batches(
         raise HTTPException(status_code=500, detail=str(e))
 
 # --- GET ACTIVE STOCKINGS (Fixed for Loss Report) ---
+def active_stockings_query(owner_id: str):
+    """This user's unharvested stockings with their pond name, one query (anti-join)."""
+    return select(StockingLog, Pond.name).join(Pond, Pond.id == StockingLog.pond_id).where(
+        Pond.owner_id == owner_id,
+        ~exists().where(HarvestLog.stocking_id == StockingLog.id)
+    ).order_by(StockingLog.id)
+
+def active_stocking_item(stock: StockingLog, pond_name: str) -> dict:
+    return {
+        "id": stock.id,
+        "pond_id": stock.pond_id,  # <--- Fixes the Frontend Filter
+        "label": f"{pond_name} - {stock.fry_type} ({stock.fry_quantity}pcs)",
+        "date": stock.stocking_date,
+        "fry_type": stock.fry_type,
+        "fry_quantity": stock.fry_quantity
+    }
+
 @router.get("/active")
 def get_active_stockings(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_scoped_db),
     x_user_id: str = Header(...) 
 ):
     try:
-        # 1. Get ONLY this user's ponds
-        user_ponds = db.query(Pond).filter(Pond.owner_id == x_user_id).all()
-        user_pond_ids = [p.id for p in user_ponds]
-
-        if not user_pond_ids:
-            return []
+        rows = db.execute(active_stockings_query(x_user_id)).all()
+        return FastJSONResponse([active_stocking_item(stock, pond_name) for stock, pond_name in rows])
 
-        # 2. Find harvested IDs
-        harvested_ids = db.query(HarvestLog.stocking_id).all()
-        harvested_ids = [h[0] for h in harvested_ids]
+    except Exception as e:
+        print(f"❌ STOCKING ERROR: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # 3. Filter Stockings
-        query = db.query(StockingLog).filter(StockingLog.pond_id.in_(user_pond_ids))
-        if harvested_ids:
-            query = query.filter(StockingLog.id.notin_(harvested_ids))
-            
-        active_stockings = query.all()
-        
-        # 4. Build Response
-        results = []
-        for stock in active_stockings:
-            pond = next((p for p in user_ponds if p.id == stock.pond_id), None)
-            pond_name = pond.name if pond else f"Pond {stock.pond_id}"
-            
-            results.append({
-                "id": stock.id,
-                "pond_id": stock.pond_id,  # <--- Fixes the Frontend Filter
-                "label": f"{pond_name} - {stock.fry_type} ({stock.fry_quantity}pcs)",
-                "date": stock.stocking_date,
-                "fry_type": stock.fry_type,
-                "fry_quantity": stock.fry_quantity
-            })
-        
-        return results
+@async_router.get("/active")
+async def get_active_stockings_async(
+    db: AsyncSession = Depends(get_async_db),
+    x_user_id: str = Header(...)
+):
+    try:
+        rows = (await db.execute(active_stockings_query(x_user_id))).all()
+        return FastJSONResponse([active_stocking_item(stock, pond_name) for stock, pond_name in rows])
 
     except Exception as e:
         print(f"❌ STOCKING ERROR: {e}")
@@ -118,7 +124,7 @@ def get_active_stockings(
 @router.post("/", response_model=StockingResponse)
 def create_stocking_log(
     log: StockingCreate, 
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_scoped_db),
     x_user_id: str = Header(...) 
 ):
     try:
@@ -134,6 +140,10 @@ def create_stocking_log(
         )
         
         db.add(new_log)
+        on_stocking_added(db, new_log) # Same transaction as the log itself
+        mark_owner_dirty(db, x_user_id)
+        db.flush()
+        record_changes(db, x_user_id, [("stocking", new_log.id), ("pond", log.pond_id)]) # Pond totals changed too
         db.commit()
         db.refresh(new_log)
         
@@ -0,0 +1,34 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.dependencies import get_scoped_db
+from app.schemas.sync import SyncBatch, SyncBatchResponse, SyncDelta
+from app.services.change_log import SYNC_DELTA_LIMIT, load_changes
+from app.services.offline_sync import SYNC_MAX_BATCH, ingest_batch
+
+router = APIRouter()
+
+@router.get("", response_model=SyncDelta)
+def get_changes(
+    since: Optional[int] = Query(None, ge=0, description="Cursor from the previous response"),
+    limit: int = Query(SYNC_DELTA_LIMIT, ge=1, le=SYNC_DELTA_LIMIT),
+    x_user_id: str = Header(...),
+    db: Session = Depends(get_scoped_db)
+):
+    """
+    Ponds, stockings, harvests and losses changed after `since`. Without
+    `since`: everything (first sync).
+    """
+    return load_changes(db, x_user_id, since, limit)
+
+@router.post("/batch", response_model=SyncBatchResponse)
+def sync_batch(batch: SyncBatch, x_user_id: str = Header(...), db: Session = Depends(get_scoped_db)):
+    """
+    Upload the stocking, harvest and mortality logs saved offline in one
+    request. Safe to retry: records whose client_id was already synced
+    come back as "duplicate" with their server ID.
+    """
+    if len(batch.records) > SYNC_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {SYNC_MAX_BATCH} records per batch")
+
+    return ingest_batch(db, x_user_id, batch.records)
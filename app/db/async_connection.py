@@ -0,0 +1,69 @@
+# backend/app/db/async_connection.py
+"""
+Opt-in async database access (ASYNC_DB=1, needs asyncpg).
+
+The sync routes hold a threadpool thread for their whole database wait,
+so a worker serves at most ~40 of them at once. With ASYNC_DB=1 main.py
+mounts the `async_router` of the hot read modules (ponds list, analytics
+summary, active stockings, pond history, chat history) in front of the
+sync routes. Those use AsyncSession over asyncpg and only suspend their
+coroutine while waiting, so one worker keeps hundreds of reads in flight
+on the event loop.
+
+The async engine uses the same DB_POOL_* / DB_*_TIMEOUT settings as the
+sync one, as a second pool: budget max_connections for both.
+"""
+import os
+
+import orjson
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.connection import (
+    db_url, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING, DB_CONNECT_TIMEOUT, DB_STATEMENT_TIMEOUT_MS
+)
+
+ASYNC_DB = os.getenv("ASYNC_DB", "0") == "1"
+
+
+def async_url(url: str) -> str:
+    """postgresql[+psycopg2]://... -> postgresql+asyncpg://..."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        raise ValueError("ASYNC_DB needs a PostgreSQL DATABASE_URL")
+    return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+def make_async_engine(
+    url: str,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+    pool_timeout: float = DB_POOL_TIMEOUT,
+    pool_recycle: int = DB_POOL_RECYCLE,
+    pool_pre_ping: bool = DB_POOL_PRE_PING,
+    connect_timeout: int = DB_CONNECT_TIMEOUT,
+    statement_timeout_ms: int = DB_STATEMENT_TIMEOUT_MS
+):
+    connect_args = {"timeout": connect_timeout}
+    if statement_timeout_ms:
+        connect_args["server_settings"] = {"statement_timeout": str(statement_timeout_ms)}
+    return create_async_engine(
+        async_url(url),
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pool_pre_ping,
+        connect_args=connect_args,
+        json_deserializer=orjson.loads
+    )
+
+
+async_engine = make_async_engine(db_url) if ASYNC_DB else None
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
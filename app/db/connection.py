@@ -1,8 +1,11 @@
 import os
+import orjson
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from app.db.pool import InstrumentedQueuePool
 
 # 1. Load environment variables (for local dev)
 load_dotenv()
@@ -21,7 +24,44 @@ if db_url.startswith("postgres://"):
 if not db_url:
     raise ValueError("DATABASE_URL is not set. Please check your .env file or Render Environment Variables.")
 
-engine = create_engine(db_url)
+# Pool settings. Keep DB_POOL_SIZE + DB_MAX_OVERFLOW, times the number of
+# workers, below the server's max_connections (managed Postgres plans are small)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))     # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))     # Reopen connections older than this (seconds)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"    # Test connections on checkout (drops stale ones)
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10")) # Seconds (Postgres only)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000")) # 0 = no limit (Postgres only)
+
+def make_engine(
+    url: str,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+    pool_timeout: float = DB_POOL_TIMEOUT,
+    pool_recycle: int = DB_POOL_RECYCLE,
+    pool_pre_ping: bool = DB_POOL_PRE_PING,
+    connect_timeout: int = DB_CONNECT_TIMEOUT,
+    statement_timeout_ms: int = DB_STATEMENT_TIMEOUT_MS
+):
+    connect_args = {}
+    if make_url(url).get_backend_name() == "postgresql":
+        connect_args["connect_timeout"] = connect_timeout
+        if statement_timeout_ms:
+            connect_args["options"] = f"-c statement_timeout={statement_timeout_ms}"
+    return create_engine(
+        url,
+        poolclass=InstrumentedQueuePool, # Checkout wait metrics, see GET /db/pool
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pool_pre_ping,
+        connect_args=connect_args,
+        json_deserializer=orjson.loads # JSON columns (coordinates, species) parsed by orjson
+    )
+
+engine = make_engine(db_url)
 
 # 4. Session & Base
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
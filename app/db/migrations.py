@@ -0,0 +1,69 @@
+# backend/app/db/migrations.py
+"""
+Idempotent schema patches for tables that already exist.
+
+Base.metadata.create_all() only creates missing tables, it never adds
+columns or indexes to existing ones. Every statement here must be safe to
+run on every startup, in every worker: IF NOT EXISTS, or a catalog check
+around statements that scan or lock the table (ACCESS EXCLUSIVE) so they
+run only until the patch has been applied once.
+
+Data migrations (backfills that need Python, not just SQL) run through
+run_once(): the first worker to start applies them and records their
+name in data_migrations, every later startup skips them.
+"""
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+SCHEMA_PATCHES = [
+    # Pond images moved to the blob store, the row only keeps the hash
+    "ALTER TABLE ponds ADD COLUMN IF NOT EXISTS image_hash VARCHAR(64)",
+    # Chat history is per user and paged newest first by (timestamp, id)
+    "ALTER TABLE chat_history ADD COLUMN IF NOT EXISTS owner_id VARCHAR",
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'chat_history'
+              AND column_name = 'timestamp' AND is_nullable = 'YES'
+        ) THEN
+            UPDATE chat_history SET timestamp = now() AT TIME ZONE 'utc' WHERE timestamp IS NULL;
+            ALTER TABLE chat_history ALTER COLUMN timestamp SET NOT NULL;
+        END IF;
+    END $$
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_chat_history_owner_timestamp_id ON chat_history (owner_id, timestamp, id)",
+    # Data migrations already applied (run_once)
+    """
+    CREATE TABLE IF NOT EXISTS data_migrations (
+        name VARCHAR PRIMARY KEY,
+        applied_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+    )
+    """,
+]
+
+
+def apply_schema_patches(engine):
+    with engine.begin() as conn:
+        for statement in SCHEMA_PATCHES:
+            conn.execute(text(statement))
+
+
+def run_once(engine, name: str, migrate: Callable[[Session], object]) -> bool:
+    """
+    Run `migrate(db)` unless a data migration called `name` was applied
+    before. Its marker commits in the same transaction as the migration
+    (also when migrate commits itself), and concurrent workers wait on
+    an advisory lock, so it runs exactly once. True if it ran now.
+    """
+    with Session(engine) as db:
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": name})
+        if db.execute(text("SELECT 1 FROM data_migrations WHERE name = :name"), {"name": name}).first():
+            return False
+        db.execute(text("INSERT INTO data_migrations (name) VALUES (:name)"), {"name": name})
+        migrate(db)
+        db.commit()
+        return True
@@ -0,0 +1,78 @@
+# backend/app/db/pool.py
+"""
+QueuePool with checkout metrics.
+
+InstrumentedQueuePool times every checkout (waiting for a free
+connection, or opening a new one) and counts checkouts that had to wait
+and the ones that gave up after pool_timeout. pool_stats(engine) adds the
+pool's own gauges (in use, idle, overflow) for GET /db/pool.
+"""
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+# A checkout slower than this waited for a connection (or a new one was opened)
+SLOW_CHECKOUT_SECONDS = 0.005
+
+
+class InstrumentedQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.checkout_timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.checkout_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+                if waited >= SLOW_CHECKOUT_SECONDS:
+                    self.slow_checkouts += 1
+
+    def checkout_stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "checkouts": self.checkouts,
+                "slow_checkouts": self.slow_checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3)
+            }
+
+    def reset_checkout_stats(self) -> None:
+        with self._stats_lock:
+            self.checkouts = self.slow_checkouts = self.checkout_timeouts = 0
+            self.total_wait = self.max_wait = 0.0
+
+
+def pool_stats(engine) -> dict:
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # Negative while fewer than `size` connections have been opened
+            "overflow": pool.overflow()
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(pool.checkout_stats())
+    return stats
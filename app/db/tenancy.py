@@ -0,0 +1,127 @@
+# backend/app/db/tenancy.py
+"""
+Schema-per-tenant routing.
+
+TENANCY_MODE picks how user data is isolated:
+
+- "owner" (default): one shared schema, every query filters on owner_id.
+- "schema": each user has a tenant_<id> schema holding the same tables
+  (create it with `python manage.py provision-tenant <id>`). Requests
+  run with search_path set to that schema only.
+
+Tenant connections come from their own engine, so a search_path set for
+a tenant can never leak into the shared pool. Each pooled connection
+remembers the schema it is set to (connection.info), and SET search_path
+is only sent when the request's tenant differs: a user hitting the same
+worker again reuses a connection that is already switched. The SET is
+committed immediately, otherwise the rollback that ends a read-only
+request would undo it.
+
+Tenant ids come from a header, so they are validated (TENANT_ID_PATTERN)
+and the schema name is always quoted by the dialect, never interpolated raw.
+"""
+import os
+import re
+import threading
+
+from sqlalchemy import text
+
+from app.db.connection import Base, db_url, make_engine
+from app.db.migrations import SCHEMA_PATCHES
+
+TENANCY_MODE = os.getenv("TENANCY_MODE", "owner")
+TENANT_SCHEMA_PREFIX = "tenant_"
+# Postgres identifiers are at most 63 bytes, prefix included
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,56}$")
+
+if TENANCY_MODE not in ("owner", "schema"):
+    raise ValueError(f"TENANCY_MODE must be 'owner' or 'schema', not {TENANCY_MODE!r}")
+
+
+class InvalidTenantError(ValueError):
+    pass
+
+
+class UnknownTenantError(LookupError):
+    """The tenant's schema has not been provisioned."""
+
+
+def tenant_schema(tenant_id: str) -> str:
+    if not tenant_id or not TENANT_ID_PATTERN.match(tenant_id):
+        raise InvalidTenantError("Tenant ID must be 1-56 letters, digits, '-' or '_'")
+    return TENANT_SCHEMA_PREFIX + tenant_id
+
+
+_engine = None
+_engine_lock = threading.Lock()
+_known_schemas = set() # Checked to exist once per worker
+_stats = {"checkouts": 0, "search_path_sets": 0}
+_stats_lock = threading.Lock()
+
+
+def tenant_engine():
+    """Engine for tenant sessions, created on first use (its own pool)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = make_engine(db_url)
+    return _engine
+
+
+def quoted_schema(engine, schema: str) -> str:
+    return engine.dialect.identifier_preparer.quote_identifier(schema)
+
+
+def tenant_connection(tenant_id: str):
+    """
+    A pooled connection with search_path set to the tenant's schema. The
+    SET only runs when the pooled connection was set to another schema
+    before (plus a one-off existence check per schema and worker). Close
+    it to return it to the pool.
+    """
+    schema = tenant_schema(tenant_id)
+    engine = tenant_engine()
+    conn = engine.connect()
+    try:
+        if conn.info.get("search_path") != schema:
+            if schema not in _known_schemas:
+                exists = conn.execute(
+                    text("SELECT 1 FROM pg_namespace WHERE nspname = :schema"), {"schema": schema}
+                ).scalar()
+                if not exists:
+                    raise UnknownTenantError(f"Tenant {tenant_id} is not provisioned")
+                _known_schemas.add(schema)
+            conn.execute(text(f"SET search_path TO {quoted_schema(engine, schema)}"))
+            conn.commit() # Session level: must survive the rollback on checkin
+            conn.info["search_path"] = schema
+            with _stats_lock:
+                _stats["search_path_sets"] += 1
+        with _stats_lock:
+            _stats["checkouts"] += 1
+    except BaseException:
+        conn.info.pop("search_path", None) # Unknown state: SET again next time
+        conn.close()
+        raise
+    return conn
+
+
+def tenancy_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["search_path_reused"] = stats["checkouts"] - stats["search_path_sets"]
+    return {"mode": TENANCY_MODE, **stats}
+
+
+def provision_tenant(tenant_id: str, engine=None) -> str:
+    """Create the tenant's schema and every table in it. Safe to re-run."""
+    schema = tenant_schema(tenant_id)
+    engine = engine or tenant_engine()
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {quoted_schema(engine, schema)}"))
+        Base.metadata.create_all(conn.execution_options(schema_translate_map={None: schema}))
+        # Patches are written for the shared schema: run them against this one
+        conn.execute(text(f"SET LOCAL search_path TO {quoted_schema(engine, schema)}"))
+        for statement in SCHEMA_PATCHES:
+            conn.execute(text(statement))
+    return schema
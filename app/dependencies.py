@@ -1,24 +1,54 @@
 # backend/app/dependencies.py
-from fastapi import Header, HTTPException
-from sqlalchemy import text
-from app.db.connection import SessionLocal
+from typing import Optional
+
+from fastapi import Header, HTTPException, Response
+from sqlalchemy.orm import Session
+
+from app.db.connection import get_db
+from app.db.tenancy import TENANCY_MODE, InvalidTenantError, UnknownTenantError, tenant_connection
 
 def get_tenant_db(x_user_id: str = Header(None)):
     """
-    Reads 'x-user-id' header and switches PostgreSQL schema.
+    Reads 'x-user-id' header and opens a session in the user's schema
+    (tenant_<id>). The pooled connection is only switched (SET search_path)
+    if it was last used for another tenant.
     """
     if x_user_id is None:
         raise HTTPException(status_code=400, detail="User ID header missing")
 
-    db = SessionLocal()
     try:
-        # Switch to the user's private schema
-        schema_name = f"tenant_{x_user_id}"
-        db.execute(text(f"SET search_path TO {schema_name}"))
+        conn = tenant_connection(x_user_id)
+    except InvalidTenantError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnknownTenantError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+    db = Session(bind=conn, autoflush=False)
+    try:
         yield db
-    except Exception as e:
-        print(f"Schema Error: {e}")
-        db.rollback()
-        raise HTTPException(status_code=500, detail="Database connection error")
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+        conn.close() # Back to the tenant pool, search_path kept
+
+def get_scoped_db(x_user_id: Optional[str] = Header(None)):
+    """
+    Session for user data in the configured TENANCY_MODE: the shared schema
+    ("owner", routes filter on owner_id) or the user's own schema ("schema").
+    The owner_id filters stay correct in both modes.
+    """
+    if TENANCY_MODE == "schema":
+        yield from get_tenant_db(x_user_id)
+    else:
+        yield from get_db()
+
+def check_not_modified(response: Response, if_none_match: Optional[str], etag: str) -> None:
+    """
+    Sets the ETag of a per-user read, or answers 304 right away (raised,
+    so nothing else runs) when the client already has this version.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "x-user-id"}
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or etag.removeprefix("W/") in tags:
+            raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
@@ -0,0 +1,161 @@
+# backend/app/ml/forest.py
+"""
+Array-backed evaluator for the yield RandomForestRegressor.
+
+export_forest() flattens every tree of a fitted sklearn forest into five
+contiguous arrays (feature, threshold, left, right, value) stored as .npy
+files, so they can be memory-mapped. CompiledForest walks all trees at
+once with NumPy and reproduces sklearn's predictions bit for bit:
+features are cast to float32 like sklearn does, and tree outputs are
+summed in estimator order before dividing by the number of trees.
+"""
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "value", "roots")
+META_FILE = "forest.json"
+
+
+def export_forest(model, out_dir: str) -> dict:
+    """Flatten a fitted RandomForestRegressor into `out_dir`. Returns the metadata."""
+    trees = [estimator.tree_ for estimator in model.estimators_]
+
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        local = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        # Leaves point at themselves, so extra traversal steps are no-ops
+        lefts.append(np.where(is_leaf, local, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, local, tree.children_right) + offset)
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        values.append(tree.value[:, 0, 0])
+        roots.append(offset)
+        offset += tree.node_count
+
+    # Index arrays are stored as int64 (= np.intp): NumPy would otherwise
+    # convert them on every fancy-indexing step, which doubles latency
+    arrays = {
+        "feature": np.concatenate(features).astype(np.int64),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "left": np.concatenate(lefts).astype(np.int64),
+        "right": np.concatenate(rights).astype(np.int64),
+        "value": np.concatenate(values).astype(np.float64),
+        "roots": np.asarray(roots, dtype=np.int64),
+    }
+    meta = {
+        "n_trees": len(trees),
+        "n_features": int(model.n_features_in_),
+        "n_nodes": int(offset),
+        "max_depth": int(max(tree.max_depth for tree in trees)),
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(out_dir, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    return meta
+
+
+class CompiledForest:
+    """Pure-NumPy forest evaluator. Same numbers as sklearn, far less overhead."""
+
+    def __init__(self, arrays: dict, meta: dict):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.n_trees = meta["n_trees"]
+        self.n_features = meta["n_features"]
+        self.max_depth = meta["max_depth"]
+        self.nbytes = sum(a.nbytes for a in arrays.values())
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "CompiledForest":
+        """Load an exported forest. With mmap the pages are shared between workers."""
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        mmap_mode = "r" if mmap else None
+        # np.asarray drops the np.memmap subclass (and its per-index overhead)
+        # while still reading from the mapped pages
+        arrays = {
+            name: np.asarray(np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode))
+            for name in ARRAY_NAMES
+        }
+        return cls(arrays, meta)
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node index for every (row, tree) pair."""
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def _average(self, leaf_values: np.ndarray) -> np.ndarray:
+        # Sequential sum in estimator order (cumsum), like sklearn's
+        # accumulation, so the float results match exactly
+        return np.cumsum(leaf_values, axis=-1)[..., -1] / self.n_trees
+
+    def predict(self, X, chunk_size: int = 4096) -> np.ndarray:
+        # sklearn evaluates trees on float32 inputs (compared as float64)
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected shape (n, {self.n_features}), got {X.shape}")
+
+        out = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_size):
+            chunk = X[start:start + chunk_size]
+            out[start:start + chunk_size] = self._average(self.value[self._leaves(chunk)])
+        return out
+
+    def predict_one(self, row) -> float:
+        """Single-row fast path: one vector of nodes, one step per tree level."""
+        x = np.asarray(row, dtype=np.float32).astype(np.float64)
+        feature, threshold, left, right = self.feature, self.threshold, self.left, self.right
+        node = self.roots
+        for _ in range(self.max_depth):
+            node = np.where(x[feature[node]] <= threshold[node], left[node], right[node])
+        return float(self._average(self.value[node]))
+
+
+def verify_parity(model, forest: CompiledForest, X) -> dict:
+    """Compare a CompiledForest with the sklearn model it was exported from."""
+    X = np.asarray(X, dtype=np.float64)
+    actual = forest.predict(X)
+    single = np.array([forest.predict_one(row) for row in X[:200]])
+
+    def p50_us(fn, rows):
+        timings = []
+        for row in rows:
+            start = time.perf_counter()
+            fn(row)
+            timings.append(time.perf_counter() - start)
+        return float(np.median(timings) * 1e6)
+
+    sample = X[:200]
+    # The model was fitted on a DataFrame; plain arrays are fine here
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        expected = model.predict(X)
+        p50_us_sklearn = p50_us(lambda row: model.predict(row.reshape(1, -1)), sample)
+
+    return {
+        "rows": int(X.shape[0]),
+        "exact_match": bool(np.array_equal(expected, actual) and np.array_equal(expected[:200], single)),
+        "max_abs_diff": float(np.max(np.abs(expected - actual))) if X.shape[0] else 0.0,
+        "p50_us_sklearn": p50_us_sklearn,
+        "p50_us_compiled": p50_us(forest.predict_one, sample),
+        "compiled_mb": forest.nbytes / 1e6,
+    }
@@ -0,0 +1,71 @@
+# backend/app/ml/harvest_data.py
+"""
+Real training rows for the yield model, streamed out of PostgreSQL.
+
+One row per harvest: the batch's fry_quantity, the harvest's
+days_cultured, the pond's area_sqm and the harvested total_weight_kg
+(the target). Rows come from a server-side cursor in chunks, so the
+joined table is never fetched in one piece.
+"""
+import os
+from typing import Iterator, Tuple
+
+import pandas as pd
+from sqlalchemy import select
+
+from app.models.pond import Pond
+from app.models.stocking import StockingLog
+from app.models.harvest import HarvestLog
+
+COLUMNS = ["harvest_id", "fry_quantity", "days_cultured", "area_sqm", "yield_kg"]
+
+
+def harvest_rows_query(since_harvest_id: int = 0):
+    """Joined harvest/stocking/pond rows with a harvest id above the watermark."""
+    return select(
+        HarvestLog.id.label("harvest_id"),
+        StockingLog.fry_quantity,
+        HarvestLog.days_cultured,
+        Pond.area_sqm,
+        HarvestLog.total_weight_kg.label("yield_kg")
+    ).join(
+        StockingLog, StockingLog.id == HarvestLog.stocking_id
+    ).join(
+        Pond, Pond.id == StockingLog.pond_id
+    ).where(
+        HarvestLog.id > since_harvest_id,
+        # Skip rows that cannot be used as training examples
+        HarvestLog.days_cultured.isnot(None),
+        Pond.area_sqm > 0,
+        StockingLog.fry_quantity > 0,
+        HarvestLog.total_weight_kg > 0
+    ).order_by(HarvestLog.id)
+
+
+def iter_harvest_chunks(engine, since_harvest_id: int = 0, chunk_size: int = 10000) -> Iterator[pd.DataFrame]:
+    """Yield DataFrames of at most chunk_size rows from a server-side cursor."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(
+            harvest_rows_query(since_harvest_id)
+        )
+        for rows in result.partitions():
+            yield pd.DataFrame(rows, columns=COLUMNS)
+
+
+def export_harvest_data(engine, path: str, since_harvest_id: int = 0, chunk_size: int = 10000) -> Tuple[int, int]:
+    """
+    Stream harvest rows into a CSV (same columns as the synthetic dataset).
+    Returns (rows written, highest harvest id seen).
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written, last_id = 0, since_harvest_id
+    header = True
+    # Start from an empty file so a run with no new rows is not mistaken
+    # for the previous export
+    open(path, "w").close()
+    for chunk in iter_harvest_chunks(engine, since_harvest_id, chunk_size):
+        last_id = int(chunk["harvest_id"].max())
+        chunk.drop(columns=["harvest_id"]).to_csv(path, mode="a", header=header, index=False)
+        header = False
+        written += len(chunk)
+    return written, last_id
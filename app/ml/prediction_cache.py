@@ -0,0 +1,71 @@
+# backend/app/ml/prediction_cache.py
+"""
+LRU cache in front of the yield model.
+
+Inputs are snapped to a configurable grid before lookup (and before
+prediction, so a cached answer is exactly what the model says for the
+snapped inputs). Defaults: area to the nearest square meter, fry quantity
+and culture days exact. Keys include the model version and the cache is
+cleared whenever the serving version changes.
+"""
+import os
+import threading
+from typing import Tuple
+
+from app.services.lru_cache import LRUCache, MISSING
+
+CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000")) # 0 disables
+AREA_STEP = float(os.getenv("PREDICTION_CACHE_AREA_STEP", "1"))     # sqm
+FRY_STEP = int(os.getenv("PREDICTION_CACHE_FRY_STEP", "1"))         # fish
+DAYS_STEP = int(os.getenv("PREDICTION_CACHE_DAYS_STEP", "1"))       # days
+
+
+def _snap(value, step):
+    return round(value / step) * step if step > 0 else value
+
+
+class PredictionCache:
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self.enabled = maxsize > 0
+        self._cache = LRUCache(maxsize)
+        self._version = None
+        self._lock = threading.Lock()
+        self.invalidations = 0
+
+    def quantize(self, fry_quantity: int, days_cultured: int, area_sqm: float) -> dict:
+        if not self.enabled:
+            return {"fry_quantity": fry_quantity, "days_cultured": days_cultured, "area_sqm": area_sqm}
+        return {
+            "fry_quantity": int(_snap(fry_quantity, FRY_STEP)),
+            "days_cultured": int(_snap(days_cultured, DAYS_STEP)),
+            "area_sqm": float(_snap(area_sqm, AREA_STEP)),
+        }
+
+    def _sync_version(self, version: str) -> None:
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._cache.clear()
+                    self._version = version
+                    self.invalidations += 1
+
+    def get(self, version: str, key: Tuple):
+        if not self.enabled:
+            return MISSING
+        self._sync_version(version)
+        return self._cache.get((version, key))
+
+    def set(self, version: str, key: Tuple, prediction_kg: float) -> None:
+        if self.enabled:
+            self._cache.set((version, key), prediction_kg)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "model_version": self._version,
+            "version_invalidations": self.invalidations,
+            "area_step_sqm": AREA_STEP,
+            "fry_step": FRY_STEP,
+            "days_step": DAYS_STEP,
+            **self._cache.stats()
+        }
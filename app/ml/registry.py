@@ -0,0 +1,229 @@
+# backend/app/ml/registry.py
+"""
+Versioned model registry with hot reload.
+
+Layout:
+    ml_engine/models/registry/
+        CURRENT                 <- name of the active version (one line)
+        20261017-093000/
+            model.pkl           <- the sklearn model (kept for re-export)
+            forest/             <- CompiledForest arrays (.npy, memory-mapped)
+            metadata.json       <- version, created_at, metrics, feature_order
+
+Versions are written to a temp directory and renamed into place, and
+CURRENT is replaced atomically, so a reader never sees a half-written
+model. Every worker polls CURRENT's mtime (at most every few seconds) and
+swaps in the new version; requests that already hold the old LoadedModel
+finish with it.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import joblib
+import numpy as np
+
+from app.ml.forest import CompiledForest, export_forest
+
+REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "ml_engine/models/registry")
+RELOAD_CHECK_SECONDS = float(os.getenv("MODEL_RELOAD_CHECK_SECONDS", "5"))
+
+CURRENT_FILE = "CURRENT"
+METADATA_FILE = "metadata.json"
+MODEL_FILE = "model.pkl"
+FOREST_DIR = "forest"
+
+DEFAULT_FEATURE_ORDER = ["fry_quantity", "days_cultured", "area_sqm"]
+
+
+class LoadedModel:
+    """One immutable model version. Prefers the compiled forest for inference."""
+
+    def __init__(self, version: str, metadata: dict, forest: Optional[CompiledForest] = None, model=None):
+        if forest is None and model is None:
+            raise ValueError(f"Model version {version} has no forest and no sklearn model")
+        self.version = version
+        self.metadata = metadata
+        self.feature_order = metadata.get("feature_order", DEFAULT_FEATURE_ORDER)
+        self.forest = forest
+        self.model = model
+
+    def predict(self, X) -> np.ndarray:
+        return (self.forest or self.model).predict(X)
+
+    def predict_one(self, row) -> float:
+        if self.forest is not None:
+            return self.forest.predict_one(row)
+        return float(self.model.predict([row])[0])
+
+
+# --- PUBLISHING (used by train_model.py) ---
+def _write_current(registry_dir: str, version: str) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=registry_dir, prefix=".CURRENT-")
+    with os.fdopen(fd, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, os.path.join(registry_dir, CURRENT_FILE))
+
+
+def read_current(registry_dir: str = REGISTRY_DIR) -> Optional[str]:
+    try:
+        with open(os.path.join(registry_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def list_versions(registry_dir: str = REGISTRY_DIR) -> List[dict]:
+    if not os.path.isdir(registry_dir):
+        return []
+    versions = []
+    for name in sorted(os.listdir(registry_dir)):
+        path = os.path.join(registry_dir, name, METADATA_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                versions.append(json.load(f))
+    return versions
+
+
+def load_published(version: str, registry_dir: str = REGISTRY_DIR):
+    """The sklearn model and metadata of a version (for refits, not serving)."""
+    path = os.path.join(registry_dir, version)
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        metadata = json.load(f)
+    return joblib.load(os.path.join(path, MODEL_FILE)), metadata
+
+
+def publish_model(
+    model,
+    metrics: dict,
+    feature_order: List[str],
+    registry_dir: str = REGISTRY_DIR,
+    activate: bool = True,
+    extra_metadata: Optional[dict] = None
+) -> str:
+    """Save a trained model as a new registry version. Returns the version name."""
+    os.makedirs(registry_dir, exist_ok=True)
+    created_at = datetime.now(timezone.utc)
+    version = created_at.strftime("%Y%m%d-%H%M%S")
+    suffix = 1
+    while os.path.exists(os.path.join(registry_dir, version)):
+        version = f"{created_at.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+        suffix += 1
+
+    staging = tempfile.mkdtemp(dir=registry_dir, prefix=".staging-")
+    try:
+        joblib.dump(model, os.path.join(staging, MODEL_FILE))
+        forest_meta = export_forest(model, os.path.join(staging, FOREST_DIR))
+        metadata = {
+            "version": version,
+            "created_at": created_at.isoformat(),
+            "metrics": metrics,
+            "feature_order": list(feature_order),
+            "n_trees": forest_meta["n_trees"],
+            "n_nodes": forest_meta["n_nodes"],
+            **(extra_metadata or {})
+        }
+        with open(os.path.join(staging, METADATA_FILE), "w") as f:
+            json.dump(metadata, f, indent=2)
+        os.rename(staging, os.path.join(registry_dir, version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if activate:
+        _write_current(registry_dir, version)
+    return version
+
+
+# --- SERVING ---
+class ModelRegistry:
+    def __init__(self, registry_dir: str = REGISTRY_DIR, legacy_model_path: Optional[str] = None,
+                 legacy_forest_path: Optional[str] = None):
+        self.registry_dir = registry_dir
+        self.legacy_model_path = legacy_model_path
+        self.legacy_forest_path = legacy_forest_path
+        self._active: Optional[LoadedModel] = None
+        self._lock = threading.Lock()
+        self._current_mtime = None
+        self._last_check = 0.0
+
+    def _current_path(self) -> str:
+        return os.path.join(self.registry_dir, CURRENT_FILE)
+
+    def load_version(self, version: str) -> LoadedModel:
+        path = os.path.join(self.registry_dir, version)
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            metadata = json.load(f)
+
+        forest_path = os.path.join(path, FOREST_DIR)
+        if os.path.isdir(forest_path):
+            return LoadedModel(version, metadata, forest=CompiledForest.load(forest_path))
+        return LoadedModel(version, metadata, model=joblib.load(os.path.join(path, MODEL_FILE), mmap_mode="r"))
+
+    def _load_legacy(self) -> Optional[LoadedModel]:
+        # Servers that predate the registry: single files next to it
+        metadata = {"version": "legacy", "feature_order": DEFAULT_FEATURE_ORDER}
+        if self.legacy_forest_path and os.path.isdir(self.legacy_forest_path):
+            return LoadedModel("legacy", metadata, forest=CompiledForest.load(self.legacy_forest_path))
+        if self.legacy_model_path and os.path.exists(self.legacy_model_path):
+            return LoadedModel("legacy", metadata, model=joblib.load(self.legacy_model_path))
+        return None
+
+    def load(self) -> Optional[LoadedModel]:
+        """(Re)load whatever CURRENT points at. Safe to call while serving."""
+        try:
+            mtime = os.stat(self._current_path()).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        version = read_current(self.registry_dir)
+        loaded = self.load_version(version) if version else self._load_legacy()
+
+        # Build outside the lock, swap the reference inside it: in-flight
+        # requests keep the LoadedModel they already hold
+        with self._lock:
+            self._active = loaded
+            self._current_mtime = mtime
+        if loaded:
+            print(f"✅ Yield model {loaded.version} active")
+        return loaded
+
+    def activate(self, version: str) -> LoadedModel:
+        """Make `version` current for this worker and (via CURRENT) all others."""
+        loaded = self.load_version(version)  # Fails before touching CURRENT
+        _write_current(self.registry_dir, version)
+        with self._lock:
+            self._active = loaded
+            self._current_mtime = os.stat(self._current_path()).st_mtime_ns
+        print(f"✅ Yield model {version} activated")
+        return loaded
+
+    def _check_for_update(self) -> None:
+        now = time.monotonic()
+        if now - self._last_check < RELOAD_CHECK_SECONDS:
+            return
+        self._last_check = now
+        try:
+            mtime = os.stat(self._current_path()).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._current_mtime:
+            try:
+                self.load()
+            except Exception as e:
+                # Keep serving the old version rather than failing requests
+                print(f"⚠️ Model reload failed, keeping {self.version}: {e}")
+                self._current_mtime = mtime
+
+    def get(self) -> Optional[LoadedModel]:
+        self._check_for_update()
+        return self._active
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._active.version if self._active else None
@@ -8,5 +8,9 @@ from .harvest import HarvestLog
 from .stocking import StockingLog
 from .mortality import MortalityLog
 from .chat import ChatHistory
+from .pond_status import PondStatus
+from .analytics_rollup import MonthlyPondRollup, MonthlyLossCauseRollup
+from .sync_receipt import SyncReceipt
+from .change_log import ChangeLog
 
 # This file now correctly exposes all your tables to main.py
\ No newline at end of file
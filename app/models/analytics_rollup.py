@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from app.db.connection import Base
+
+class MonthlyPondRollup(Base):
+    __tablename__ = "monthly_pond_rollups"
+
+    # One row per pond per calendar month, kept up to date by the harvest and
+    # mortality writes (see app/services/analytics_rollup.py)
+    owner_id = Column(String, primary_key=True)
+    pond_id = Column(Integer, ForeignKey("ponds.id", ondelete="CASCADE"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True) # 1-12
+
+    harvested_kg = Column(Float, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    harvest_count = Column(Integer, nullable=False, default=0)
+
+    loss_qty = Column(Integer, nullable=False, default=0)
+    loss_kg = Column(Float, nullable=False, default=0)
+    loss_count = Column(Integer, nullable=False, default=0)
+
+class MonthlyLossCauseRollup(Base):
+    __tablename__ = "monthly_loss_cause_rollups"
+
+    # Loss reports per cause (Flood, Disease, ...) for the same months
+    owner_id = Column(String, primary_key=True)
+    pond_id = Column(Integer, ForeignKey("ponds.id", ondelete="CASCADE"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    cause = Column(String, primary_key=True)
+
+    loss_qty = Column(Integer, nullable=False, default=0)
+    loss_kg = Column(Float, nullable=False, default=0)
+    loss_count = Column(Integer, nullable=False, default=0)
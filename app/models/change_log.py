@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String
+from sqlalchemy.sql import func
+from app.db.connection import Base
+
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+
+    # One row per write to a pond or one of its logs. seq only grows, so
+    # "everything after seq N" is what GET /api/sync?since=N sends the phone
+    seq = Column(BigInteger, primary_key=True, autoincrement=True)
+    owner_id = Column(String, nullable=False)
+
+    entity = Column(String(16), nullable=False) # pond, stocking, harvest, mortality
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(8), nullable=False)      # Always upsert (no delete endpoints yet)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_change_log_owner_seq", "owner_id", "seq"),
+    )
@@ -1,15 +1,21 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
 from app.db.connection import Base
 from datetime import datetime
 
 class ChatHistory(Base):
     __tablename__ = "chat_history"
+    __table_args__ = (
+        # History is read per user, newest first, by (timestamp, id) keyset
+        Index("ix_chat_history_owner_timestamp_id", "owner_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    # PRIVACY LOCK: the user UUID (NULL for messages saved before it existed)
+    owner_id = Column(String, nullable=True)
     sender = Column(String(10), nullable=False) # 'user' or 'bot'
     message = Column(Text, nullable=False)
     image_url = Column(String(255), nullable=True) # To save photo URLs
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     def to_dict(self):
         return {
@@ -18,4 +24,4 @@ class ChatHistory(Base):
             "text": self.message,
             "image": self.image_url,
             "timestamp": self.timestamp.isoformat()
-        }
\ No newline at end of file
+        }
@@ -2,6 +2,9 @@ from sqlalchemy import Column, Integer, String, Float, JSON, DateTime, Text
 from sqlalchemy.sql import func
 from app.db.connection import Base
 
+def pond_image_url(image_hash):
+    return f"/api/images/{image_hash}" if image_hash else None
+
 # Note: We do NOT need geoalchemy2 anymore because we use JSON
 # This matches the data sent by your mobile app perfectly.
 
@@ -20,6 +23,13 @@ class Pond(Base):
     coordinates = Column(JSON)  
     
     area_sqm = Column(Float)
+    # Legacy inline image. New uploads go to the blob store and only the
+    # content hash is kept here (see: python manage.py migrate-pond-images)
     image_base64 = Column(Text, nullable=True)
+    image_hash = Column(String(64), nullable=True)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    @property
+    def image_url(self):
+        return pond_image_url(self.image_hash)
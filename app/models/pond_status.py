@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, Date, DateTime, JSON, ForeignKey
+from sqlalchemy.sql import func
+from app.db.connection import Base
+
+class PondStatus(Base):
+    __tablename__ = "pond_status"
+
+    # One row per pond, kept up to date by the stocking/harvest/mortality writes
+    pond_id = Column(Integer, ForeignKey("ponds.id", ondelete="CASCADE"), primary_key=True)
+
+    live_fish_count = Column(Integer, nullable=False, default=0) # Stocked minus losses, active batches only
+    species = Column(JSON, nullable=False, default=list)         # ["Tilapia", "Bangus"] in stocking order
+    last_stocked_at = Column(Date, nullable=True)                # Newest active stocking date
+    active_batch_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.db.connection import Base
+
+class SyncReceipt(Base):
+    __tablename__ = "sync_receipts"
+
+    # One row per record accepted by POST /api/sync/batch, keyed by the
+    # idempotency key the phone generated, so replays are answered from here
+    owner_id = Column(String, primary_key=True)
+    client_id = Column(String(64), primary_key=True)
+
+    record_type = Column(String(16), nullable=False) # stocking, harvest, mortality
+    entity_id = Column(Integer, nullable=True)        # ID of the row it created
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -2,27 +2,36 @@ from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, date  # <--- 1. Import 'date'
 
-# Input Schema (What the App sends)
-class PondCreate(BaseModel):
+# Fields shared by input and output
+class PondBase(BaseModel):
     name: str
     location_desc: Optional[str] = "Unknown Location"
     coordinates: List[List[float]] 
-    image_base64: Optional[str] = None
+
+# Input Schema (What the App sends)
+class PondCreate(PondBase):
+    image_base64: Optional[str] = None # Decoded once and moved to the blob store
 
 # Output Schema (What the App receives)
-class PondResponse(PondCreate):
+class PondResponse(PondBase):
     id: int
     area_sqm: float
     owner_id: str
     created_at: Optional[datetime] = None
+
+    # Image lives in the blob store: GET image_url (add ?size=128 for a thumbnail)
+    image_hash: Optional[str] = None
+    image_url: Optional[str] = None
     
     # 2. ADD THIS FIELD (Crucial for status to work)
+    # Newest stocking date among the batches not yet harvested
     last_stocked_at: Optional[date] = None
 
     current_fish_type: Optional[str] = None
     
     # 3. ADD THIS FIELD (Total active fish count from database)
+    # Stocked minus reported losses, over the batches not yet harvested
     total_fish: Optional[int] = 0 
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional
+
+MAX_BATCH_ROWS = 10000
 
 class PredictionInput(BaseModel):
     fry_quantity: int
@@ -7,4 +10,23 @@ class PredictionInput(BaseModel):
 
 class PredictionOutput(BaseModel):
     predicted_yield_kg: float
-    estimated_revenue: float
\ No newline at end of file
+    estimated_revenue: float
+    model_version: str # Registry version that produced the numbers
+
+# --- BATCH (many ponds / scenarios in one request) ---
+class PredictionBatchInput(BaseModel):
+    # Raw values on purpose: each row is validated on its own so one bad row
+    # (even a null or a number) does not reject the whole batch
+    rows: List[Any] = Field(..., max_length=MAX_BATCH_ROWS)
+
+class PredictionRowResult(BaseModel):
+    index: int # Position in the request
+    predicted_yield_kg: Optional[float] = None
+    estimated_revenue: Optional[float] = None
+    error: Optional[str] = None # Set instead of the prediction for rejected rows
+
+class PredictionBatchOutput(BaseModel):
+    results: List[PredictionRowResult]
+    predicted: int
+    rejected: int
+    model_version: str
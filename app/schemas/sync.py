@@ -0,0 +1,93 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, List, Literal, Optional, Union
+from typing_extensions import Annotated
+from datetime import date
+
+from app.schemas.pond import PondResponse
+from app.schemas.stocking import StockingCreate, StockingResponse
+from app.schemas.harvest import HarvestCreate
+from app.schemas.mortality import MortalityCreate
+
+# Every record carries an idempotency key generated on the phone (a UUID)
+ClientId = Annotated[str, Field(min_length=1, max_length=64)]
+
+class StockingRecord(StockingCreate):
+    type: Literal["stocking"]
+    client_id: ClientId
+
+class _BatchReference(BaseModel):
+    # The batch is either a synced stocking (stocking_id) or one created
+    # offline, referenced by its client_id (same or an earlier sync batch)
+    stocking_id: Optional[int] = None
+    stocking_client_id: Optional[ClientId] = None
+
+    @model_validator(mode="after")
+    def _one_reference(self):
+        if (self.stocking_id is None) == (self.stocking_client_id is None):
+            raise ValueError("Give exactly one of stocking_id or stocking_client_id")
+        return self
+
+class HarvestRecord(_BatchReference, HarvestCreate):
+    type: Literal["harvest"]
+    client_id: ClientId
+    stocking_id: Optional[int] = None
+
+class MortalityRecord(_BatchReference, MortalityCreate):
+    type: Literal["mortality"]
+    client_id: ClientId
+    stocking_id: Optional[int] = None
+
+SyncRecord = Annotated[Union[StockingRecord, HarvestRecord, MortalityRecord], Field(discriminator="type")]
+
+class SyncBatch(BaseModel):
+    # Raw values on purpose: each record is validated as a SyncRecord on its
+    # own (offline_sync), so one malformed record does not reject the batch
+    records: List[Any]
+
+class SyncResult(BaseModel):
+    client_id: Optional[str] = None # None only for a malformed record without one
+    type: Optional[str] = None
+    status: Literal["created", "duplicate", "error"] # duplicate: already synced, nothing written
+    id: Optional[int] = None                          # Server ID of the stocking/harvest/loss
+    error: Optional[str] = None
+
+class SyncBatchResponse(BaseModel):
+    created: int
+    duplicates: int
+    errors: int
+    results: List[SyncResult] # Same order as the request
+
+# --- DELTA SYNC (GET /api/sync) ---
+class HarvestItem(BaseModel):
+    id: int
+    stocking_id: int
+    harvest_date: date
+    total_weight_kg: float
+    market_price_per_kg: Optional[float] = None
+    revenue: Optional[float] = None
+    days_cultured: Optional[int] = None
+    fish_size: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class MortalityItem(BaseModel):
+    id: int
+    stocking_id: int
+    loss_date: date
+    quantity_lost: int
+    weight_lost_kg: float
+    cause: str
+    action_taken: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class SyncDelta(BaseModel):
+    cursor: int      # Send back as ?since= on the next refresh
+    full: bool       # True: snapshot of everything (no cursor was sent)
+    has_more: bool   # More changes after this page: call again with `cursor`
+    ponds: List[PondResponse]
+    stockings: List[StockingResponse]
+    harvests: List[HarvestItem]
+    mortalities: List[MortalityItem]
@@ -0,0 +1,166 @@
+# backend/app/services/analytics_rollup.py
+"""
+Monthly analytics rollups (harvested kg, revenue, losses, losses by cause).
+
+Each harvest and mortality write adds its numbers to the row of its
+(owner, pond, year, month) in the same transaction, with an atomic
+INSERT ... ON CONFLICT DO UPDATE SET col = col + EXCLUDED.col. Analytics
+endpoints read only these small tables instead of grouping the whole
+harvest/mortality history. rebuild_rollups() recomputes them from the
+logs (backfill and repair). Data written before the rollups existed is
+backfilled once, at the first startup that has them (see main.py).
+"""
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.pond import Pond
+from app.models.stocking import StockingLog
+from app.models.harvest import HarvestLog
+from app.models.mortality import MortalityLog
+from app.models.analytics_rollup import MonthlyPondRollup, MonthlyLossCauseRollup
+
+
+def _month_key(owner_id: str, pond_id: int, day: date) -> Dict:
+    return {"owner_id": owner_id, "pond_id": pond_id, "year": day.year, "month": day.month}
+
+
+def _add_to_rollup(db: Session, model, key: Dict, deltas: Dict) -> None:
+    """Create the row or add `deltas` to it, atomically."""
+    stmt = insert(model).values(**key, **deltas)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=list(key),
+        set_={name: getattr(model, name) + stmt.excluded[name] for name in deltas}
+    ))
+
+
+# --- WRITE HOOKS (call before db.commit() of the write) ---
+def on_harvest_recorded(db: Session, owner_id: str, pond_id: int, harvest: HarvestLog) -> None:
+    _add_to_rollup(db, MonthlyPondRollup, _month_key(owner_id, pond_id, harvest.harvest_date), {
+        "harvested_kg": harvest.total_weight_kg,
+        "revenue": harvest.total_weight_kg * (harvest.market_price_per_kg or 0),
+        "harvest_count": 1
+    })
+
+
+def on_loss_recorded(db: Session, owner_id: str, pond_id: int, loss: MortalityLog) -> None:
+    key = _month_key(owner_id, pond_id, loss.loss_date)
+    deltas = {"loss_qty": loss.quantity_lost, "loss_kg": loss.weight_lost_kg, "loss_count": 1}
+    _add_to_rollup(db, MonthlyPondRollup, key, deltas)
+    _add_to_rollup(db, MonthlyLossCauseRollup, {**key, "cause": loss.cause}, deltas)
+
+
+# --- BULK WRITE HOOKS (offline sync: one statement per table) ---
+def _add_many_to_rollup(db: Session, model, rows: Dict[tuple, Dict], key_names: List[str]) -> None:
+    """_add_to_rollup for many keys at once, `rows` maps key tuples to deltas."""
+    if not rows:
+        return
+    values = [{**dict(zip(key_names, key)), **deltas} for key, deltas in rows.items()]
+    stmt = insert(model).values(values)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=key_names,
+        set_={name: getattr(model, name) + stmt.excluded[name] for name in values[0] if name not in key_names}
+    ))
+
+
+def _accumulate(rows: Dict[tuple, Dict], key: tuple, deltas: Dict) -> None:
+    total = rows.setdefault(key, dict.fromkeys(deltas, 0))
+    for name, value in deltas.items():
+        total[name] += value
+
+
+def on_harvests_recorded(db: Session, owner_id: str, harvests: List[Dict]) -> None:
+    """Harvest rows (HarvestLog columns plus pond_id), summed per month first."""
+    rows: Dict[tuple, Dict] = {}
+    for h in harvests:
+        day = h["harvest_date"]
+        _accumulate(rows, (owner_id, h["pond_id"], day.year, day.month), {
+            "harvested_kg": h["total_weight_kg"],
+            "revenue": h["total_weight_kg"] * (h["market_price_per_kg"] or 0),
+            "harvest_count": 1
+        })
+    _add_many_to_rollup(db, MonthlyPondRollup, rows, ["owner_id", "pond_id", "year", "month"])
+
+
+def on_losses_recorded(db: Session, owner_id: str, losses: List[Dict]) -> None:
+    """Mortality rows (MortalityLog columns plus pond_id), summed per month (and cause) first."""
+    months: Dict[tuple, Dict] = {}
+    causes: Dict[tuple, Dict] = {}
+    for loss in losses:
+        day = loss["loss_date"]
+        key = (owner_id, loss["pond_id"], day.year, day.month)
+        deltas = {"loss_qty": loss["quantity_lost"], "loss_kg": loss["weight_lost_kg"], "loss_count": 1}
+        _accumulate(months, key, deltas)
+        _accumulate(causes, key + (loss["cause"],), deltas)
+    _add_many_to_rollup(db, MonthlyPondRollup, months, ["owner_id", "pond_id", "year", "month"])
+    _add_many_to_rollup(db, MonthlyLossCauseRollup, causes, ["owner_id", "pond_id", "year", "month", "cause"])
+
+
+# --- BACKFILL / REPAIR ---
+def rebuild_rollups(db: Session, owner_id: Optional[str] = None) -> Dict[str, int]:
+    """
+    Recompute the rollups (of one owner, or everyone) from the logs.
+    Returns the resulting row count per table. Commits.
+    """
+    # Writers wait until the rebuild commits, so no delta is lost or counted twice
+    db.execute(text(
+        f"LOCK TABLE {MonthlyPondRollup.__tablename__}, {MonthlyLossCauseRollup.__tablename__} IN EXCLUSIVE MODE"
+    ))
+
+    owner_filter = [Pond.owner_id == owner_id] if owner_id is not None else []
+    for model in (MonthlyPondRollup, MonthlyLossCauseRollup):
+        query = db.query(model)
+        if owner_id is not None:
+            query = query.filter(model.owner_id == owner_id)
+        query.delete(synchronize_session=False)
+
+    harvest_year = func.extract("year", HarvestLog.harvest_date).cast(MonthlyPondRollup.year.type)
+    harvest_month = func.extract("month", HarvestLog.harvest_date).cast(MonthlyPondRollup.month.type)
+    harvests = select(
+        Pond.owner_id, Pond.id, harvest_year, harvest_month,
+        func.sum(HarvestLog.total_weight_kg),
+        func.sum(HarvestLog.total_weight_kg * func.coalesce(HarvestLog.market_price_per_kg, 0)),
+        func.count()
+    ).join(StockingLog, StockingLog.id == HarvestLog.stocking_id).join(
+        Pond, Pond.id == StockingLog.pond_id
+    ).where(*owner_filter).group_by(Pond.owner_id, Pond.id, harvest_year, harvest_month)
+
+    db.execute(insert(MonthlyPondRollup).from_select(
+        ["owner_id", "pond_id", "year", "month", "harvested_kg", "revenue", "harvest_count"], harvests
+    ))
+
+    loss_year = func.extract("year", MortalityLog.loss_date).cast(MonthlyPondRollup.year.type)
+    loss_month = func.extract("month", MortalityLog.loss_date).cast(MonthlyPondRollup.month.type)
+    loss_columns = ["owner_id", "pond_id", "year", "month", "loss_qty", "loss_kg", "loss_count"]
+
+    def losses(*extra):
+        return select(
+            Pond.owner_id, Pond.id, loss_year, loss_month, *extra,
+            func.sum(MortalityLog.quantity_lost), func.sum(MortalityLog.weight_lost_kg), func.count()
+        ).join(StockingLog, StockingLog.id == MortalityLog.stocking_id).join(
+            Pond, Pond.id == StockingLog.pond_id
+        ).where(*owner_filter).group_by(Pond.owner_id, Pond.id, loss_year, loss_month, *extra)
+
+    # Months with both harvests and losses share one row
+    stmt = insert(MonthlyPondRollup).from_select(loss_columns, losses())
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["owner_id", "pond_id", "year", "month"],
+        set_={name: stmt.excluded[name] for name in ("loss_qty", "loss_kg", "loss_count")}
+    ))
+
+    db.execute(insert(MonthlyLossCauseRollup).from_select(
+        loss_columns[:4] + ["cause"] + loss_columns[4:], losses(MortalityLog.cause)
+    ))
+
+    counts = {}
+    for model in (MonthlyPondRollup, MonthlyLossCauseRollup):
+        query = db.query(func.count()).select_from(model)
+        if owner_id is not None:
+            query = query.filter(model.owner_id == owner_id)
+        counts[model.__tablename__] = query.scalar()
+
+    db.commit()
+    return counts
@@ -0,0 +1,167 @@
+# backend/app/services/blob_store.py
+"""
+Content-addressed image store on the local filesystem.
+
+Images are saved once under BLOB_STORE_DIR as <sha256[:2]>/<sha256>, so the
+same photo uploaded twice is stored once. Thumbnails are resized copies
+saved next to the original as <sha256>_<size>.<webp|jpeg>, rendered at
+upload (pond photos) or on first request (chat photos).
+"""
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+import tempfile
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "storage/blobs")
+THUMBNAIL_SIZES = (128, 512)          # Longest side in pixels
+THUMBNAIL_FORMATS = ("webp", "jpeg")
+THUMBNAIL_QUALITY = 80
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+MEDIA_TYPES = {
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "gif": "image/gif",
+}
+
+
+class InvalidImageError(ValueError):
+    pass
+
+
+def is_valid_hash(image_hash: str) -> bool:
+    return bool(_HASH_RE.match(image_hash or ""))
+
+
+def decode_base64_image(data: str) -> bytes:
+    """Decode the app's base64 payload (with or without a data: URI prefix)."""
+    if data.startswith("data:"):
+        data = data.split(",", 1)[-1]
+    try:
+        return base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidImageError(f"Image is not valid base64: {e}")
+
+
+def _original_path(image_hash: str) -> str:
+    return os.path.join(BLOB_STORE_DIR, image_hash[:2], image_hash)
+
+
+def _thumbnail_path(image_hash: str, size: int, fmt: str) -> str:
+    return os.path.join(BLOB_STORE_DIR, image_hash[:2], f"{image_hash}_{size}.{fmt}")
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    # Write to a temp file then rename, so readers never see a partial file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _render_thumbnail(raw: bytes, size: int, fmt: str) -> bytes:
+    image = Image.open(io.BytesIO(raw))
+    image.draft("RGB", (size, size))  # JPEG: decode at reduced scale
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((size, size))
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    out = io.BytesIO()
+    image.save(out, format=fmt.upper(), quality=THUMBNAIL_QUALITY)
+    return out.getvalue()
+
+
+def _check_image(raw: bytes) -> None:
+    """Fully decode the image: verify() alone accepts truncated files."""
+    try:
+        with Image.open(io.BytesIO(raw)) as image:
+            image.load()
+    except (Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+        raise InvalidImageError(f"Unsupported or corrupt image: {e}")
+
+
+def store_image(raw: bytes, thumbnails: bool = True) -> str:
+    """
+    Save an image (deduplicated by content) and, unless `thumbnails` is
+    False, its thumbnails (thumbnail_file() renders missing ones later).
+    Returns the sha256 hex digest used to address it. Everything is
+    rendered before anything is written, so a bad upload leaves no files.
+    """
+    _check_image(raw)
+    image_hash = hashlib.sha256(raw).hexdigest()
+
+    rendered = {}
+    for size in THUMBNAIL_SIZES if thumbnails else ():
+        for fmt in THUMBNAIL_FORMATS:
+            thumb_path = _thumbnail_path(image_hash, size, fmt)
+            if not os.path.exists(thumb_path):
+                try:
+                    rendered[thumb_path] = _render_thumbnail(raw, size, fmt)
+                except (Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+                    raise InvalidImageError(f"Unsupported or corrupt image: {e}")
+
+    path = _original_path(image_hash)
+    if not os.path.exists(path):
+        _write_atomic(path, raw)
+    for thumb_path, data in rendered.items():
+        _write_atomic(thumb_path, data)
+
+    return image_hash
+
+
+def original_file(image_hash: str) -> Optional[str]:
+    path = _original_path(image_hash)
+    return path if os.path.exists(path) else None
+
+
+def thumbnail_file(image_hash: str, size: int, fmt: str) -> Optional[str]:
+    """
+    Path of a thumbnail, rendering it on demand if it is missing. None if
+    the original is missing, or cannot be decoded (stored before uploads
+    were fully checked).
+    """
+    path = _thumbnail_path(image_hash, size, fmt)
+    if os.path.exists(path):
+        return path
+
+    original = original_file(image_hash)
+    if original is None:
+        return None
+    with open(original, "rb") as f:
+        raw = f.read()
+    try:
+        data = _render_thumbnail(raw, size, fmt)
+    except (Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+        print(f"⚠️ Cannot render thumbnail of {image_hash}: {e}")
+        return None
+    _write_atomic(path, data)
+    return path
+
+
+def sniff_media_type(path: str) -> str:
+    with open(path, "rb") as f:
+        head = f.read(12)
+    if head.startswith(b"\xff\xd8"):
+        return MEDIA_TYPES["jpeg"]
+    if head.startswith(b"\x89PNG"):
+        return MEDIA_TYPES["png"]
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return MEDIA_TYPES["webp"]
+    if head.startswith(b"GIF8"):
+        return MEDIA_TYPES["gif"]
+    return "application/octet-stream"
@@ -0,0 +1,122 @@
+# backend/app/services/change_log.py
+"""
+Change tracking for delta sync (GET /api/sync?since=<cursor>).
+
+Every write to a pond or its stocking, harvest and mortality logs adds a
+(seq, owner, entity, id, op) row to change_log in the same transaction.
+The phone keeps the last seq it received as its cursor and asks only for
+what changed after it, so a refresh costs as much as the changes, not as
+much as the farm's whole history. A request without a cursor gets a full
+snapshot plus the cursor to continue from. The same seq is the owner's
+data version behind the ETags of the polled reads (owner_etag).
+
+The app has no delete endpoints yet, so every change is an upsert (op
+"upsert") and the feed sends no tombstones. When deletes are added they
+must be recorded here too, with op "delete", and sent to the phone.
+
+seq values are handed out when the change row is inserted, but a reader
+must never see seq N+1 committed while N is still pending, or it would
+move its cursor past N for good. record_changes() therefore takes a
+per-owner transaction lock first, so one owner's changes commit in seq
+order. Call it last, right before the commit: the lock is then held for
+a moment and never while waiting for another lock.
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import Session, defer
+
+from app.models.change_log import ChangeLog
+from app.models.pond import Pond
+from app.models.stocking import StockingLog
+from app.models.harvest import HarvestLog
+from app.models.mortality import MortalityLog
+from app.services.pond_status import apply_pond_status, load_pond_status
+
+SYNC_DELTA_LIMIT = int(os.getenv("SYNC_DELTA_LIMIT", "1000"))
+
+ENTITIES = ("pond", "stocking", "harvest", "mortality")
+RESPONSE_KEYS = {"pond": "ponds", "stocking": "stockings", "harvest": "harvests", "mortality": "mortalities"}
+
+
+# --- WRITE PATH (call right before db.commit() of the write) ---
+def record_changes(db: Session, owner_id: Optional[str], changes: List[Tuple[str, int]]) -> None:
+    """Log (entity, id) pairs as changed for the owner. Rows must be flushed (IDs known)."""
+    if owner_id is None or not changes:
+        return
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:owner_id))"), {"owner_id": owner_id})
+    db.execute(insert(ChangeLog), [
+        {"owner_id": owner_id, "entity": entity, "entity_id": entity_id, "op": "upsert"}
+        for entity, entity_id in dict.fromkeys(changes)
+    ])
+
+
+# --- READ PATH ---
+def _owner_rows(db: Session, entity: str, owner_id: str, ids: Optional[List[int]] = None) -> list:
+    """The owner's current rows of one entity (all of them, or only `ids`)."""
+    if entity == "pond":
+        query = select(Pond).options(defer(Pond.image_base64)).where(Pond.owner_id == owner_id)
+        model = Pond
+    else:
+        model = {"stocking": StockingLog, "harvest": HarvestLog, "mortality": MortalityLog}[entity]
+        query = select(model)
+        if model is not StockingLog:
+            query = query.join(StockingLog, StockingLog.id == model.stocking_id)
+        query = query.join(Pond, Pond.id == StockingLog.pond_id).where(Pond.owner_id == owner_id)
+    if ids is not None:
+        if not ids:
+            return []
+        query = query.where(model.id.in_(ids))
+    rows = db.execute(query.order_by(model.id)).scalars().all()
+    if entity == "pond":
+        apply_pond_status(rows, load_pond_status(db, rows))
+    return rows
+
+
+def latest_seq(db: Session, owner_id: str) -> int:
+    return db.execute(
+        select(func.coalesce(func.max(ChangeLog.seq), 0)).where(ChangeLog.owner_id == owner_id)
+    ).scalar()
+
+
+def owner_etag(db: Session, owner_id: str, *parts) -> str:
+    """
+    Weak validator for a per-owner read: the owner's latest change seq
+    (one index lookup), plus whatever else the response depends on.
+    """
+    return 'W/"' + "-".join(str(part) for part in (latest_seq(db, owner_id), *parts)) + '"'
+
+
+def load_changes(db: Session, owner_id: str, since: Optional[int] = None, limit: int = SYNC_DELTA_LIMIT) -> Dict:
+    """
+    Current state of the rows changed after `since`, and the cursor to
+    send next time. has_more: call again with the new cursor. Without
+    `since`, a full snapshot.
+    """
+    result = {"full": since is None, "has_more": False}
+
+    if since is None:
+        # Cursor first: anything written meanwhile is sent again next time, never missed
+        result["cursor"] = latest_seq(db, owner_id)
+        for entity in ENTITIES:
+            result[RESPONSE_KEYS[entity]] = _owner_rows(db, entity, owner_id)
+        return result
+
+    changes = db.execute(
+        select(ChangeLog.seq, ChangeLog.entity, ChangeLog.entity_id)
+        .where(ChangeLog.owner_id == owner_id, ChangeLog.seq > since)
+        .order_by(ChangeLog.seq)
+        .limit(limit + 1)
+    ).all()
+    result["has_more"] = len(changes) > limit
+    changes = changes[:limit]
+    result["cursor"] = changes[-1].seq if changes else since
+
+    changed: Dict[str, set] = {entity: set() for entity in ENTITIES}
+    for change in changes:
+        changed[change.entity].add(change.entity_id)
+
+    for entity in ENTITIES:
+        result[RESPONSE_KEYS[entity]] = _owner_rows(db, entity, owner_id, sorted(changed[entity]))
+    return result
@@ -0,0 +1,108 @@
+# backend/app/services/chat_cache.py
+"""
+AquaBot response cache with single-flight deduplication.
+
+Keys are the normalized question (lowercase, no accents, punctuation or
+extra spaces) plus the content hash of the attached photo, if any. Only
+successful Gemini answers are stored, in a TTL'd LRU (per worker).
+
+While one request is asking Gemini a question, identical requests that
+arrive wait for that answer instead of making their own call. If the
+first request fails, the waiters get the same error; if it is cancelled
+(client went away), they make the call themselves.
+"""
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from app.services.knowledge_base import normalize
+from app.services.lru_cache import LRUCache, MISSING
+
+CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "2000"))
+CHAT_CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL", str(6 * 3600)))
+
+
+def cache_key(message: str, image_hash: Optional[str] = None) -> Hashable:
+    return (" ".join(normalize(message).split()), image_hash)
+
+
+class ChatResponseCache:
+    def __init__(self, maxsize: int = CHAT_CACHE_SIZE, ttl: float = CHAT_CACHE_TTL):
+        self._answers = LRUCache(maxsize, ttl=ttl)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+        self.upstream_calls = 0
+
+    def get(self, key: Hashable):
+        """Cached answer or MISSING (counts a hit or a miss)."""
+        return self._answers.get(key)
+
+    def inflight(self, key: Hashable) -> Optional[asyncio.Future]:
+        return self._inflight.get(key)
+
+    def lead(self, key: Hashable) -> asyncio.Future:
+        """Register this request as the one calling upstream for `key`."""
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.upstream_calls += 1
+        return future
+
+    def finish(self, key: Hashable, future: asyncio.Future, answer: Optional[str] = None,
+               error: Optional[BaseException] = None) -> None:
+        """Store the leader's answer (or error) and wake the waiters."""
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if future.done():
+            return
+        if answer is not None:
+            if answer:
+                self._answers.set(key, answer)
+            future.set_result(answer)
+        elif error is None or not isinstance(error, Exception):
+            future.cancel() # Cancelled / client disconnected: waiters call upstream themselves
+        else:
+            future.set_exception(error)
+            future.exception() # Nobody may be waiting: do not log it as unretrieved
+
+    async def wait(self, future: asyncio.Future) -> Optional[str]:
+        """The leader's answer, or None if the leader was cancelled."""
+        self.coalesced += 1
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if future.cancelled():
+                return None
+            raise # This request itself was cancelled
+
+    async def get_or_call(self, key: Hashable, call: Callable[[], Awaitable[str]]) -> str:
+        """Cached answer, the in-flight call's answer, or a new call's answer."""
+        cached = self.get(key)
+        if cached is not MISSING:
+            return cached
+
+        future = self.inflight(key)
+        if future is not None:
+            answer = await self.wait(future)
+            if answer is not None:
+                return answer
+
+        future = self.lead(key)
+        try:
+            answer = await call()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, answer=answer)
+        return answer
+
+    def stats(self) -> dict:
+        answers = self._answers.stats()
+        saved = answers["hits"] + self.coalesced
+        requests = saved + self.upstream_calls
+        return {
+            **answers,
+            "coalesced": self.coalesced,
+            "upstream_calls": self.upstream_calls,
+            "upstream_calls_saved": saved,
+            "saved_ratio": round(saved / requests, 4) if requests else 0.0
+        }
@@ -0,0 +1,201 @@
+# backend/app/services/chat_writer.py
+"""
+Write-behind persistence for chat messages.
+
+The chat routes hand their messages to ChatWriter.save() and return
+without waiting for the database. A background thread drains the queue
+and inserts everything that accumulated (up to CHAT_WRITE_BATCH_SIZE
+rows) as one multi-row INSERT in a single transaction, so a chat turn's
+user and bot messages usually land in the same commit.
+
+- Timestamps are taken at save() time, so history order is the order
+  the messages happened in, not the order they were flushed in.
+- The queue is bounded (CHAT_WRITE_QUEUE_SIZE). When it is full (the
+  database is down or too slow), save() writes synchronously instead of
+  growing memory or dropping the message.
+- stop() (app shutdown) flushes whatever is still queued.
+- CHAT_WRITE_BEHIND=0 turns it off: every save() commits immediately.
+- Async routes call asave(): same queue, but a synchronous write (the
+  three cases above) runs in a worker thread, not on the event loop.
+
+Messages are visible in GET /api/chat/history once flushed, normally
+within CHAT_WRITE_FLUSH_SECONDS.
+"""
+import asyncio
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import insert
+
+from app.db.connection import SessionLocal
+from app.models.chat import ChatHistory
+
+CHAT_WRITE_BEHIND = os.getenv("CHAT_WRITE_BEHIND", "1") == "1"
+CHAT_WRITE_QUEUE_SIZE = int(os.getenv("CHAT_WRITE_QUEUE_SIZE", "10000"))
+CHAT_WRITE_BATCH_SIZE = int(os.getenv("CHAT_WRITE_BATCH_SIZE", "500"))
+CHAT_WRITE_FLUSH_SECONDS = float(os.getenv("CHAT_WRITE_FLUSH_SECONDS", "0.2"))
+CHAT_WRITE_RETRIES = int(os.getenv("CHAT_WRITE_RETRIES", "3"))
+
+_STOP = object()
+
+
+class ChatWriter:
+    def __init__(
+        self,
+        enabled: bool = CHAT_WRITE_BEHIND,
+        maxsize: int = CHAT_WRITE_QUEUE_SIZE,
+        batch_size: int = CHAT_WRITE_BATCH_SIZE,
+        flush_interval: float = CHAT_WRITE_FLUSH_SECONDS,
+        retries: int = CHAT_WRITE_RETRIES,
+        session_factory=SessionLocal
+    ):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.session_factory = session_factory
+        self._queue: "queue.Queue" = queue.Queue(maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.written = 0
+        self.commits = 0
+        self.sync_writes = 0
+        self.failed_writes = 0
+
+    # --- Producer side (request handlers) ---
+    def save(self, owner_id: Optional[str], sender: str, text: str, image_url: Optional[str] = None) -> None:
+        row = self._row(owner_id, sender, text, image_url)
+        if not self._enqueue(row):
+            self._write([row], retries=0) # On the request path: no backoff sleeps
+
+    async def asave(self, owner_id: Optional[str], sender: str, text: str, image_url: Optional[str] = None) -> None:
+        """save() for async handlers: a synchronous write does not block the event loop."""
+        row = self._row(owner_id, sender, text, image_url)
+        if not self._enqueue(row):
+            await asyncio.to_thread(self._write, [row], 0)
+
+    def _row(self, owner_id: Optional[str], sender: str, text: str, image_url: Optional[str]) -> dict:
+        return {
+            "owner_id": owner_id,
+            "sender": sender,
+            "message": text,
+            "image_url": image_url,
+            "timestamp": datetime.utcnow()
+        }
+
+    def _enqueue(self, row: dict) -> bool:
+        """Queue the row for the flush thread. False: the caller must write it now."""
+        if self.enabled and self._ensure_started():
+            try:
+                self._queue.put_nowait(row)
+                with self._lock:
+                    self.queued += 1
+                return True
+            except queue.Full:
+                pass # Backpressure: write this one synchronously
+        with self._lock:
+            self.sync_writes += 1
+        return False
+
+    def _ensure_started(self) -> bool:
+        """Start the flush thread on first use. False once stopped."""
+        if self._thread is not None:
+            return self._thread.is_alive()
+        with self._start_lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name="chat-writer", daemon=True)
+                thread.start()
+                self._thread = thread # Publish only once started
+        return self._thread.is_alive()
+
+    # --- Consumer side (flush thread) ---
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # Whatever else is already queued goes in the same transaction
+            while item is not _STOP:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            stopping = item is _STOP
+            if batch:
+                self._write(batch)
+
+    def _write(self, rows: List[dict], retries: Optional[int] = None) -> None:
+        """Insert rows in one transaction, retrying transient failures."""
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            db = self.session_factory()
+            try:
+                db.execute(insert(ChatHistory), rows)
+                db.commit()
+                with self._lock:
+                    self.written += len(rows)
+                    self.commits += 1
+                return
+            except Exception as e:
+                db.rollback()
+                if attempt == retries:
+                    with self._lock:
+                        self.failed_writes += len(rows)
+                    print(f"❌ Chat history write failed, {len(rows)} messages lost: {e}")
+                    return
+                print(f"⚠️ Chat history write failed (attempt {attempt + 1}), retrying: {e}")
+                time.sleep(min(2 ** attempt * 0.5, 5))
+            finally:
+                db.close()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush everything still queued and stop the thread (app shutdown)."""
+        with self._start_lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            self._queue.put(_STOP) # Blocks only while the queue is full
+        thread.join(timeout)
+        if thread.is_alive():
+            print(f"⚠️ Chat writer still flushing after {timeout:g}s, {self._queue.qsize()} messages pending")
+            return
+
+        # Saved while the stop marker was already queued
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            self._write(leftover)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "write_behind": self.enabled,
+                "pending": self._queue.qsize(),
+                "queued": self.queued,
+                "written": self.written,
+                "commits": self.commits,
+                "rows_per_commit": round(self.written / self.commits, 2) if self.commits else 0.0,
+                "sync_writes": self.sync_writes,
+                "failed_writes": self.failed_writes
+            }
+
+
+chat_writer = ChatWriter()
@@ -0,0 +1,143 @@
+# backend/app/services/gemini_client.py
+"""
+Non-blocking Gemini calls for the chat routes.
+
+Every call goes through generate_content_async (stream() for SSE), so a
+slow round trip only suspends its own request instead of the worker's
+event loop. A semaphore caps the calls in flight per worker, each attempt
+has a timeout, and rate-limit errors (429 / ResourceExhausted) are retried
+with exponential backoff and full jitter.
+
+Anything with an async generate_content_async(parts) method can be used as
+the model (see benchmarks/fake_gemini.py).
+"""
+import asyncio
+import os
+import random
+from typing import Any, AsyncIterator, List
+
+from google.api_core import exceptions as google_exceptions
+
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "20"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+GEMINI_BACKOFF_BASE_SECONDS = float(os.getenv("GEMINI_BACKOFF_BASE_SECONDS", "0.5"))
+GEMINI_BACKOFF_MAX_SECONDS = float(os.getenv("GEMINI_BACKOFF_MAX_SECONDS", "8"))
+
+
+class GeminiBusyError(Exception):
+    """Still rate limited after every retry."""
+
+
+class GeminiUnavailableError(Exception):
+    """Timed out or failed for another reason."""
+
+
+class GeminiClient:
+    def __init__(
+        self,
+        model: Any,
+        max_concurrency: int = GEMINI_MAX_CONCURRENCY,
+        timeout: float = GEMINI_TIMEOUT_SECONDS,
+        max_retries: int = GEMINI_MAX_RETRIES,
+        backoff_base: float = GEMINI_BACKOFF_BASE_SECONDS,
+        backoff_max: float = GEMINI_BACKOFF_MAX_SECONDS
+    ):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full jitter: uniform(0, min(max, base * 2^attempt))."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _request(self, prompt_parts: List[Any], **kwargs):
+        """One generate_content_async call, retried on 429. Caller holds the semaphore."""
+        for attempt in range(self.max_retries + 1):
+            self.calls += 1
+            try:
+                return await asyncio.wait_for(
+                    self.model.generate_content_async(prompt_parts, **kwargs), self.timeout
+                )
+            except google_exceptions.ResourceExhausted as e:
+                if attempt == self.max_retries:
+                    self.rate_limited += 1
+                    raise GeminiBusyError(str(e)) from e
+                self.retries += 1
+                # Keep the slot while waiting: retrying callers should not
+                # let even more requests through to a rate-limited API
+                await asyncio.sleep(self.backoff_delay(attempt))
+            except asyncio.TimeoutError as e:
+                self.timeouts += 1
+                raise GeminiUnavailableError(f"Gemini did not answer within {self.timeout:g}s") from e
+            except Exception as e:
+                self.failures += 1
+                raise GeminiUnavailableError(str(e)) from e
+
+    async def generate(self, prompt_parts: List[Any]) -> str:
+        """Text of Gemini's answer. Raises GeminiBusyError / GeminiUnavailableError."""
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                response = await self._request(prompt_parts)
+                return response.text
+            finally:
+                self.in_flight -= 1
+
+    async def stream(self, prompt_parts: List[Any]) -> AsyncIterator[str]:
+        """
+        Yield the answer's text chunks as Gemini produces them. 429s are only
+        retried before the first chunk; the timeout applies to every chunk.
+        """
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                response = await self._request(prompt_parts, stream=True)
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout)
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.TimeoutError as e:
+                        self.timeouts += 1
+                        raise GeminiUnavailableError(f"Gemini stalled for {self.timeout:g}s mid-answer") from e
+                    except Exception as e:
+                        self.failures += 1
+                        raise GeminiUnavailableError(str(e)) from e
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        continue # Chunk without text parts (e.g. the final finish_reason)
+                    if text:
+                        yield text
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "available": self.available,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+            "max_retries": self.max_retries,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "timeouts": self.timeouts,
+            "failures": self.failures
+        }
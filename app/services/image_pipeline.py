@@ -0,0 +1,96 @@
+# backend/app/services/image_pipeline.py
+"""
+Preprocessing for chat photo uploads.
+
+Phone cameras send 12-megapixel JPEGs (3-6 MB). Gemini does not need
+that resolution to judge water color or a sick fish, so uploads are:
+
+1. read in chunks with a hard byte cap (read_upload_limited),
+2. decoded at reduced scale (JPEG draft mode), rotated per EXIF,
+   downscaled to CHAT_IMAGE_MAX_DIMENSION and re-encoded as JPEG
+   (prepare_chat_image, CPU work: run it in a thread).
+
+Re-encoding also strips EXIF metadata (GPS) before the photo is sent
+upstream or stored.
+"""
+import io
+import math
+import os
+from typing import NamedTuple
+
+from fastapi import UploadFile
+from PIL import Image, ImageOps
+
+CHAT_IMAGE_MAX_BYTES = int(os.getenv("CHAT_IMAGE_MAX_BYTES", str(15 * 1024 * 1024)))
+CHAT_IMAGE_MAX_PIXELS = int(os.getenv("CHAT_IMAGE_MAX_PIXELS", str(50_000_000)))
+CHAT_IMAGE_MAX_DIMENSION = int(os.getenv("CHAT_IMAGE_MAX_DIMENSION", "1536"))
+CHAT_IMAGE_QUALITY = int(os.getenv("CHAT_IMAGE_QUALITY", "85"))
+
+READ_CHUNK_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+class PreparedImage(NamedTuple):
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    original_bytes: int
+    original_size: tuple  # (width, height) before downscaling
+
+
+async def read_upload_limited(upload: UploadFile, max_bytes: int = CHAT_IMAGE_MAX_BYTES) -> bytes:
+    """Read an upload chunk by chunk, failing as soon as it passes max_bytes."""
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLargeError(f"Image is larger than {max_bytes // (1024 * 1024)} MB")
+
+    buf = bytearray()
+    while True:
+        chunk = await upload.read(READ_CHUNK_BYTES)
+        if not chunk:
+            return bytes(buf)
+        buf += chunk
+        if len(buf) > max_bytes:
+            raise UploadTooLargeError(f"Image is larger than {max_bytes // (1024 * 1024)} MB")
+
+
+def prepare_chat_image(
+    raw: bytes,
+    max_dimension: int = CHAT_IMAGE_MAX_DIMENSION,
+    quality: int = CHAT_IMAGE_QUALITY
+) -> PreparedImage:
+    """Decode, orient, downscale and re-encode an upload as JPEG. Raises on bad data."""
+    image = Image.open(io.BytesIO(raw))
+    original_size = image.size
+    if image.width * image.height > CHAT_IMAGE_MAX_PIXELS:
+        raise ValueError(f"Image has too many pixels ({image.width}x{image.height})")
+
+    # JPEG: let libjpeg decode at 1/2, 1/4 or 1/8 scale, never below the
+    # target (draft keeps both sides at least as large as requested)
+    scale = min(1.0, max_dimension / max(image.size))
+    image.draft("RGB", (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    if image.mode in ("RGBA", "LA", "P"):
+        # Flatten transparency onto white instead of black
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    out = io.BytesIO()
+    image.save(out, format="JPEG", quality=quality)
+    return PreparedImage(
+        data=out.getvalue(),
+        mime_type="image/jpeg",
+        width=image.width,
+        height=image.height,
+        original_bytes=len(raw),
+        original_size=original_size
+    )
@@ -0,0 +1,179 @@
+# backend/app/services/knowledge_base.py
+"""
+Local AquaBot knowledge base: TF-IDF retrieval over curated Q&A entries.
+
+Entries live in ml_engine/data/aquabot_knowledge.json, each with several
+phrasings of the question (English, Tagalog, Ilocano) and one answer.
+Every phrasing is a document in a character n-gram TF-IDF index (robust
+to typos, affixes and code-switching), built once at startup with
+scikit-learn. Queries skip sklearn's per-call overhead: the query's
+n-grams select columns of the CSC matrix and np.bincount sums them into
+per-phrasing cosine scores. An entry scores as its best phrasing.
+
+The chat routes answer high-confidence matches directly (no Gemini call),
+pass the top matches to Gemini as context otherwise, and use the best
+match as the offline answer when the AI is unreachable, but only if it
+is both confident and clearly ahead of the runner-up (offline_answer):
+a wrong answer is worse than none.
+"""
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+KNOWLEDGE_PATH = os.getenv("AQUABOT_KNOWLEDGE_PATH", "ml_engine/data/aquabot_knowledge.json")
+KB_DIRECT_ANSWER_SCORE = float(os.getenv("KB_DIRECT_ANSWER_SCORE", "0.75"))
+KB_CONTEXT_SCORE = float(os.getenv("KB_CONTEXT_SCORE", "0.3"))
+# Offline answers go out unreviewed: off-topic messages score up to ~0.73
+# on shared n-grams ("what time is it" vs "what time to feed fish")
+KB_OFFLINE_SCORE = float(os.getenv("KB_OFFLINE_SCORE", "0.75"))
+KB_OFFLINE_MARGIN = float(os.getenv("KB_OFFLINE_MARGIN", "0.15"))
+
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop accents and punctuation ("Bakit?" matches "bakit")."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _PUNCTUATION.sub(" ", text)
+
+
+class KnowledgeMatch(NamedTuple):
+    entry_id: str
+    question: str  # Best matching phrasing
+    answer: str
+    score: float   # Cosine similarity, 0..1
+
+
+class KnowledgeBase:
+    def __init__(self, entries: List[dict]):
+        self.entries = entries
+        documents, doc_entry, offsets = [], [], [0]
+        for i, entry in enumerate(entries):
+            for question in entry["questions"]:
+                documents.append(question)
+                doc_entry.append(i)
+            offsets.append(len(documents))
+        self.documents = documents
+        self._doc_entry = np.asarray(doc_entry, dtype=np.intp)
+        self._offsets = offsets # Phrasings of entry i: documents[offsets[i]:offsets[i + 1]]
+
+        self.vectorizer = TfidfVectorizer(
+            analyzer="char_wb", ngram_range=(3, 5), sublinear_tf=True, preprocessor=normalize
+        )
+        # Rows are L2-normalized, so a dot product is the cosine similarity.
+        # Column-major: a query touches only the columns of its n-grams
+        matrix = self.vectorizer.fit_transform(documents).tocsc()
+        matrix.sort_indices()
+        self._indptr, self._indices, self._data = matrix.indptr, matrix.indices, matrix.data
+        self._analyzer = self.vectorizer.build_analyzer()
+        self._vocabulary = self.vectorizer.vocabulary_
+        self._idf = self.vectorizer.idf_
+
+        self._lock = threading.Lock()
+        self.searches = 0
+
+    @classmethod
+    def load(cls, path: str = KNOWLEDGE_PATH) -> "KnowledgeBase":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def search(self, text: str, k: int = 3) -> List[KnowledgeMatch]:
+        """Best `k` entries for `text`, highest score first (score > 0 only)."""
+        with self._lock:
+            self.searches += 1
+        if not text or not text.strip():
+            return []
+
+        doc_scores = self._score_documents(text)
+
+        entry_scores = np.zeros(len(self.entries))
+        np.maximum.at(entry_scores, self._doc_entry, doc_scores)
+
+        k = min(k, len(self.entries))
+        top = np.argpartition(-entry_scores, k - 1)[:k]
+        top = top[np.argsort(-entry_scores[top], kind="stable")]
+
+        matches = []
+        for i in top:
+            if entry_scores[i] <= 0:
+                break
+            start, end = self._offsets[i], self._offsets[i + 1]
+            matches.append(KnowledgeMatch(
+                entry_id=self.entries[i]["id"],
+                question=self.documents[start + int(np.argmax(doc_scores[start:end]))],
+                answer=self.entries[i]["answer"],
+                score=float(entry_scores[i])
+            ))
+        return matches
+
+    def _query_vector(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Column ids and L2-normalized TF-IDF weights (same as vectorizer.transform)."""
+        counts = Counter(self._analyzer(text))
+        cols, tf = [], []
+        for gram, count in counts.items():
+            col = self._vocabulary.get(gram)
+            if col is not None:
+                cols.append(col)
+                tf.append(count)
+        cols = np.asarray(cols, dtype=np.intp)
+        weights = (1.0 + np.log(np.asarray(tf, dtype=np.float64))) * self._idf[cols]
+        norm = np.sqrt(np.dot(weights, weights))
+        return cols, (weights / norm if norm else weights)
+
+    def _score_documents(self, text: str) -> np.ndarray:
+        cols, weights = self._query_vector(text)
+        if len(cols) == 0:
+            return np.zeros(len(self.documents))
+        starts, ends = self._indptr[cols], self._indptr[cols + 1]
+        lengths = ends - starts
+        # Positions of every stored value in the selected columns
+        positions = np.arange(lengths.sum()) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return np.bincount(
+            self._indices[positions],
+            weights=self._data[positions] * np.repeat(weights, lengths),
+            minlength=len(self.documents)
+        )
+
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), "phrasings": len(self.documents), "searches": self.searches}
+
+
+def direct_answer(matches: List[KnowledgeMatch], threshold: float = KB_DIRECT_ANSWER_SCORE) -> Optional[str]:
+    """The top answer when it is confident enough to skip the AI call."""
+    if matches and matches[0].score >= threshold:
+        return matches[0].answer
+    return None
+
+
+def context_matches(matches: List[KnowledgeMatch], threshold: float = KB_CONTEXT_SCORE) -> List[KnowledgeMatch]:
+    return [m for m in matches if m.score >= threshold]
+
+
+def offline_answer(
+    matches: List[KnowledgeMatch], threshold: float = KB_OFFLINE_SCORE, margin: float = KB_OFFLINE_MARGIN
+) -> Optional[str]:
+    """The top answer when the AI is unreachable: confident, and `margin` ahead of the runner-up."""
+    if not matches or matches[0].score < threshold:
+        return None
+    if len(matches) > 1 and matches[0].score - matches[1].score < margin:
+        return None
+    return matches[0].answer
+
+
+def load_knowledge_base(path: str = KNOWLEDGE_PATH) -> Optional[KnowledgeBase]:
+    try:
+        kb = KnowledgeBase.load(path)
+        print(f"✅ AquaBot knowledge base ready: {len(kb.entries)} entries, {len(kb.documents)} phrasings")
+        return kb
+    except Exception as e:
+        print(f"⚠️ Knowledge base not loaded ({path}): {e}")
+        return None
@@ -0,0 +1,255 @@
+# backend/app/services/offline_sync.py
+"""
+Bulk ingestion of records the phone saved while offline.
+
+A batch mixes stocking, harvest and mortality records, each with a
+client-generated idempotency key (client_id). ingest_batch() handles the
+whole batch in one transaction with a fixed number of statements:
+
+1. one query for receipts of keys already synced (those records are
+   answered as duplicates, nothing is written again),
+2. one query for the user's ponds and one for the referenced stockings
+   (ownership and existence checked as sets, not per record),
+3. one multi-row INSERT per log table, one for the receipts,
+4. pond_status, the monthly rollups and change_log updated once per batch.
+
+Harvest and mortality records can point at a stocking created offline by
+its client_id (stocking_client_id), in the same batch or an earlier one.
+
+Records arrive unparsed and are validated one by one (SyncRecord). A
+record that fails validation, malformed or rejected by the checks above,
+is reported as an error and gets no receipt, the rest of the batch is
+still written. If the same batch is
+being ingested concurrently, the receipt insert conflicts, the
+transaction is rolled back and the batch is re-run once against the
+now-committed receipts.
+"""
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.pond import Pond
+from app.models.stocking import StockingLog
+from app.models.harvest import HarvestLog
+from app.models.mortality import MortalityLog
+from app.models.sync_receipt import SyncReceipt
+from app.schemas.sync import HarvestRecord, StockingRecord, SyncRecord
+from app.services.analytics_rollup import on_harvests_recorded, on_losses_recorded
+from app.services.change_log import record_changes
+from app.services.owner_events import mark_owner_dirty
+from app.services.pond_status import on_logs_ingested
+
+SYNC_MAX_BATCH = int(os.getenv("SYNC_MAX_BATCH", "500"))
+
+_SYNC_RECORD = TypeAdapter(SyncRecord)
+
+
+def ingest_batch(db: Session, owner_id: str, records: List[Any]) -> dict:
+    """Write a sync batch of raw records (commits). Returns counts and per-record results in request order."""
+    results: List[Optional[dict]] = [None] * len(records)
+    positions, parsed = [], []
+    for i, raw in enumerate(records):
+        if not isinstance(raw, dict):
+            results[i] = _invalid(raw, "record must be an object")
+            continue
+        try:
+            parsed.append(_SYNC_RECORD.validate_python(raw))
+            positions.append(i)
+        except ValidationError as e:
+            results[i] = _invalid(raw, _describe_errors(e))
+
+    if parsed:
+        try:
+            ingested = _ingest(db, owner_id, parsed)
+            db.commit()
+        except IntegrityError:
+            # Same client_ids committed meanwhile by a concurrent replay
+            db.rollback()
+            ingested = _ingest(db, owner_id, parsed)
+            db.commit()
+        for i, result in zip(positions, ingested):
+            results[i] = result
+
+    counts = Counter(r["status"] for r in results)
+    return {
+        "created": counts["created"],
+        "duplicates": counts["duplicate"],
+        "errors": counts["error"],
+        "results": results
+    }
+
+
+def _describe_errors(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'record'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+def _invalid(raw: Any, error: str) -> dict:
+    """Error result of a record that is not a valid SyncRecord (keeps its client_id and type if usable)."""
+    fields = raw if isinstance(raw, dict) else {}
+    client_id, record_type = fields.get("client_id"), fields.get("type")
+    return {
+        "client_id": client_id if isinstance(client_id, str) else None,
+        "type": record_type if isinstance(record_type, str) else None,
+        "status": "error", "id": None, "error": error
+    }
+
+
+def _result(record, status: str, entity_id: Optional[int] = None, error: Optional[str] = None) -> dict:
+    return {"client_id": record.client_id, "type": record.type, "status": status, "id": entity_id, "error": error}
+
+
+def _ingest(db: Session, owner_id: str, records: list) -> List[dict]:
+    results: List[Optional[dict]] = [None] * len(records)
+
+    # 1. Repeated keys inside the batch, then keys synced before
+    seen = set()
+    for i, record in enumerate(records):
+        if record.client_id in seen:
+            results[i] = _result(record, "error", error="client_id repeated in this batch")
+        seen.add(record.client_id)
+
+    referenced = {r.stocking_client_id for r in records if not isinstance(r, StockingRecord) and r.stocking_client_id}
+    receipts: Dict[str, Tuple[str, Optional[int]]] = {
+        row.client_id: (row.record_type, row.entity_id)
+        for row in db.execute(select(SyncReceipt).where(
+            SyncReceipt.owner_id == owner_id, SyncReceipt.client_id.in_(seen | referenced)
+        )).scalars()
+    }
+    for i, record in enumerate(records):
+        if results[i] is None and record.client_id in receipts:
+            record_type, entity_id = receipts[record.client_id]
+            if record_type == record.type:
+                results[i] = _result(record, "duplicate", entity_id)
+            else:
+                results[i] = _result(record, "error", error=f"client_id already used for a {record_type} record")
+
+    pending = [i for i in range(len(records)) if results[i] is None]
+
+    # 2. Ownership of the ponds being stocked (one query)
+    stocked_ponds = {records[i].pond_id for i in pending if isinstance(records[i], StockingRecord)}
+    own_ponds = set(db.execute(
+        select(Pond.id).where(Pond.owner_id == owner_id, Pond.id.in_(stocked_ponds))
+    ).scalars()) if stocked_ponds else set()
+
+    new_stockings: Dict[str, StockingRecord] = {}
+    for i in pending:
+        record = records[i]
+        if isinstance(record, StockingRecord):
+            if record.pond_id not in own_ponds:
+                results[i] = _result(record, "error", error="Pond not found or access denied")
+            else:
+                new_stockings[record.client_id] = record
+
+    # Batches referenced by ID, or by the client_id of an already synced stocking
+    def synced_stocking_id(record) -> Optional[int]:
+        if record.stocking_id is not None:
+            return record.stocking_id
+        receipt = receipts.get(record.stocking_client_id)
+        return receipt[1] if receipt and receipt[0] == "stocking" else None
+
+    log_records = [i for i in pending if results[i] is None and not isinstance(records[i], StockingRecord)]
+    stocking_ids = {synced_stocking_id(records[i]) for i in log_records} - {None}
+    batches = {
+        row.id: (row.pond_id, row.stocking_date)
+        for row in db.execute(
+            select(StockingLog.id, StockingLog.pond_id, StockingLog.stocking_date)
+            .join(Pond, Pond.id == StockingLog.pond_id)
+            .where(Pond.owner_id == owner_id, StockingLog.id.in_(stocking_ids))
+        )
+    } if stocking_ids else {}
+
+    # (pond_id, stocking_date, synced stocking id or None = created in this batch)
+    targets: Dict[int, Tuple[int, object, Optional[int]]] = {}
+    for i in log_records:
+        record = records[i]
+        stocking_id = synced_stocking_id(record)
+        if stocking_id in batches:
+            pond_id, stocking_date = batches[stocking_id]
+        elif stocking_id is None and record.stocking_client_id in new_stockings:
+            batch = new_stockings[record.stocking_client_id]
+            pond_id, stocking_date = batch.pond_id, batch.stocking_date
+        else:
+            results[i] = _result(record, "error", error="Stocking ID not found")
+            continue
+        if isinstance(record, HarvestRecord) and record.harvest_date < stocking_date:
+            results[i] = _result(record, "error", error="Harvest date cannot be before stocking date!")
+            continue
+        targets[i] = (pond_id, stocking_date, stocking_id)
+
+    # 3. Multi-row inserts, stockings first so offline batches get their IDs
+    stocking_rows = [i for i in pending if results[i] is None and isinstance(records[i], StockingRecord)]
+    created_stockings: Dict[str, int] = {}
+    if stocking_rows:
+        ids = db.execute(
+            insert(StockingLog).returning(StockingLog.id, sort_by_parameter_order=True),
+            [{
+                "pond_id": records[i].pond_id,
+                "stocking_date": records[i].stocking_date,
+                "fry_type": records[i].fry_type,
+                "fry_quantity": records[i].fry_quantity
+            } for i in stocking_rows]
+        ).scalars().all()
+        for i, entity_id in zip(stocking_rows, ids):
+            created_stockings[records[i].client_id] = entity_id
+            results[i] = _result(records[i], "created", entity_id)
+
+    harvests, losses = [], []
+    for i, (pond_id, stocking_date, stocking_id) in targets.items():
+        record = records[i]
+        stocking_id = stocking_id or created_stockings[record.stocking_client_id]
+        if isinstance(record, HarvestRecord):
+            harvests.append((i, pond_id, {
+                "stocking_id": stocking_id,
+                "harvest_date": record.harvest_date,
+                "total_weight_kg": record.total_weight_kg,
+                "market_price_per_kg": record.market_price_per_kg,
+                "revenue": record.total_weight_kg * record.market_price_per_kg,
+                "days_cultured": (record.harvest_date - stocking_date).days,
+                "fish_size": record.fish_size
+            }))
+        else:
+            losses.append((i, pond_id, {
+                "stocking_id": stocking_id,
+                "loss_date": record.loss_date,
+                "quantity_lost": record.quantity_lost,
+                "weight_lost_kg": record.weight_lost_kg,
+                "cause": record.cause,
+                "action_taken": record.action_taken
+            }))
+
+    for model, rows in ((HarvestLog, harvests), (MortalityLog, losses)):
+        if not rows:
+            continue
+        ids = db.execute(
+            insert(model).returning(model.id, sort_by_parameter_order=True),
+            [values for _, _, values in rows]
+        ).scalars().all()
+        for (i, _, _), entity_id in zip(rows, ids):
+            results[i] = _result(records[i], "created", entity_id)
+
+    created = [r for r in results if r["status"] == "created"]
+    if not created:
+        return results
+
+    # Receipts: a concurrent replay of the same keys makes this fail (IntegrityError)
+    db.execute(insert(SyncReceipt), [
+        {"owner_id": owner_id, "client_id": r["client_id"], "record_type": r["type"], "entity_id": r["id"]}
+        for r in created
+    ])
+
+    # 4. Derived tables, once for the whole batch
+    pond_ids = [records[i].pond_id for i in stocking_rows] + [pond_id for _, pond_id, _ in harvests + losses]
+    on_logs_ingested(db, pond_ids)
+    on_harvests_recorded(db, owner_id, [{**values, "pond_id": pond_id} for _, pond_id, values in harvests])
+    on_losses_recorded(db, owner_id, [{**values, "pond_id": pond_id} for _, pond_id, values in losses])
+    mark_owner_dirty(db, owner_id)
+    record_changes(db, owner_id, [(r["type"], r["id"]) for r in created] + [("pond", pond_id) for pond_id in pond_ids])
+    return results
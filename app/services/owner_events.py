@@ -0,0 +1,50 @@
+# backend/app/services/owner_events.py
+"""
+Per-owner write notifications.
+
+Writers call mark_owner_dirty(db, owner_id) inside their transaction.
+Once that session commits, every function registered with
+@on_owner_commit runs with the owner id (cache invalidation etc.). A
+rollback drops the pending notifications.
+"""
+from typing import Callable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.pond import Pond
+
+_listeners: List[Callable[[str], None]] = []
+
+
+def on_owner_commit(fn: Callable[[str], None]) -> Callable[[str], None]:
+    _listeners.append(fn)
+    return fn
+
+
+def mark_owner_dirty(db: Session, owner_id: Optional[str]) -> None:
+    if owner_id is not None:
+        db.info.setdefault("dirty_owners", set()).add(owner_id)
+
+
+def pond_owner(db: Session, pond_id: int) -> Optional[str]:
+    """Owner of a pond (harvest/mortality writes only know the stocking)."""
+    return db.query(Pond.owner_id).filter(Pond.id == pond_id).scalar()
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_after_commit(session: Session) -> None:
+    owners = session.info.pop("dirty_owners", None)
+    if not owners:
+        return
+    for owner_id in owners:
+        for listener in _listeners:
+            try:
+                listener(owner_id)
+            except Exception as e:
+                print(f"⚠️ Owner listener failed for {owner_id}: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("dirty_owners", None)
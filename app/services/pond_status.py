@@ -0,0 +1,255 @@
+# backend/app/services/pond_status.py
+"""
+Denormalized pond status (live fish, species, last stocking, active batches).
+
+The pond_status row is updated inside the same transaction as the stocking,
+harvest and mortality writes, so reads are a single-row lookup. The
+set-based computation below is the source of truth and is used both by the
+harvest write (to recompute one pond) and by the rebuild command.
+"""
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, exists, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.pond import Pond
+from app.models.stocking import StockingLog
+from app.models.harvest import HarvestLog
+from app.models.mortality import MortalityLog
+from app.models.pond_status import PondStatus
+
+EMPTY_STATUS = {
+    "live_fish_count": 0,
+    "species": [],
+    "last_stocked_at": None,
+    "active_batch_count": 0
+}
+
+
+# --- HELPER: Compute status for many ponds at once (source of truth) ---
+def compute_pond_status(
+    db: Session,
+    owner_id: Optional[str] = None,
+    pond_ids: Optional[List[int]] = None
+) -> Dict[int, Dict]:
+    """
+    Compute the status of every pond of an owner (or only `pond_ids`, or all
+    ponds when both are None) in a single SQL statement.
+
+    Returns {pond_id: status}. Ponds without active stock are absent.
+    """
+    # A stock is active while no HarvestLog points at it (anti-join)
+    is_harvested = exists().where(HarvestLog.stocking_id == StockingLog.id)
+
+    losses = select(func.coalesce(func.sum(MortalityLog.quantity_lost), 0)).where(
+        MortalityLog.stocking_id == StockingLog.id
+    ).scalar_subquery()
+
+    filters = [~is_harvested]
+    if owner_id is not None:
+        filters.append(Pond.owner_id == owner_id)
+    if pond_ids is not None:
+        filters.append(Pond.id.in_(pond_ids))
+
+    # Per-pond window totals over the active stocks, plus the first stock of
+    # each species (trimmed, case-insensitive) so only one row per species
+    # comes back
+    active = db.query(
+        StockingLog.pond_id.label("pond_id"),
+        StockingLog.fry_type.label("fry_type"),
+        StockingLog.stocking_date.label("stocking_date"),
+        StockingLog.id.label("id"),
+        func.sum(StockingLog.fry_quantity - losses).over(
+            partition_by=StockingLog.pond_id
+        ).label("live_fish_count"),
+        func.count().over(partition_by=StockingLog.pond_id).label("active_batch_count"),
+        func.max(StockingLog.stocking_date).over(
+            partition_by=StockingLog.pond_id
+        ).label("last_stocked_at"),
+        func.row_number().over(
+            partition_by=(StockingLog.pond_id, func.lower(func.trim(StockingLog.fry_type))),
+            order_by=(StockingLog.stocking_date, StockingLog.id)
+        ).label("species_rank")
+    ).join(Pond, Pond.id == StockingLog.pond_id).filter(*filters).subquery()
+
+    rows = db.query(active).filter(active.c.species_rank == 1).order_by(
+        active.c.pond_id, active.c.stocking_date, active.c.id
+    ).all()
+
+    statuses: Dict[int, Dict] = {}
+    for row in rows:
+        status = statuses.setdefault(row.pond_id, {
+            "live_fish_count": int(row.live_fish_count or 0),
+            "species": [],
+            "last_stocked_at": row.last_stocked_at,
+            "active_batch_count": int(row.active_batch_count or 0)
+        })
+        if row.fry_type and row.fry_type.strip():
+            status["species"].append(row.fry_type.strip())
+
+    return statuses
+
+
+def _upsert_status(db: Session, pond_id: int, status: Dict) -> None:
+    stmt = insert(PondStatus).values(pond_id=pond_id, **status)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[PondStatus.pond_id],
+        set_={**status, "updated_at": func.now()}
+    ))
+
+
+def _locked_status(db: Session, pond_id: int) -> PondStatus:
+    """Fetch (creating if missing) the status row with a row lock held."""
+    db.execute(insert(PondStatus).values(pond_id=pond_id, **EMPTY_STATUS).on_conflict_do_nothing())
+    return db.query(PondStatus).filter(PondStatus.pond_id == pond_id).with_for_update().one()
+
+
+def refresh_pond_status(db: Session, pond_ids: List[int]) -> None:
+    """Recompute and store the status of the given ponds (no commit)."""
+    statuses = compute_pond_status(db, pond_ids=pond_ids)
+    for pond_id in pond_ids:
+        _upsert_status(db, pond_id, statuses.get(pond_id, EMPTY_STATUS))
+
+
+# --- WRITE HOOKS (call before db.commit() of the write) ---
+def on_pond_created(db: Session, pond: Pond) -> None:
+    db.add(PondStatus(pond_id=pond.id, live_fish_count=0, species=[], active_batch_count=0))
+
+
+def on_stocking_added(db: Session, stock: StockingLog) -> None:
+    status = _locked_status(db, stock.pond_id)
+
+    # Backdated stock: it may now be the first of its species, which moves
+    # it in the species order. Rare, so recompute the pond instead.
+    if status.last_stocked_at is not None and stock.stocking_date < status.last_stocked_at:
+        db.flush()
+        refresh_pond_status(db, [stock.pond_id])
+        return
+
+    status.live_fish_count += stock.fry_quantity
+    status.active_batch_count += 1
+
+    species = list(status.species or [])
+    name = (stock.fry_type or "").strip()
+    if name and name.lower() not in [s.lower() for s in species]:
+        species.append(name)
+        status.species = species
+
+    if status.last_stocked_at is None or stock.stocking_date > status.last_stocked_at:
+        status.last_stocked_at = stock.stocking_date
+
+
+def on_batch_harvested(db: Session, stock: StockingLog) -> None:
+    # Removing a batch can change the species list and the last stocking
+    # date, so recompute this one pond from its remaining active batches
+    _locked_status(db, stock.pond_id)
+    refresh_pond_status(db, [stock.pond_id])
+
+
+def on_loss_reported(db: Session, stock: StockingLog, quantity_lost: int) -> None:
+    # Losses on an already harvested batch do not change the live count
+    harvested = db.query(exists().where(HarvestLog.stocking_id == stock.id)).scalar()
+    if harvested:
+        return
+    status = _locked_status(db, stock.pond_id)
+    status.live_fish_count -= quantity_lost
+
+
+def on_logs_ingested(db: Session, pond_ids: List[int]) -> None:
+    """
+    Bulk offline sync wrote logs for these ponds (already flushed): lock
+    their status rows in a fixed order, then recompute them in one query.
+    """
+    pond_ids = sorted(set(pond_ids))
+    if not pond_ids:
+        return
+    db.execute(insert(PondStatus).values([
+        {"pond_id": pond_id, **EMPTY_STATUS} for pond_id in pond_ids
+    ]).on_conflict_do_nothing())
+    db.execute(
+        select(PondStatus.pond_id).where(PondStatus.pond_id.in_(pond_ids))
+        .order_by(PondStatus.pond_id).with_for_update()
+    )
+    refresh_pond_status(db, pond_ids)
+
+
+# --- READ PATH ---
+def load_pond_status(db: Session, ponds: List[Pond]) -> Dict[int, Dict]:
+    """
+    Status for the given ponds from pond_status, one query. Ponds that have
+    no row yet (created before the table existed) are computed on the fly.
+    """
+    if not ponds:
+        return {}
+    pond_ids = [p.id for p in ponds]
+    rows = db.execute(select(
+        PondStatus.pond_id, PondStatus.live_fish_count, PondStatus.species,
+        PondStatus.last_stocked_at, PondStatus.active_batch_count
+    ).where(PondStatus.pond_id.in_(pond_ids))).all()
+
+    statuses = {
+        row.pond_id: {
+            "live_fish_count": row.live_fish_count,
+            "species": row.species or [],
+            "last_stocked_at": row.last_stocked_at,
+            "active_batch_count": row.active_batch_count
+        }
+        for row in rows
+    }
+
+    missing = [pid for pid in pond_ids if pid not in statuses]
+    if missing:
+        computed = compute_pond_status(db, pond_ids=missing)
+        for pid in missing:
+            statuses[pid] = computed.get(pid, EMPTY_STATUS)
+
+    return statuses
+
+
+def status_fields(status: Dict) -> Dict:
+    """A status as the PondResponse fields it fills."""
+    return {
+        "last_stocked_at": status["last_stocked_at"],
+        "current_fish_type": ", ".join(status["species"]) if status["species"] else None,
+        "total_fish": status["live_fish_count"]
+    }
+
+
+def apply_pond_status(ponds: List[Pond], statuses: Dict[int, Dict]) -> None:
+    """Copy status values onto Pond objects for PondResponse."""
+    for pond in ponds:
+        for name, value in status_fields(statuses.get(pond.id, EMPTY_STATUS)).items():
+            setattr(pond, name, value)
+
+
+# --- REPAIR ---
+def rebuild_pond_status(db: Session, owner_id: Optional[str] = None) -> int:
+    """
+    Recompute pond_status from the logs and fix any drifted rows.
+    Returns the number of rows that were missing or wrong. Commits.
+    """
+    pond_query = db.query(Pond.id)
+    if owner_id is not None:
+        pond_query = pond_query.filter(Pond.owner_id == owner_id)
+    pond_ids = [row.id for row in pond_query.all()]
+
+    expected = compute_pond_status(db, owner_id=owner_id)
+    current = {row.pond_id: row for row in db.query(PondStatus).filter(PondStatus.pond_id.in_(pond_ids)).all()} if pond_ids else {}
+
+    repaired = 0
+    for pond_id in pond_ids:
+        status = expected.get(pond_id, EMPTY_STATUS)
+        row = current.get(pond_id)
+        if row is not None and (
+            row.live_fish_count == status["live_fish_count"]
+            and (row.species or []) == status["species"]
+            and row.last_stocked_at == status["last_stocked_at"]
+            and row.active_batch_count == status["active_batch_count"]
+        ):
+            continue
+        _upsert_status(db, pond_id, status)
+        repaired += 1
+
+    db.commit()
+    return repaired
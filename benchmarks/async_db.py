@@ -0,0 +1,174 @@
+"""
+Sync vs async (ASYNC_DB=1) read endpoints under concurrency.
+
+Seeds one user with --ponds ponds (stockings, a harvest and a loss each),
+then, for each mode in a fresh process (the mode is read at import),
+fires --concurrency requests at a time at the hot read endpoints through
+the ASGI app in one event loop, like a single uvicorn worker:
+
+- sync:  def routes, each request holds a threadpool thread (40 by
+         default) for its database wait,
+- async: async def routes over asyncpg, requests wait on the event loop.
+
+Both modes use the same pool size (--pool-size, no overflow), so the
+difference is the request path, not the number of connections. Prints
+throughput, p50/p95 latency and the peak number of threads.
+
+Usage (from the repo root, needs DATABASE_URL pointing at Postgres):
+    python benchmarks/async_db.py [--requests 2000] [--concurrency 200] [--pool-size 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+OWNER = "bench-async-db"
+HEADERS = {"x-user-id": OWNER}
+
+
+def seed(n_ponds):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+    import main
+
+    with main.engine.begin() as conn:
+        conn.execute(text("DELETE FROM ponds WHERE owner_id = :o"), {"o": OWNER})
+        conn.execute(text("DELETE FROM chat_history WHERE owner_id = :o"), {"o": OWNER})
+    with TestClient(main.app) as client:
+        pond_ids = []
+        for i in range(n_ponds):
+            pond = client.post("/api/ponds/", headers=HEADERS, json={
+                "name": f"Bench {i}", "coordinates": [[18.2, 121.5], [18.21, 121.5], [18.21, 121.51]]
+            }).json()
+            pond_ids.append(pond["id"])
+            for month in (1, 2, 3):
+                stock = client.post("/api/stocking/", headers=HEADERS, json={
+                    "pond_id": pond["id"], "stocking_date": f"2025-0{month}-01",
+                    "fry_type": "Tilapia", "fry_quantity": 1000
+                }).json()
+            client.post("/api/mortality/", json={
+                "stocking_id": stock["id"], "loss_date": "2025-04-01", "quantity_lost": 10,
+                "weight_lost_kg": 1, "cause": "Heat", "action_taken": "shade"
+            })
+            client.post("/api/harvest/", json={
+                "stocking_id": stock["id"], "harvest_date": "2025-06-01",
+                "total_weight_kg": 300, "market_price_per_kg": 140
+            })
+        for i in range(200):
+            client.post("/api/chat/", headers=HEADERS, data={"message": f"bench message {i}"})
+    return pond_ids
+
+
+async def load(app, paths, requests, concurrency):
+    import httpx
+
+    latencies, failures = [], 0
+    peak_threads = threading.active_count()
+    queue = asyncio.Queue()
+
+    def fill(n):
+        for i in range(n):
+            queue.put_nowait(paths[i % len(paths)])
+
+    async def worker(client):
+        nonlocal peak_threads, failures
+        while not queue.empty():
+            path = queue.get_nowait()
+            start = time.perf_counter()
+            r = await client.get(path, headers=HEADERS)
+            if r.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                failures += 1 # Pool timeout (500)
+            peak_threads = max(peak_threads, threading.active_count())
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False) # Errors count as 500s
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        fill(concurrency * 2) # Warm up: open the pool's connections
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        latencies.clear()
+        failures = 0
+        fill(requests)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else float("nan"),
+        "p95_ms": statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) > 1 else float("nan"),
+        "failures": failures,
+        "peak_threads": peak_threads
+    }
+
+
+def child(args):
+    import main
+
+    pond_ids = json.loads(args.pond_ids)
+    paths = [
+        "/api/ponds/",
+        "/api/stocking/active",
+        "/api/chat/history",
+        *(f"/api/history/{pid}" for pid in pond_ids[:5])
+    ]
+    main.analytics.summary_cache.maxsize = 0 # Measure the query, not the cache
+    paths.append("/api/analytics/summary")
+
+    async def run():
+        async with main.lifespan(main.app):
+            return await load(main.app, paths, args.requests, int(args.concurrency))
+
+    print(json.dumps(asyncio.run(run())))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", default="40,200", help="Requests in flight, comma separated runs")
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--pool-timeout", type=float, default=5)
+    parser.add_argument("--ponds", type=int, default=10)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--pond-ids", default="[]", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args)
+
+    pond_ids = seed(args.ponds)
+    print(
+        f"{args.requests} GETs, pool {args.pool_size}+0 (timeout {args.pool_timeout:g}s), "
+        f"{args.ponds} ponds\n"
+    )
+    for concurrency in args.concurrency.split(","):
+        for mode in ("sync", "async"):
+            env = dict(
+                os.environ, ASYNC_DB="1" if mode == "async" else "0",
+                DB_POOL_SIZE=str(args.pool_size), DB_MAX_OVERFLOW="0", DB_POOL_TIMEOUT=str(args.pool_timeout)
+            )
+            out = subprocess.run(
+                [sys.executable, "-W", "ignore", __file__, "--child", mode, "--pond-ids", json.dumps(pond_ids),
+                 "--requests", str(args.requests), "--concurrency", concurrency],
+                env=env, cwd=ROOT, capture_output=True, text=True
+            )
+            if out.returncode != 0:
+                print(out.stderr[-2000:])
+                raise SystemExit(f"❌ {mode} run failed")
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(
+                f"{mode:<6} {concurrency:>4} in flight {r['rps']:8.1f} req/s  p50 {r['p50_ms']:7.1f} ms  "
+                f"p95 {r['p95_ms']:7.1f} ms  failed {r['failures']:4}  peak threads {r['peak_threads']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
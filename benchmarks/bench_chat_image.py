@@ -0,0 +1,88 @@
+"""
+Chat photo upload: the old path vs app/services/image_pipeline.py.
+
+Before, the route opened the upload with PIL and handed the image to the
+Gemini SDK, which encodes PIL images as lossless WebP at full resolution.
+Now the upload is decoded at reduced scale, rotated per EXIF, downscaled
+and re-encoded as JPEG. Both are timed on a synthetic 12-megapixel camera
+photo (EXIF orientation 6, like a phone held upright).
+
+Usage (from the repo root):
+    python benchmarks/bench_chat_image.py [--width 4000 --height 3000] [--repeat 3]
+"""
+import argparse
+import io
+import math
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.image_pipeline import prepare_chat_image, CHAT_IMAGE_MAX_DIMENSION
+
+
+def camera_photo(width, height, seed=3):
+    """Smooth gradients plus sensor-like noise, saved as a quality 92 JPEG."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([
+        120 + 80 * np.sin(x / 400), 140 + 60 * np.cos(y / 300), 90 + 50 * np.sin((x + y) / 500)
+    ], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    exif = Image.Exif()
+    exif[0x0112] = 6 # Orientation: rotate 90 CW
+    out = io.BytesIO()
+    Image.fromarray(pixels).save(out, "JPEG", quality=92, exif=exif)
+    return out.getvalue()
+
+
+def old_path(raw):
+    image = Image.open(io.BytesIO(raw))
+    out = io.BytesIO()
+    image.save(out, format="webp", lossless=True) # What the SDK does with a PIL image
+    return out.getvalue(), image.size
+
+
+def best_of(fn, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    raw = camera_photo(args.width, args.height)
+    print(f"Upload: {args.width}x{args.height} JPEG, {len(raw) / 1e6:.1f} MB\n")
+
+    old_time, (old_bytes, old_size) = best_of(lambda: old_path(raw), args.repeat)
+    new_time, prepared = best_of(lambda: prepare_chat_image(raw), args.repeat)
+
+    # Decoded pixel buffers held per request (RGB, 3 bytes per pixel)
+    old_pixels = old_size[0] * old_size[1] * 3
+    draft = Image.open(io.BytesIO(raw))
+    scale = CHAT_IMAGE_MAX_DIMENSION / max(draft.size)
+    draft.draft("RGB", (math.ceil(draft.width * scale), math.ceil(draft.height * scale)))
+    new_pixels = draft.size[0] * draft.size[1] * 3
+
+    print(f"{'':<10} {'CPU time':>10} {'sent to Gemini':>16} {'decoded buffer':>16}  size")
+    print(f"{'before':<10} {old_time * 1000:8.0f} ms {len(old_bytes) / 1e6:13.2f} MB {old_pixels / 1e6:13.1f} MB  "
+          f"{old_size[0]}x{old_size[1]} (EXIF rotation ignored)")
+    print(f"{'after':<10} {new_time * 1000:8.0f} ms {len(prepared.data) / 1e6:13.2f} MB {new_pixels / 1e6:13.1f} MB  "
+          f"{prepared.width}x{prepared.height}")
+    print(f"\n{old_time / new_time:.0f}x less CPU, {len(old_bytes) / len(prepared.data):.0f}x less upload to the model")
+
+
+if __name__ == "__main__":
+    main()
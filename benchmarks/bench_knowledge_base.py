@@ -0,0 +1,71 @@
+"""
+Query latency of the AquaBot knowledge base (app/services/knowledge_base.py).
+
+Measures the shipped index and a scaled-up copy (every entry repeated with
+varied phrasings) to show how search time grows with thousands of
+entries. Also checks that the hand-rolled query scoring matches
+scikit-learn's TfidfVectorizer.transform + dot product.
+
+Usage (from the repo root):
+    python benchmarks/bench_knowledge_base.py [--scale 30] [--queries 3000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.knowledge_base import KnowledgeBase, KNOWLEDGE_PATH
+
+QUERIES = [
+    "why is the water so green", "Bakit berde ang tubig?", "Apay a matmatay dagiti lames?",
+    "my fish are gasping in the morning", "how many tilapia per sqm", "mano ti ipakan",
+    "white spots on my tilapia", "typhoon coming tomorrow", "hello",
+]
+
+
+def check_parity(kb):
+    reference = kb.vectorizer.transform(kb.documents)
+    for q in QUERIES:
+        expected = (reference @ kb.vectorizer.transform([q]).T).toarray().ravel()
+        if not np.allclose(expected, kb._score_documents(q)):
+            sys.exit(f"❌ Scores differ from sklearn for {q!r}")
+
+
+def bench(name, kb, n):
+    start = time.perf_counter()
+    for i in range(n):
+        kb.search(QUERIES[i % len(QUERIES)])
+    per_query = (time.perf_counter() - start) / n * 1e6
+    print(f"{name:<10} {len(kb.entries):6,} entries {len(kb.documents):7,} phrasings  {per_query:7.0f} us/query")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=30, help="Copies of every entry in the large index")
+    parser.add_argument("--queries", type=int, default=3000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    kb = KnowledgeBase.load(KNOWLEDGE_PATH)
+    print(f"Index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+    check_parity(kb)
+    bench("shipped", kb, args.queries)
+
+    large = KnowledgeBase([
+        {**entry, "id": f"{entry['id']}-{copy}", "questions": [f"{q} {copy}" for q in entry["questions"]]}
+        for copy in range(args.scale) for entry in kb.entries
+    ])
+    bench("scaled", large, args.queries)
+
+    print("\nTop matches:")
+    for q in QUERIES:
+        top = kb.search(q, k=1)
+        print(f"  {q:<40} -> {top[0].entry_id if top else '-':<24} {top[0].score if top else 0:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Rows/sec of the single-row prediction endpoint vs POST /api/predict/batch.
+
+Calls the endpoint functions in-process (validation + model + formatting),
+so the numbers exclude HTTP but include everything the route does.
+
+Usage (from the repo root, after python train_model.py):
+    python benchmarks/bench_predict_batch.py [--rows 5000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.predictions import predict_yield, predict_yield_batch, registry
+from app.schemas.prediction import PredictionInput, PredictionBatchInput
+
+
+def make_rows(n, seed=7):
+    rng = np.random.default_rng(seed)
+    area = rng.integers(200, 2000, n)
+    return [
+        {
+            "fry_quantity": int(a * rng.uniform(5, 15)),
+            "days_cultured": int(rng.integers(90, 150)),
+            "area_sqm": float(a)
+        }
+        for a in area
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    if registry.get() is None:
+        sys.exit("Model not loaded. Run python train_model.py first.")
+
+    rows = make_rows(args.rows)
+
+    # Single-row endpoint: one request per row (capped, it is slow)
+    single_n = min(len(rows), 500)
+    start = time.perf_counter()
+    for row in rows[:single_n]:
+        predict_yield(PredictionInput(**row))
+    single_elapsed = time.perf_counter() - start
+
+    # Batch endpoint: all rows in one request
+    start = time.perf_counter()
+    out = predict_yield_batch(PredictionBatchInput(rows=rows))
+    batch_elapsed = time.perf_counter() - start
+
+    single_rate = single_n / single_elapsed
+    batch_rate = len(rows) / batch_elapsed
+    print(f"single-row : {single_rate:12,.0f} rows/sec  ({single_n} requests, {single_elapsed:.2f}s)")
+    print(f"batch      : {batch_rate:12,.0f} rows/sec  ({len(rows)} rows, {batch_elapsed * 1000:.1f} ms, {out['rejected']} rejected)")
+    print(f"speedup    : {batch_rate / single_rate:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
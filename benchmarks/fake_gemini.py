@@ -0,0 +1,145 @@
+"""
+Local fake Gemini model plus a load test of the chat AI call path.
+
+FakeGeminiModel has the generate_content / generate_content_async
+(including stream=True) methods the chat routes use. It simulates latency and a rate limit (429 /
+ResourceExhausted once more than `rate_limit` calls are in flight), so
+GeminiClient's concurrency cap, timeout and backoff can be exercised
+without an API key.
+
+The load test fires concurrent chat calls in one event loop while a
+heartbeat task measures how late the loop wakes up. It runs three modes:
+the old synchronous call, the async client, and the async client against
+a rate-limited fake.
+
+Usage (from the repo root):
+    python benchmarks/fake_gemini.py [--requests 50] [--latency 0.2] [--rate-limit 4]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from google.api_core import exceptions as google_exceptions
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.gemini_client import GeminiClient, GeminiBusyError
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    def __init__(self, latency=0.2, jitter=0.05, rate_limit=None, seed=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit # Max calls in flight before answering 429
+        self.in_flight = 0
+        self.calls = 0
+        self.rejected = 0
+        self._random = random.Random(seed)
+
+    def _delay(self):
+        return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def _admit(self):
+        self.calls += 1
+        if self.rate_limit is not None and self.in_flight >= self.rate_limit:
+            self.rejected += 1
+            raise google_exceptions.ResourceExhausted("429 Resource has been exhausted (fake)")
+
+    def generate_content(self, parts):
+        self._admit()
+        time.sleep(self._delay())
+        return FakeResponse(f"fake answer to: {parts[-1]}")
+
+    async def generate_content_async(self, parts, stream=False):
+        self._admit()
+        self.in_flight += 1
+        try:
+            await asyncio.sleep(self._delay())
+            answer = f"fake answer to: {parts[-1]}"
+            if stream:
+                return self._stream(answer)
+            return FakeResponse(answer)
+        finally:
+            self.in_flight -= 1
+
+    async def _stream(self, answer, token_delay=0.01):
+        """Word-by-word chunks, like stream=True."""
+        for word in answer.split(" "):
+            await asyncio.sleep(token_delay)
+            yield FakeResponse(word + " ")
+
+
+async def heartbeat(lags, interval=0.01):
+    """Record how late the event loop wakes a 10 ms timer."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run(name, n, call):
+    lags = []
+    beat = asyncio.create_task(heartbeat(lags))
+    await asyncio.sleep(0.02)
+
+    outcomes = {"ok": 0, "busy": 0, "error": 0}
+
+    async def one(i):
+        try:
+            await call([f"User Question: question {i}"])
+            outcomes["ok"] += 1
+        except GeminiBusyError:
+            outcomes["busy"] += 1
+        except Exception:
+            outcomes["error"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.02) # Let a timer that was starved record its lag
+    beat.cancel()
+
+    worst = max(lags) * 1000 if lags else float("nan")
+    print(f"{name:<26} {elapsed:7.2f}s  max loop lag {worst:8.1f} ms  {outcomes}")
+
+
+async def main_async(args):
+    print(f"{args.requests} concurrent chat calls, fake latency {args.latency * 1000:.0f} ms\n")
+
+    # Before: the synchronous call made directly inside the async route
+    blocking = FakeGeminiModel(args.latency)
+
+    async def sync_call(parts):
+        return blocking.generate_content(parts).text
+
+    await run("sync generate_content", args.requests, sync_call)
+
+    client = GeminiClient(FakeGeminiModel(args.latency), max_concurrency=args.concurrency)
+    await run("GeminiClient", args.requests, client.generate)
+
+    limited = FakeGeminiModel(args.latency, rate_limit=args.rate_limit)
+    client = GeminiClient(limited, max_concurrency=args.concurrency, backoff_base=args.latency / 2)
+    await run(f"GeminiClient, 429 above {args.rate_limit}", args.requests, client.generate)
+    stats = client.stats()
+    print(f"{'':<26} fake 429s {limited.rejected}, retries {stats['retries']}, gave up {stats['rate_limited']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per fake Gemini call")
+    parser.add_argument("--concurrency", type=int, default=8, help="GeminiClient max_concurrency")
+    parser.add_argument("--rate-limit", type=int, default=4, help="Fake answers 429 above this many calls in flight")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Fast JSON path + gzip on the large list endpoints.
+
+Seeds one owner with --ponds ponds (one active stocking each) and one pond
+with --cycles closed cycles, then times each list endpoint two ways
+through the ASGI app:
+
+- model: the previous implementation, mounted under /bench-model (ORM
+  objects validated through the response_model, or plain dicts through
+  jsonable_encoder),
+- fast:  the real route (plain rows shaped into dicts, serialized with
+  orjson by FastJSONResponse).
+
+Both return the same JSON. Prints milliseconds per response (median) and
+the body size without and with gzip (GZipMiddleware).
+
+Usage (from the repo root, needs DATABASE_URL pointing at Postgres):
+    python benchmarks/json_fast_path.py [--ponds 1000] [--cycles 200] [--requests 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+OWNER = "bench-json"
+HEADERS = {"x-user-id": OWNER}
+
+
+def seed(engine, n_ponds, n_cycles):
+    from sqlalchemy import delete, insert
+    from sqlalchemy.orm import Session
+    from app.models.pond import Pond
+    from app.models.stocking import StockingLog
+    from app.models.harvest import HarvestLog
+    from app.services.pond_status import rebuild_pond_status
+
+    with Session(engine) as db:
+        db.execute(delete(Pond).where(Pond.owner_id == OWNER))
+        pond_ids = db.execute(insert(Pond).returning(Pond.id, sort_by_parameter_order=True), [
+            {
+                "owner_id": OWNER, "name": f"Bench pond {i}", "location_desc": "Cagayan",
+                "coordinates": [[18.2 + i / 1e4, 121.5], [18.21, 121.5], [18.21, 121.51], [18.2, 121.51]],
+                "area_sqm": 1234.56
+            }
+            for i in range(n_ponds)
+        ]).scalars().all()
+        db.execute(insert(StockingLog), [
+            {"pond_id": pid, "stocking_date": date(2025, 1, 1), "fry_type": "Tilapia", "fry_quantity": 1000}
+            for pid in pond_ids
+        ])
+        history_pond = pond_ids[0]
+        closed = db.execute(insert(StockingLog).returning(StockingLog.id, sort_by_parameter_order=True), [
+            {"pond_id": history_pond, "stocking_date": date(2020, 1, 1) + timedelta(days=i), "fry_type": "Bangus", "fry_quantity": 500}
+            for i in range(n_cycles)
+        ]).scalars().all()
+        db.execute(insert(HarvestLog), [
+            {
+                "stocking_id": sid, "harvest_date": date(2020, 5, 1) + timedelta(days=i), "total_weight_kg": 150.5,
+                "market_price_per_kg": 140.0, "revenue": 150.5 * 140.0, "days_cultured": 121, "fish_size": "Standard"
+            }
+            for i, sid in enumerate(closed)
+        ])
+        db.commit()
+        rebuild_pond_status(db, OWNER)
+    return history_pond
+
+
+def mount_model_routes(app):
+    """The endpoints as they were before FastJSONResponse (same ETag lookup), for comparison."""
+    from fastapi import APIRouter, Depends, Header, Response
+    from sqlalchemy.orm import Session, defer
+    from app.db.connection import get_db
+    from app.dependencies import check_not_modified
+    from app.services.change_log import owner_etag
+    from app.models.pond import Pond
+    from app.schemas.pond import PondResponse
+    from app.services.pond_status import apply_pond_status, load_pond_status
+    from app.api.history import HistoryItem, closed_cycles_query, history_items
+    from app.api.stocking import active_stockings_query, active_stocking_item
+
+    router = APIRouter()
+
+    @router.get("/ponds", response_model=List[PondResponse])
+    def ponds(response: Response, db: Session = Depends(get_db), x_user_id: str = Header(...)):
+        check_not_modified(response, None, owner_etag(db, x_user_id, "ponds"))
+        rows = db.query(Pond).options(defer(Pond.image_base64)).filter(Pond.owner_id == x_user_id).all()
+        apply_pond_status(rows, load_pond_status(db, rows))
+        return rows
+
+    @router.get("/active")
+    def active(db: Session = Depends(get_db), x_user_id: str = Header(...)):
+        return [active_stocking_item(s, name) for s, name in db.execute(active_stockings_query(x_user_id)).all()]
+
+    @router.get("/history/{pond_id}", response_model=List[HistoryItem])
+    def history(pond_id: int, response: Response, db: Session = Depends(get_db), x_user_id: str = Header(...)):
+        check_not_modified(response, None, owner_etag(db, x_user_id, "history"))
+        return history_items(db.execute(closed_cycles_query(pond_id, x_user_id)).all())
+
+    app.include_router(router, prefix="/bench-model")
+
+
+def measure(client, path, requests):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        r = client.get(path, headers={**HEADERS, "accept-encoding": "identity"})
+        timings.append(time.perf_counter() - start)
+        assert r.status_code == 200, r.text
+    plain = r.content
+    gz = client.get(path, headers={**HEADERS, "accept-encoding": "gzip"})
+    return statistics.median(timings) * 1000, len(plain), gz.num_bytes_downloaded, plain
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ponds", type=int, default=1000)
+    parser.add_argument("--cycles", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+    import main as app_main
+
+    history_pond = seed(app_main.engine, args.ponds, args.cycles)
+    mount_model_routes(app_main.app)
+    endpoints = [
+        ("ponds", "/bench-model/ponds", "/api/ponds/"),
+        ("stocking/active", "/bench-model/active", "/api/stocking/active"),
+        ("history", f"/bench-model/history/{history_pond}", f"/api/history/{history_pond}"),
+    ]
+
+    print(f"{args.ponds} ponds, {args.cycles} closed cycles, median of {args.requests} GETs\n")
+    print(f"{'endpoint':<16} {'model ms':>9} {'fast ms':>8} {'speedup':>8} {'bytes':>9} {'gzip':>8}")
+    with TestClient(app_main.app) as client:
+        for name, model_path, fast_path in endpoints:
+            measure(client, fast_path, 3) # Warm up
+            model_ms, _, _, model_body = measure(client, model_path, args.requests)
+            fast_ms, plain, gz, fast_body = measure(client, fast_path, args.requests)
+            if model_body != fast_body:
+                raise SystemExit(f"❌ {name}: fast path output differs")
+            print(f"{name:<16} {model_ms:9.1f} {fast_ms:8.1f} {model_ms / fast_ms:7.1f}x {plain:9} {gz:8}")
+
+
+if __name__ == "__main__":
+    main()
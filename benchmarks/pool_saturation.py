@@ -0,0 +1,113 @@
+"""
+Connection pool saturation load test.
+
+Worker threads (think: threadpool running sync routes) each check out a
+connection, hold it for a query of --hold seconds (SELECT pg_sleep) and
+return it. Three pools are compared:
+
+- sized for the load (pool_size + max_overflow >= workers),
+- saturated (requests queue up for a connection: checkout wait grows),
+- saturated with a short pool_timeout (requests fail fast with
+  TimeoutError instead of piling up).
+
+Each line shows throughput, request latency, checkout wait and the
+InstrumentedQueuePool counters served by GET /db/pool.
+
+Usage (from the repo root, needs DATABASE_URL pointing at Postgres):
+    python benchmarks/pool_saturation.py [--workers 40] [--requests 400] [--hold 0.05]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import exc, text
+
+from app.db.connection import db_url, make_engine
+from app.db.pool import pool_stats
+
+
+def run(name, engine, workers, requests, hold):
+    latencies, errors = [], {"timeout": 0, "other": 0}
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def worker():
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            start = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT pg_sleep(:s)"), {"s": hold})
+            except exc.TimeoutError:
+                with lock:
+                    errors["timeout"] += 1
+                continue
+            except Exception:
+                with lock:
+                    errors["other"] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    # Open pool_size connections first so the runs measure waiting, not connecting
+    warm = [engine.connect() for _ in range(engine.pool.size())]
+    for conn in warm:
+        conn.close()
+    engine.pool.reset_checkout_stats()
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    stats = pool_stats(engine)
+    p95 = statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) > 1 else float("nan")
+    print(
+        f"{name:<34} {len(latencies) / elapsed:7.1f} req/s  p95 {p95:7.1f} ms  "
+        f"wait avg {stats['avg_wait_ms']:7.1f} ms max {stats['max_wait_ms']:7.1f} ms  "
+        f"slow {stats['slow_checkouts']:4}/{stats['checkouts']:<4} timeouts {errors['timeout']:3}  "
+        f"other errors {errors['other']}"
+    )
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=40, help="Concurrent threads")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--hold", type=float, default=0.05, help="Seconds each request holds its connection")
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--max-overflow", type=int, default=5)
+    parser.add_argument("--short-timeout", type=float, default=0.1, help="pool_timeout of the fail-fast run")
+    args = parser.parse_args()
+
+    print(f"{args.workers} threads, {args.requests} requests holding a connection {args.hold * 1000:.0f} ms\n")
+    run(
+        f"pool {args.workers}+0 (fits)",
+        make_engine(db_url, pool_size=args.workers, max_overflow=0),
+        args.workers, args.requests, args.hold
+    )
+    run(
+        f"pool {args.pool_size}+{args.max_overflow} (saturated)",
+        make_engine(db_url, pool_size=args.pool_size, max_overflow=args.max_overflow),
+        args.workers, args.requests, args.hold
+    )
+    run(
+        f"pool {args.pool_size}+{args.max_overflow}, timeout {args.short_timeout:g}s",
+        make_engine(db_url, pool_size=args.pool_size, max_overflow=args.max_overflow, pool_timeout=args.short_timeout),
+        args.workers, args.requests, args.hold
+    )
+
+
+if __name__ == "__main__":
+    main()
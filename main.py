@@ -1,17 +1,33 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.db.connection import engine, Base, get_db # <--- Base is imported here
+from app.db.migrations import apply_schema_patches, run_once
+from app.db.async_connection import ASYNC_DB, async_engine
+from app.db.pool import pool_stats
+from app.db.tenancy import TENANCY_MODE, tenant_engine, tenancy_stats
+from app.services.analytics_rollup import rebuild_rollups
+from app.services.chat_writer import chat_writer
 
 # 1. IMPORT MODELS
 # This runs the __init__.py inside models/, which registers the tables to Base
 from app import models 
 
 # 2. IMPORT API ROUTERS
-from app.api import ponds, stocking, harvest, predictions, analytics, chat, mortality, history
+from app.api import ponds, stocking, harvest, predictions, analytics, chat, mortality, history, images, sync
 
-app = FastAPI(title="AquaPin API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    chat_writer.stop() # Flush chat messages still in the write-behind queue
+    if async_engine is not None:
+        await async_engine.dispose()
+
+app = FastAPI(title="AquaPin API", version="1.0.0", lifespan=lifespan)
 
 # 3. ENABLE CORS
 app.add_middleware(
@@ -22,6 +38,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON bodies over GZIP_MIN_SIZE bytes for clients that accept
+# gzip. Starlette leaves text/event-stream (chat SSE) and images alone,
+# so streamed tokens are not buffered.
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.getenv("GZIP_MIN_SIZE", "1000")),
+    compresslevel=int(os.getenv("GZIP_LEVEL", "6"))
+)
+
 # 4. DATABASE RESET (CRITICAL FOR PRIVACY UPDATE)
 # ERROR FIX: Use 'Base.metadata', NOT 'models.Base.metadata'
 
@@ -31,6 +56,10 @@ app.add_middleware(
 # 5. CREATE TABLES
 # ERROR FIX: Use 'Base.metadata', NOT 'models.Base.metadata'
 Base.metadata.create_all(bind=engine)
+apply_schema_patches(engine) # New columns/indexes on tables that already exist
+# Harvests and losses logged before the monthly rollups existed (once per database)
+if run_once(engine, "backfill_monthly_rollups", rebuild_rollups):
+    print("✅ Monthly analytics rollups backfilled from the logs")
 
 @app.get("/")
 def read_root():
@@ -44,7 +73,28 @@ def test_db_connection(db: Session = Depends(get_db)):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@app.get("/db/pool")
+def get_db_pool_stats():
+    """Connection pool of this worker: in use, idle, overflow and checkout wait times."""
+    stats = pool_stats(engine)
+    if async_engine is not None:
+        stats["async_pool"] = pool_stats(async_engine.sync_engine)
+    if TENANCY_MODE == "schema":
+        stats["tenant_pool"] = {**pool_stats(tenant_engine()), **tenancy_stats()}
+    return stats
+
 # 6. REGISTER ROUTERS
+# Async versions of the hot reads go first so they take over the same paths
+if ASYNC_DB and TENANCY_MODE == "owner":
+    app.include_router(ponds.async_router, prefix="/api/ponds", tags=["Ponds"])
+    app.include_router(stocking.async_router, prefix="/api/stocking", tags=["Stocking"])
+    app.include_router(analytics.async_router, prefix="/api/analytics", tags=["Analytics"])
+    app.include_router(chat.async_router, prefix="/api/chat", tags=["AI Chat"])
+    app.include_router(history.async_router, prefix="/api/history", tags=["History"])
+    print("✅ Async database reads enabled (asyncpg)")
+elif ASYNC_DB:
+    print("⚠️ ASYNC_DB is ignored with TENANCY_MODE=schema (tenant sessions are sync)")
+
 app.include_router(ponds.router, prefix="/api/ponds", tags=["Ponds"])
 app.include_router(stocking.router, prefix="/api/stocking", tags=["Stocking"])
 app.include_router(harvest.router, prefix="/api/harvest", tags=["Harvest"])
@@ -52,4 +102,6 @@ app.include_router(predictions.router, prefix="/api/predict", tags=["AI Predicti
 app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
 app.include_router(chat.router, prefix="/api/chat", tags=["AI Chat"])
 app.include_router(mortality.router, prefix="/api/mortality", tags=["Mortality"])
-app.include_router(history.router, prefix="/api/history", tags=["History"])
\ No newline at end of file
+app.include_router(history.router, prefix="/api/history", tags=["History"])
+app.include_router(images.router, prefix="/api/images", tags=["Images"])
+app.include_router(sync.router, prefix="/api/sync", tags=["Sync"])
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+AquaPin maintenance commands.
+
+Usage:
+    python manage.py rebuild-pond-status [--owner USER_ID]
+    python manage.py backfill-rollups [--owner USER_ID]
+    python manage.py migrate-pond-images [--batch-size N]
+    python manage.py provision-tenant USER_ID [USER_ID ...]
+    python manage.py export-forest [--model PATH] [--out DIR] [--verify-csv CSV]
+"""
+import argparse
+
+
+def rebuild_pond_status_command(args):
+    from app import models  # registers the tables on Base
+    from app.db.connection import engine, Base, SessionLocal
+    from app.services.pond_status import rebuild_pond_status
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        repaired = rebuild_pond_status(db, owner_id=args.owner)
+        print(f"✅ pond_status rebuilt. {repaired} row(s) repaired.")
+    finally:
+        db.close()
+
+
+def backfill_rollups_command(args):
+    from app import models
+    from app.db.connection import engine, Base, SessionLocal
+    from app.services.analytics_rollup import rebuild_rollups
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        counts = rebuild_rollups(db, owner_id=args.owner)
+        for table, rows in counts.items():
+            print(f"✅ {table}: {rows} row(s)")
+    finally:
+        db.close()
+
+
+def migrate_pond_images_command(args):
+    from app import models
+    from app.db.connection import engine, Base, SessionLocal
+    from app.db.migrations import apply_schema_patches
+    from app.models.pond import Pond
+    from app.services.blob_store import decode_base64_image, store_image, InvalidImageError
+
+    Base.metadata.create_all(bind=engine)
+    apply_schema_patches(engine)
+
+    db = SessionLocal()
+    moved, failed = 0, 0
+    last_id = 0
+    try:
+        while True:
+            # Keyset batches so only `batch_size` base64 blobs are in memory
+            ponds = db.query(Pond).filter(
+                Pond.id > last_id, Pond.image_base64.isnot(None)
+            ).order_by(Pond.id).limit(args.batch_size).all()
+            if not ponds:
+                break
+
+            for pond in ponds:
+                last_id = pond.id
+                try:
+                    pond.image_hash = store_image(decode_base64_image(pond.image_base64))
+                    pond.image_base64 = None
+                    moved += 1
+                except InvalidImageError as e:
+                    # Leave the row untouched so nothing is lost
+                    print(f"⚠️ Pond {pond.id}: {e}")
+                    failed += 1
+
+            db.commit()
+            db.expunge_all()
+            print(f"   ... {moved} image(s) moved")
+    finally:
+        db.close()
+
+    print(f"✅ Moved {moved} pond image(s) to the blob store, {failed} skipped.")
+
+
+def provision_tenant_command(args):
+    from app import models
+    from app.db.tenancy import provision_tenant, InvalidTenantError
+
+    for tenant_id in args.tenant_ids:
+        try:
+            schema = provision_tenant(tenant_id)
+        except InvalidTenantError as e:
+            raise SystemExit(f"❌ {tenant_id!r}: {e}")
+        print(f"✅ Schema {schema} ready")
+
+
+def export_forest_command(args):
+    import joblib
+    import pandas as pd
+    from app.ml.forest import export_forest, verify_parity, CompiledForest
+
+    model = joblib.load(args.model)
+    meta = export_forest(model, args.out)
+    print(f"✅ Exported {meta['n_trees']} trees ({meta['n_nodes']} nodes) to {args.out}")
+
+    if args.verify_csv:
+        df = pd.read_csv(args.verify_csv)
+        X = df[['fry_quantity', 'days_cultured', 'area_sqm']].to_numpy()
+        report = verify_parity(model, CompiledForest.load(args.out), X)
+        print(f"   Rows checked : {report['rows']}")
+        print(f"   Exact match  : {report['exact_match']} (max abs diff {report['max_abs_diff']:.3g})")
+        print(f"   p50 latency  : sklearn {report['p50_us_sklearn']:.0f} us, compiled {report['p50_us_compiled']:.0f} us")
+        print(f"   Arrays size  : {report['compiled_mb']:.1f} MB")
+        if not report["exact_match"]:
+            raise SystemExit("❌ Compiled forest does not match sklearn")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AquaPin maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-pond-status", help="Recompute pond_status from the logs and repair drift")
+    rebuild.add_argument("--owner", default=None, help="Only rebuild ponds of this user ID")
+    rebuild.set_defaults(func=rebuild_pond_status_command)
+
+    rollups = commands.add_parser("backfill-rollups", help="Recompute the monthly analytics rollups from the logs")
+    rollups.add_argument("--owner", default=None, help="Only rebuild rollups of this user ID")
+    rollups.set_defaults(func=backfill_rollups_command)
+
+    images = commands.add_parser("migrate-pond-images", help="Move Pond.image_base64 data into the blob store")
+    images.add_argument("--batch-size", type=int, default=100)
+    images.set_defaults(func=migrate_pond_images_command)
+
+    tenant = commands.add_parser("provision-tenant", help="Create a user's schema and tables (TENANCY_MODE=schema)")
+    tenant.add_argument("tenant_ids", nargs="+", metavar="USER_ID")
+    tenant.set_defaults(func=provision_tenant_command)
+
+    forest = commands.add_parser("export-forest", help="Flatten the sklearn yield model into NumPy arrays")
+    forest.add_argument("--model", default="ml_engine/models/yield_predictor.pkl")
+    forest.add_argument("--out", default="ml_engine/models/yield_predictor.forest")
+    forest.add_argument("--verify-csv", default="ml_engine/data/training_data.csv",
+                        help="Check parity with sklearn on this CSV ('' to skip)")
+    forest.set_defaults(func=export_forest_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Shared fixtures: an in-memory SQLite database and a FastAPI app with only
+the router under test (main.py needs PostgreSQL for its schema patches).
+"""
+import os
+import sys
+
+# app.db.connection refuses to import without a URL; tests never use that engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models  # noqa: F401 (registers the tables)
+from app.db.connection import Base, get_db
+from app.dependencies import get_scoped_db
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def statements(engine):
+    """Every SQL statement sent to the test database, in order."""
+    seen = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: seen.append(statement))
+    return seen
+
+
+@pytest.fixture
+def make_client(engine):
+    def make_client(*routers):
+        app = FastAPI()
+        for prefix, router in routers:
+            app.include_router(router, prefix=prefix)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        def get_test_db():
+            session = Session()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app.dependency_overrides[get_scoped_db] = get_test_db
+        app.dependency_overrides[get_db] = get_test_db
+        return TestClient(app)
+    return make_client
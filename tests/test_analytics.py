@@ -0,0 +1,60 @@
+import pytest
+
+from app.api import analytics
+from app.models.change_log import ChangeLog
+
+OWNER = "owner-1"
+HEADERS = {"x-user-id": OWNER}
+
+
+@pytest.fixture
+def summary_client(make_client, monkeypatch):
+    # SUMMARY_SQL is PostgreSQL (json_agg): count the computations instead
+    computed = []
+
+    def compute_summary(db, owner_id):
+        computed.append(owner_id)
+        return {"total_kg": float(len(computed))}
+
+    monkeypatch.setattr(analytics, "compute_summary", compute_summary)
+    analytics.summary_cache.invalidate(OWNER)
+    yield make_client(("/api/analytics", analytics.router)), computed
+    analytics.summary_cache.invalidate(OWNER)
+
+
+def write_elsewhere(db, seq):
+    """A write committed through another worker: change_log moves, this worker's cache is not told."""
+    db.add(ChangeLog(seq=seq, owner_id=OWNER, entity="harvest", entity_id=seq, op="upsert"))
+    db.commit()
+
+
+def test_summary_cache_is_not_reused_after_a_write_through_another_worker(db, summary_client):
+    client, computed = summary_client
+
+    first = client.get("/api/analytics/summary", headers=HEADERS)
+    assert client.get("/api/analytics/summary", headers=HEADERS).json() == first.json()
+    assert len(computed) == 1
+
+    write_elsewhere(db, 1)
+    second = client.get("/api/analytics/summary", headers=HEADERS)
+    assert len(computed) == 2
+    assert second.json() == {"total_kg": 2.0}
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+def test_summary_etag_is_the_current_one_even_when_the_cache_is_stale(db, summary_client):
+    client, computed = summary_client
+    old_etag = client.get("/api/analytics/summary", headers=HEADERS).headers["etag"]
+
+    # Current copy: 304 without computing the summary again
+    assert client.get("/api/analytics/summary", headers={**HEADERS, "if-none-match": old_etag}).status_code == 304
+    assert len(computed) == 1
+
+    # Changed through another worker: the old copy must not get a 304 or the old ETag
+    write_elsewhere(db, 1)
+    response = client.get("/api/analytics/summary", headers={**HEADERS, "if-none-match": old_etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != old_etag
+    assert client.get(
+        "/api/analytics/summary", headers={**HEADERS, "if-none-match": response.headers["etag"]}
+    ).status_code == 304
@@ -0,0 +1,56 @@
+import hashlib
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from app.api import images
+from app.services import blob_store
+
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "BLOB_STORE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def jpeg_bytes():
+    out = io.BytesIO()
+    Image.new("RGB", (800, 600), (10, 120, 200)).save(out, "JPEG")
+    return out.getvalue()
+
+
+def stored_files(path):
+    return sorted(name for _, _, names in os.walk(path) for name in names)
+
+
+def test_truncated_image_is_rejected_without_writing_anything(store_dir):
+    raw = jpeg_bytes()
+    with pytest.raises(blob_store.InvalidImageError):
+        blob_store.store_image(raw[: len(raw) // 2])
+    assert stored_files(store_dir) == []
+
+
+def test_valid_image_stores_original_and_thumbnails(store_dir):
+    image_hash = blob_store.store_image(jpeg_bytes())
+    expected = len(blob_store.THUMBNAIL_SIZES) * len(blob_store.THUMBNAIL_FORMATS) + 1
+    assert len(stored_files(store_dir)) == expected
+    assert blob_store.original_file(image_hash) is not None
+
+
+def test_image_without_thumbnails_renders_them_on_demand(store_dir):
+    image_hash = blob_store.store_image(jpeg_bytes(), thumbnails=False)
+    assert stored_files(store_dir) == [image_hash]
+    assert blob_store.thumbnail_file(image_hash, 128, "webp") is not None
+
+
+def test_thumbnail_of_a_corrupt_original_is_not_found(store_dir, make_client):
+    raw = jpeg_bytes()[:300]
+    image_hash = hashlib.sha256(raw).hexdigest()
+    os.makedirs(store_dir / image_hash[:2])
+    (store_dir / image_hash[:2] / image_hash).write_bytes(raw) # Stored before uploads were checked
+
+    assert blob_store.thumbnail_file(image_hash, 128, "webp") is None
+    client = make_client(("/api/images", images.router))
+    assert client.get(f"/api/images/{image_hash}", params={"size": 128}).status_code == 404
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+from app.api import chat
+from app.models.chat import ChatHistory
+
+OWNER = "owner-1"
+HEADERS = {"x-user-id": OWNER}
+
+
+def add_messages(db, count, owner_id=OWNER):
+    start = datetime(2026, 1, 1)
+    for i in range(count):
+        db.add(ChatHistory(owner_id=owner_id, sender="user", message=f"m{i}", timestamp=start + timedelta(minutes=i)))
+    db.commit()
+
+
+def test_history_without_paging_keeps_the_bare_list(db, make_client):
+    client = make_client(("/api/chat", chat.router))
+    add_messages(db, 3)
+    add_messages(db, 2, owner_id="someone-else")
+
+    body = client.get("/api/chat/history", headers=HEADERS).json()
+    assert [m["text"] for m in body] == ["m0", "m1", "m2"]
+
+
+def test_paged_history_scrolls_back_with_the_cursor(db, make_client):
+    client = make_client(("/api/chat", chat.router))
+    add_messages(db, 5)
+
+    first = client.get("/api/chat/history", params={"paged": "true", "limit": 2}, headers=HEADERS).json()
+    assert [m["text"] for m in first["messages"]] == ["m3", "m4"]
+    texts = []
+    cursor = first["next_cursor"]
+    while cursor:
+        page = client.get("/api/chat/history", params={"before": cursor, "limit": 2}, headers=HEADERS).json()
+        texts = [m["text"] for m in page["messages"]] + texts
+        cursor = page["next_cursor"]
+    assert texts == ["m0", "m1", "m2"]
+
+
+def test_messages_without_an_owner_are_not_saved(monkeypatch, make_client):
+    saved = []
+
+    async def asave(*args):
+        saved.append(args)
+
+    monkeypatch.setattr(chat.chat_writer, "asave", asave)
+    monkeypatch.setattr(chat.gemini, "model", None)
+    client = make_client(("/api/chat", chat.router))
+
+    assert client.post("/api/chat/", data={"message": "fish fins are rotting"}).status_code == 200
+    assert saved == []
+    assert client.post("/api/chat/", data={"message": "fish fins are rotting"}, headers=HEADERS).status_code == 200
+    assert [args[:2] for args in saved] == [(OWNER, "user"), (OWNER, "bot")]
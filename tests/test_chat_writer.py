@@ -0,0 +1,27 @@
+import asyncio
+import threading
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.chat import ChatHistory
+from app.services.chat_writer import ChatWriter
+
+
+def test_async_save_writes_synchronously_off_the_event_loop(engine, db):
+    Session = sessionmaker(bind=engine)
+    threads = []
+
+    def session_factory():
+        threads.append(threading.get_ident())
+        return Session()
+
+    writer = ChatWriter(enabled=False, session_factory=session_factory)
+
+    async def save():
+        await writer.asave("owner-1", "user", "hello")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(save())
+    assert threads and loop_thread not in threads
+    assert [m.message for m in db.query(ChatHistory)] == ["hello"]
+    assert writer.stats()["sync_writes"] == 1
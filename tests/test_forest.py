@@ -0,0 +1,76 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from app.ml.forest import CompiledForest, export_forest, verify_parity
+
+FEATURES = ["fry_quantity", "days_cultured", "area_sqm"]
+TRAINING_CSV = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ml_engine", "data", "training_data.csv")
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    return pd.read_csv(TRAINING_CSV)
+
+
+@pytest.fixture(scope="module")
+def model(training_data):
+    # Fitted on a DataFrame, as train_model.py does
+    return RandomForestRegressor(n_estimators=25, random_state=42, n_jobs=1).fit(
+        training_data[FEATURES], training_data["yield_kg"]
+    )
+
+
+@pytest.fixture(scope="module")
+def forest(model, tmp_path_factory):
+    out = tmp_path_factory.mktemp("forest")
+    export_forest(model, str(out))
+    return CompiledForest.load(str(out))
+
+
+def sklearn_predict(model, X):
+    return model.predict(pd.DataFrame(np.asarray(X, dtype=np.float64), columns=FEATURES))
+
+
+def test_compiled_forest_matches_sklearn_on_training_rows(model, forest, training_data):
+    X = training_data[FEATURES].to_numpy()
+    expected = sklearn_predict(model, X)
+    assert np.array_equal(forest.predict(X), expected)
+    assert np.array_equal(forest.predict(X, chunk_size=7), expected)
+    assert [forest.predict_one(row) for row in X[:50]] == list(expected[:50])
+
+
+def test_compiled_forest_matches_sklearn_on_edge_inputs(model, forest):
+    # Exactly on split thresholds (the <= side), outside the training range,
+    # zeros and values that round when cast to float32
+    tree = model.estimators_[0].tree_
+    split = tree.feature[0]
+    on_threshold = np.full(3, 1000.0)
+    on_threshold[split] = tree.threshold[0]
+    X = np.array([
+        on_threshold,
+        [0, 0, 0],
+        [-5, -1, -100],
+        [1e9, 1e5, 1e9],
+        [16777217, 100.0000001, 1234.56789],
+        [np.finfo(np.float32).max, 1, 1],
+    ])
+    expected = sklearn_predict(model, X)
+    assert np.array_equal(forest.predict(X), expected)
+    assert [forest.predict_one(row) for row in X] == list(expected)
+
+
+def test_compiled_forest_rejects_wrong_shape(forest):
+    with pytest.raises(ValueError):
+        forest.predict(np.zeros((2, 4)))
+
+
+def test_verify_parity_leaves_warning_filters_alone(model, forest, training_data):
+    filters = list(warnings.filters)
+    report = verify_parity(model, forest, training_data[FEATURES].to_numpy()[:100])
+    assert report["exact_match"]
+    assert warnings.filters == filters
@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from app.services.knowledge_base import KnowledgeBase, offline_answer
+
+KNOWLEDGE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ml_engine", "data", "aquabot_knowledge.json")
+
+
+@pytest.fixture(scope="module")
+def kb():
+    return KnowledgeBase.load(KNOWLEDGE)
+
+
+@pytest.mark.parametrize("message", [
+    "random unrelated stuff",
+    "how do I reset my password",
+    "what time is it",
+    "recommend a movie",
+    "how much is bitcoin",
+    "good morning po",
+])
+def test_off_topic_messages_get_no_offline_answer(kb, message):
+    assert offline_answer(kb.search(message)) is None
+
+
+@pytest.mark.parametrize("message, entry_id", [
+    ("fish are gasping at the surface in the morning", "water-oxygen-low"),
+    ("namamatay ang mga isda ko", "disease-dying"),
+    ("ilang beses magpakain ng isda sa isang araw", "feed-frequency"),
+])
+def test_clear_matches_get_the_offline_answer(kb, message, entry_id):
+    matches = kb.search(message)
+    assert matches[0].entry_id == entry_id
+    assert offline_answer(matches) == matches[0].answer
@@ -0,0 +1,90 @@
+from datetime import date
+
+from app.models.harvest import HarvestLog
+from app.models.mortality import MortalityLog
+from app.models.pond import Pond
+from app.models.pond_status import PondStatus
+from app.models.stocking import StockingLog
+from app.services import pond_status
+
+OWNER = "owner-1"
+
+
+def add_pond(db, name="P"):
+    pond = Pond(owner_id=OWNER, name=name, location_desc="Test", coordinates=[[18.2, 121.5]], area_sqm=100.0)
+    db.add(pond)
+    db.flush()
+    pond_status.on_pond_created(db, pond)
+    db.commit()
+    return pond
+
+
+def stock(db, pond, day, fry_type, quantity):
+    row = StockingLog(pond_id=pond.id, stocking_date=day, fry_type=fry_type, fry_quantity=quantity)
+    db.add(row)
+    db.flush()
+    pond_status.on_stocking_added(db, row)
+    db.commit()
+    return row
+
+
+def lose(db, batch, quantity):
+    db.add(MortalityLog(stocking_id=batch.id, loss_date=date(2026, 4, 1), quantity_lost=quantity, weight_lost_kg=1.0, cause="Heat"))
+    db.flush()
+    pond_status.on_loss_reported(db, batch, quantity)
+    db.commit()
+
+
+def harvest(db, batch):
+    db.add(HarvestLog(stocking_id=batch.id, harvest_date=date(2026, 6, 1), total_weight_kg=100.0, market_price_per_kg=120.0))
+    db.flush()
+    pond_status.on_batch_harvested(db, batch)
+    db.commit()
+
+
+def stored(db, pond):
+    return pond_status.load_pond_status(db, [pond])[pond.id]
+
+
+def test_status_counts_live_fish_of_active_batches_only(db):
+    pond = add_pond(db)
+    tilapia = stock(db, pond, date(2026, 1, 1), "Tilapia", 1000)
+    bangus = stock(db, pond, date(2026, 3, 1), "Bangus", 500)
+    stock(db, pond, date(2026, 2, 1), " tilapia ", 200) # Same species, backdated
+    lose(db, tilapia, 100)
+    lose(db, bangus, 50)
+    harvest(db, bangus)
+    lose(db, bangus, 20) # After its harvest: no effect
+
+    expected = {
+        "live_fish_count": 1000 - 100 + 200, # Losses subtracted, harvested batch gone
+        "species": ["Tilapia"],
+        "last_stocked_at": date(2026, 2, 1), # Newest *active* stocking
+        "active_batch_count": 2,
+    }
+    assert pond_status.compute_pond_status(db, owner_id=OWNER) == {pond.id: expected}
+    assert stored(db, pond) == expected
+
+
+def test_pond_without_active_stock_has_no_computed_status(db):
+    pond = add_pond(db)
+    harvest(db, stock(db, pond, date(2026, 1, 1), "Tilapia", 1000))
+
+    assert pond_status.compute_pond_status(db, owner_id=OWNER) == {}
+    assert stored(db, pond) == pond_status.EMPTY_STATUS
+
+
+def test_rebuild_repairs_drifted_and_missing_rows_only(db):
+    drifted, missing, healthy = add_pond(db, "drifted"), add_pond(db, "missing"), add_pond(db, "healthy")
+    for pond in (drifted, missing, healthy):
+        stock(db, pond, date(2026, 1, 1), "Tilapia", 1000)
+
+    db.get(PondStatus, drifted.id).live_fish_count = 5
+    db.delete(db.get(PondStatus, missing.id))
+    db.commit()
+
+    assert pond_status.rebuild_pond_status(db, owner_id=OWNER) == 2
+    db.expire_all()
+    for pond in (drifted, missing, healthy):
+        assert stored(db, pond)["live_fish_count"] == 1000
+    assert pond_status.rebuild_pond_status(db, owner_id=OWNER) == 0
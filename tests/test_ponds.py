@@ -0,0 +1,59 @@
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.api import ponds
+from app.models.pond import Pond
+from app.models.pond_status import PondStatus
+from app.schemas.pond import PondResponse
+from app.services.pond_status import apply_pond_status, load_pond_status
+
+OWNER = "owner-1"
+HEADERS = {"x-user-id": OWNER}
+
+
+def add_ponds(db, count, start=0):
+    for i in range(start, start + count):
+        pond = Pond(
+            owner_id=OWNER, name=f"P{i}", location_desc="Test",
+            coordinates=[[18.2, 121.5], [18.21, 121.5], [18.21, 121.51]], area_sqm=100.0
+        )
+        db.add(pond)
+        db.flush()
+        db.add(PondStatus(pond_id=pond.id, live_fish_count=10 * i, species=["Tilapia"], active_batch_count=1))
+    db.commit()
+
+
+def count_list_queries(client, statements):
+    statements.clear()
+    response = client.get("/api/ponds/", headers=HEADERS)
+    assert response.status_code == 200
+    return len(response.json()), len(statements)
+
+
+def test_pond_list_query_count_does_not_grow_with_ponds(db, statements, make_client):
+    client = make_client(("/api/ponds", ponds.router))
+
+    add_ponds(db, 1)
+    one_pond, one_pond_queries = count_list_queries(client, statements)
+
+    add_ponds(db, 49, start=1)
+    fifty_ponds, fifty_ponds_queries = count_list_queries(client, statements)
+
+    assert (one_pond, fifty_ponds) == (1, 50)
+    assert one_pond_queries == fifty_ponds_queries
+
+
+def test_pond_list_matches_pond_response_for_integer_coordinates(db, make_client):
+    client = make_client(("/api/ponds", ponds.router))
+    db.add(Pond(owner_id=OWNER, name="Int", location_desc="Test", coordinates=[[18, 121], [18, 122], [19, 122]], area_sqm=100.0))
+    db.commit()
+
+    rows = db.query(Pond).filter(Pond.owner_id == OWNER).all()
+    apply_pond_status(rows, load_pond_status(db, rows))
+    adapter = TypeAdapter(List[PondResponse])
+    expected = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+    response = client.get("/api/ponds/", headers=HEADERS)
+    assert response.json()[0]["coordinates"] == [[18.0, 121.0], [18.0, 122.0], [19.0, 122.0]]
+    assert response.content == expected
@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.api import predictions
+
+
+class FakeModel:
+    version = "test"
+    feature_order = ("fry_quantity", "days_cultured", "area_sqm")
+
+    def predict(self, rows):
+        return np.asarray(rows)[:, 0] / 10
+
+
+def test_batch_reports_non_object_rows_per_row(make_client, monkeypatch):
+    monkeypatch.setattr(predictions.registry, "get", lambda: FakeModel())
+    client = make_client(("/api/predict", predictions.router))
+
+    response = client.post("/api/predict/batch", json={"rows": [
+        {"fry_quantity": 1000, "days_cultured": 120, "area_sqm": 500},
+        None, 5, [1, 2, 3],
+        {"fry_quantity": "many"}
+    ]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["predicted"], body["rejected"]) == (1, 4)
+    assert body["results"][0]["predicted_yield_kg"] is not None
+    assert [r["error"] for r in body["results"][1:4]] == ["row must be an object"] * 3
+    assert "fry_quantity" in body["results"][4]["error"]
+
+
+def test_model_listing_requires_the_admin_token(make_client, monkeypatch):
+    monkeypatch.setattr(predictions, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(predictions, "registry", SimpleNamespace(version="v1"))
+    monkeypatch.setattr(predictions, "read_current", lambda: "v1")
+    monkeypatch.setattr(predictions, "list_versions", lambda: [{"version": "v1", "path": "/models/v1"}])
+    client = make_client(("/api/predict", predictions.router))
+
+    assert client.get("/api/predict/models").status_code == 403
+    assert client.get("/api/predict/models", headers={"x-admin-token": "wrong"}).status_code == 403
+    response = client.get("/api/predict/models", headers={"x-admin-token": "secret"})
+    assert response.status_code == 200
+    assert response.json()["active"] == "v1"
@@ -0,0 +1,65 @@
+from datetime import date
+
+from app.api import sync
+from app.models.change_log import ChangeLog
+from app.models.pond import Pond
+from app.models.stocking import StockingLog
+
+OWNER = "owner-1"
+HEADERS = {"x-user-id": OWNER}
+
+
+def test_batch_reports_malformed_records_per_record(make_client):
+    client = make_client(("/api/sync", sync.router))
+
+    response = client.post("/api/sync/batch", headers=HEADERS, json={"records": [
+        None,
+        {"client_id": "no-type"},
+        {"type": "harvest", "client_id": "h1", "stocking_id": 1, "harvest_date": "2025-05-01"},
+    ]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["errors"]) == (0, 3)
+    results = body["results"]
+    assert [(r["client_id"], r["type"], r["status"]) for r in results] == [
+        (None, None, "error"), ("no-type", None, "error"), ("h1", "harvest", "error")
+    ]
+    assert results[0]["error"] == "record must be an object"
+    assert "total_weight_kg" in results[2]["error"]
+
+
+def add_stockings(db, count):
+    pond = Pond(owner_id=OWNER, name="P", location_desc="Test", coordinates=[[18.2, 121.5]], area_sqm=100.0)
+    db.add(pond)
+    db.flush()
+    db.add(ChangeLog(seq=1, owner_id=OWNER, entity="pond", entity_id=pond.id, op="upsert"))
+    for i in range(count):
+        batch = StockingLog(pond_id=pond.id, stocking_date=date(2026, 1, 1 + i), fry_type="Tilapia", fry_quantity=100)
+        db.add(batch)
+        db.flush()
+        db.add(ChangeLog(seq=2 + i, owner_id=OWNER, entity="stocking", entity_id=batch.id, op="upsert"))
+    db.add(ChangeLog(seq=100, owner_id="someone-else", entity="pond", entity_id=999, op="upsert"))
+    db.commit()
+    return pond
+
+
+def test_delta_pages_follow_the_cursor_until_has_more_is_false(db, make_client):
+    client = make_client(("/api/sync", sync.router))
+    pond = add_stockings(db, 4)
+
+    full = client.get("/api/sync", headers=HEADERS).json()
+    assert (full["full"], full["cursor"], full["has_more"]) == (True, 5, False)
+    assert [p["id"] for p in full["ponds"]] == [pond.id] and len(full["stockings"]) == 4
+
+    pages, cursor = [], 0
+    while True:
+        page = client.get("/api/sync", params={"since": cursor, "limit": 2}, headers=HEADERS).json()
+        pages.append((page["cursor"], page["has_more"], len(page["ponds"]), len(page["stockings"])))
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            break
+    assert pages == [(2, True, 1, 1), (4, True, 0, 2), (5, False, 0, 1)]
+
+    last = client.get("/api/sync", params={"since": cursor}, headers=HEADERS).json()
+    assert (last["cursor"], last["has_more"], last["stockings"]) == (5, False, [])
@@ -1,85 +1,279 @@
+"""
+Train the AquaPin yield model.
+
+Usage:
+    python train_model.py                                   # 2,000 synthetic rows, train, publish
+    python train_model.py --rows 20000000 --max-samples 0.05
+    python train_model.py --generate-only --rows 50000000 --chunk-size 2000000
+    python train_model.py --skip-generate                   # retrain on the existing CSV
+    python train_model.py --source db                       # real harvests from PostgreSQL
+    python train_model.py --source blend --rows 5000        # real harvests + synthetic rows
+    python train_model.py --source db --incremental         # add trees for new harvests only
+"""
+import argparse
+import os
+import time
+from contextlib import contextmanager
+
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, r2_score
 import joblib
-import os
+
+from app.ml.registry import publish_model, load_published, read_current
+
+FEATURES = ['fry_quantity', 'days_cultured', 'area_sqm']
+TARGET = 'yield_kg'
+
+CSV_PATH = "ml_engine/data/training_data.csv"
+HARVEST_CSV_PATH = "ml_engine/data/harvest_data.csv"
+MODEL_PATH = "ml_engine/models/yield_predictor.pkl"
+
+
+@contextmanager
+def stage(name):
+    """Print how long a pipeline stage took."""
+    print(f"⏳ {name}...")
+    start = time.perf_counter()
+    yield
+    print(f"   done in {time.perf_counter() - start:.2f}s")
+
 
 # 1. GENERATE SYNTHETIC DATA (Based on Tilapia Growth Models)
-def generate_aquaculture_data(n=2000):
-    np.random.seed(42) # Ensures we get the same "random" numbers every time
-    
-    data = []
-    for _ in range(n):
-        # Random inputs based on typical Philippines small-scale ponds
-        area_sqm = np.random.randint(200, 2000)
-        
-        # Stocking Density: 5 to 15 fish per sqm is standard
-        density = np.random.uniform(5, 15)
-        fry_quantity = int(area_sqm * density)
-        
-        # Culture Days: 90 to 150 days (3-5 months)
-        days_cultured = np.random.randint(90, 150)
-        
-        # -- THE SCIENCE PART (Calculating the Outcome) --
-        
-        # Survival Rate: Higher density = Lower survival
-        # Base 90%, minus 1% for every extra fish/sqm over 5
-        base_survival = 0.90
-        survival_rate = base_survival - ((density - 5) * 0.015)
-        # Add some random noise (disease, weather, luck)
-        survival_rate += np.random.normal(0, 0.05) 
-        survival_rate = np.clip(survival_rate, 0.5, 0.98) # Cap between 50% and 98%
-
-        # Average Weight per Fish: Longer time = Bigger fish
-        # Growth curve approximation
-        avg_weight_kg = 0.05 + (days_cultured * 0.0025) 
-        # Add noise (genetics, feeding quality)
-        avg_weight_kg += np.random.normal(0, 0.02)
-        
-        # Calculate Total Yield
-        surviving_fish = fry_quantity * survival_rate
-        total_yield_kg = surviving_fish * avg_weight_kg
-
-        data.append([fry_quantity, days_cultured, area_sqm, round(total_yield_kg, 2)])
-
-    # Convert to Table
-    df = pd.DataFrame(data, columns=['fry_quantity', 'days_cultured', 'area_sqm', 'yield_kg'])
-    return df
-
-# 2. RUN TRAINING
-print("🌱 Generating Synthetic Dataset...")
-df = generate_aquaculture_data()
-
-# Save CSV so you can show it in your Thesis
-csv_path = "ml_engine/data/training_data.csv"
-os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-df.to_csv(csv_path, index=False)
-print(f"✅ Dataset saved to {csv_path}")
-
-# 3. SPLIT DATA
-X = df[['fry_quantity', 'days_cultured', 'area_sqm']] # Inputs
-y = df['yield_kg']                                    # Target
-
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# 4. TRAIN MODEL
-print("🧠 Training Random Forest Model...")
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
-
-# 5. EVALUATE
-predictions = model.predict(X_test)
-mae = mean_absolute_error(y_test, predictions)
-r2 = r2_score(y_test, predictions)
-
-print(f"\n--- MODEL RESULTS ---")
-print(f"Accuracy (R2 Score): {r2:.2f} (1.0 is perfect)")
-print(f"Average Error: {mae:.2f} kg")
-
-# 6. SAVE THE BRAIN
-model_path = "ml_engine/models/yield_predictor.pkl"
-os.makedirs(os.path.dirname(model_path), exist_ok=True)
-joblib.dump(model, model_path)
-print(f"💾 Model saved to {model_path}")
\ No newline at end of file
+def generate_aquaculture_data(n=2000, seed=42, rng=None):
+    """
+    Vectorized synthetic dataset: every column is drawn for all n rows at
+    once. Pass `rng` to continue an existing random stream (chunking).
+    """
+    rng = rng if rng is not None else np.random.default_rng(seed)
+
+    # Random inputs based on typical Philippines small-scale ponds
+    area_sqm = rng.integers(200, 2000, n)
+
+    # Stocking Density: 5 to 15 fish per sqm is standard
+    density = rng.uniform(5, 15, n)
+    fry_quantity = (area_sqm * density).astype(np.int64)
+
+    # Culture Days: 90 to 150 days (3-5 months)
+    days_cultured = rng.integers(90, 150, n)
+
+    # -- THE SCIENCE PART (Calculating the Outcome) --
+
+    # Survival Rate: Higher density = Lower survival
+    # Base 90%, minus 1.5% for every extra fish/sqm over 5,
+    # plus noise (disease, weather, luck), capped between 50% and 98%
+    survival_rate = 0.90 - ((density - 5) * 0.015) + rng.normal(0, 0.05, n)
+    survival_rate = np.clip(survival_rate, 0.5, 0.98)
+
+    # Average Weight per Fish: Longer time = Bigger fish
+    # Growth curve approximation + noise (genetics, feeding quality)
+    avg_weight_kg = 0.05 + (days_cultured * 0.0025) + rng.normal(0, 0.02, n)
+
+    # Calculate Total Yield
+    total_yield_kg = np.round(fry_quantity * survival_rate * avg_weight_kg, 2)
+
+    return pd.DataFrame({
+        'fry_quantity': fry_quantity,
+        'days_cultured': days_cultured,
+        'area_sqm': area_sqm,
+        'yield_kg': total_yield_kg
+    })
+
+
+def iter_aquaculture_chunks(n, chunk_size=1_000_000, seed=42):
+    """Yield the dataset in DataFrames of at most chunk_size rows (one seeded stream)."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n, chunk_size):
+        yield generate_aquaculture_data(min(chunk_size, n - start), rng=rng)
+
+
+def write_dataset(path, n, chunk_size=1_000_000, seed=42):
+    """Stream n synthetic rows to a CSV without holding them all in memory."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    for i, chunk in enumerate(iter_aquaculture_chunks(n, chunk_size, seed)):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        written += len(chunk)
+        if n > chunk_size:
+            print(f"   ... {written:,} / {n:,} rows")
+    return written
+
+
+def load_dataset(path, max_rows=None, chunk_size=1_000_000):
+    """Read the CSV in chunks with compact dtypes (float32 features)."""
+    dtypes = {name: np.float32 for name in FEATURES + [TARGET]}
+    chunks = pd.read_csv(path, dtype=dtypes, chunksize=chunk_size, nrows=max_rows)
+    return pd.concat(chunks, ignore_index=True)
+
+
+# 2. TRAIN + EVALUATE
+def train(df, n_estimators=100, n_jobs=-1, max_samples=None, seed=42, test_size=0.2):
+    X = df[FEATURES] # Inputs
+    y = df[TARGET]   # Target
+    # Optional per-row weight (real harvests can count more than synthetic rows)
+    w = df['weight'].fillna(1.0) if 'weight' in df else pd.Series(1.0, index=df.index)
+
+    X_train, X_test, y_train, y_test, w_train, _ = train_test_split(
+        X, y, w, test_size=test_size, random_state=seed
+    )
+
+    with stage(f"Training Random Forest ({n_estimators} trees, {len(X_train):,} rows, n_jobs={n_jobs})"):
+        model = RandomForestRegressor(
+            n_estimators=n_estimators,
+            n_jobs=n_jobs,           # Fit trees in parallel on all cores
+            max_samples=max_samples, # Bootstrap subsample per tree for huge datasets
+            random_state=seed
+        )
+        model.fit(X_train, y_train, sample_weight=w_train)
+
+    # Serve single-threaded: accumulation order then matches the compiled forest
+    model.set_params(n_jobs=1)
+
+    with stage("Evaluating"):
+        predictions = model.predict(X_test)
+        metrics = {
+            "r2": float(r2_score(y_test, predictions)),
+            "mae_kg": float(mean_absolute_error(y_test, predictions)),
+            "train_rows": int(len(X_train)),
+            "test_rows": int(len(X_test)),
+        }
+
+    print(f"\n--- MODEL RESULTS ---")
+    print(f"Accuracy (R2 Score): {metrics['r2']:.2f} (1.0 is perfect)")
+    print(f"Average Error: {metrics['mae_kg']:.2f} kg\n")
+    return model, metrics
+
+
+def load_harvests(args, since_harvest_id=0):
+    """Stream real harvest rows out of PostgreSQL. Returns (DataFrame, last harvest id)."""
+    # Imported here: app.db.connection needs DATABASE_URL, synthetic training does not
+    from app.db.connection import engine
+    from app.ml.harvest_data import export_harvest_data
+
+    with stage(f"🐟 Streaming harvests (id > {since_harvest_id}) from the database"):
+        rows, last_id = export_harvest_data(engine, args.harvest_path, since_harvest_id, args.db_chunk_size)
+        print(f"   {rows:,} harvest rows")
+    if rows == 0:
+        return None, last_id
+    return load_dataset(args.harvest_path, chunk_size=args.chunk_size), last_id
+
+
+def refit_incremental(args):
+    """
+    Add trees fitted only on harvests recorded since the active version was
+    trained (warm start). The existing trees are kept unchanged.
+    """
+    version = read_current()
+    if version is None:
+        raise SystemExit("No active model version to refit. Train a full model first.")
+    model, metadata = load_published(version)
+    since = int(metadata.get("last_harvest_id", 0))
+
+    new_rows, last_id = load_harvests(args, since)
+    if new_rows is None:
+        print(f"✅ No harvests since id {since}. Version {version} is up to date.")
+        return
+
+    X, y = new_rows[FEATURES], new_rows[TARGET]
+    before = model.predict(X)
+
+    added = args.incremental_trees
+    with stage(f"Refitting: {added} new trees on {len(new_rows):,} new harvests"):
+        model.set_params(warm_start=True, n_estimators=model.n_estimators + added, n_jobs=args.n_jobs)
+        model.fit(X, y)
+        model.set_params(warm_start=False, n_jobs=1)
+
+    after = model.predict(X)
+    metrics = {
+        **metadata.get("metrics", {}),
+        "new_rows": int(len(new_rows)),
+        "new_rows_mae_kg_before": float(mean_absolute_error(y, before)),
+        "new_rows_mae_kg_after": float(mean_absolute_error(y, after)),
+    }
+    print(f"Average Error on new harvests: {metrics['new_rows_mae_kg_before']:.2f} kg -> {metrics['new_rows_mae_kg_after']:.2f} kg")
+
+    if not args.no_publish:
+        new_version = publish_model(model, metrics=metrics, feature_order=FEATURES, extra_metadata={
+            "source": metadata.get("source", args.source),
+            "parent_version": version,
+            "last_harvest_id": last_id,
+        })
+        print(f"📦 Registered model version {new_version} (now active)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic data and train the yield model")
+    parser.add_argument("--rows", type=int, default=2000, help="Synthetic rows to generate")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="Rows generated/read per chunk")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-path", default=CSV_PATH)
+    parser.add_argument("--generate-only", action="store_true", help="Write the CSV and stop")
+    parser.add_argument("--skip-generate", action="store_true", help="Train on the existing CSV")
+    parser.add_argument("--max-train-rows", type=int, default=None, help="Only read the first N rows")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Cores used for fitting (-1 = all)")
+    parser.add_argument("--max-samples", type=float, default=None, help="Fraction of rows per tree")
+    parser.add_argument("--no-publish", action="store_true", help="Do not register the model")
+    parser.add_argument("--source", choices=["synthetic", "db", "blend"], default="synthetic",
+                        help="Synthetic rows, real harvests from the database, or both")
+    parser.add_argument("--harvest-path", default=HARVEST_CSV_PATH, help="Where streamed harvests are cached")
+    parser.add_argument("--db-chunk-size", type=int, default=10000, help="Rows per server-side cursor fetch")
+    parser.add_argument("--real-weight", type=float, default=1.0, help="Sample weight of real rows in a blend")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Refit the active version on harvests added since it was trained")
+    parser.add_argument("--incremental-trees", type=int, default=20, help="Trees added per incremental refit")
+    args = parser.parse_args(argv)
+
+    total_start = time.perf_counter()
+
+    if args.incremental:
+        refit_incremental(args)
+        print(f"✅ Finished in {time.perf_counter() - total_start:.2f}s")
+        return
+
+    frames = []
+    last_harvest_id = None
+
+    if args.source in ("synthetic", "blend"):
+        # Save CSV so you can show it in your Thesis
+        if not args.skip_generate:
+            with stage(f"🌱 Generating {args.rows:,} synthetic rows to {args.data_path}"):
+                write_dataset(args.data_path, args.rows, args.chunk_size, args.seed)
+        if args.generate_only:
+            return
+
+        with stage(f"Loading {args.data_path}"):
+            frames.append(load_dataset(args.data_path, args.max_train_rows, args.chunk_size))
+
+    if args.source in ("db", "blend"):
+        real, last_harvest_id = load_harvests(args)
+        if real is not None:
+            real['weight'] = args.real_weight
+            frames.append(real)
+
+    if not frames:
+        raise SystemExit("No training rows. Record some harvests or use --source synthetic.")
+    df = pd.concat(frames, ignore_index=True)
+
+    model, metrics = train(df, args.n_estimators, args.n_jobs, args.max_samples, args.seed)
+
+    # 3. SAVE THE BRAIN
+    with stage("💾 Saving model"):
+        os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
+        joblib.dump(model, MODEL_PATH)
+
+        # Publish to the model registry (the API hot-reloads the new version)
+        if not args.no_publish:
+            extra = {"source": args.source}
+            if last_harvest_id is not None:
+                extra["last_harvest_id"] = last_harvest_id # Watermark for --incremental
+            version = publish_model(model, metrics=metrics, feature_order=FEATURES, extra_metadata=extra)
+            print(f"📦 Registered model version {version} (now active)")
+
+    print(f"✅ Finished in {time.perf_counter() - total_start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()